@@ -2,8 +2,77 @@ import json
 import re
 import datetime
 import os
-import matplotlib.pyplot as plt
-import pandas as pd
+import sys
+import argparse
+import sqlite3
+import itertools
+import functools
+import collections
+import importlib
+import contextlib
+import bisect
+import hashlib
+import threading
+import time
+import warnings
+from array import array
+
+# Lazy Imports
+
+class LazyModule:
+    """
+    Stands in for a heavy module and imports it the first time one of its attributes is used,
+    so starting the program or importing the analyzer doesn't pay for plotting and table libraries.
+    Primary Author: Team collectively
+    No techniques claimed here.
+    """
+
+    def __init__(self, name):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Parameters:
+            name (str): Fully qualified module name, e.g. 'matplotlib.pyplot'.
+
+        Side Effects:
+            - Assigns instance attribute: name. Nothing is imported yet.
+        """
+        self.name = name
+
+    def __getattr__(self, attr):
+        """
+        Primary Author: Team collectively
+        Technique claimed: magic methods (other than __init__)
+
+        Imports the real module (once) and forwards the attribute lookup to it.
+
+        Side Effects:
+            - May import the module.
+        """
+        module = importlib.import_module(self.name)
+        return getattr(module, attr)
+
+    def is_loaded(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Returns:
+            bool: True if the module has already been imported by anyone.
+        """
+        return self.name in sys.modules
+
+
+plt = LazyModule('matplotlib.pyplot')
+pd = LazyModule('pandas')
+np = LazyModule('numpy')
+matplotlib = LazyModule('matplotlib')
+mpl_figure = LazyModule('matplotlib.figure')
+mpl_agg = LazyModule('matplotlib.backends.backend_agg')
+asyncio = LazyModule('asyncio')
+pa = LazyModule('pyarrow')
+pa_feather = LazyModule('pyarrow.feather')
 
 # Configuration Data
 
@@ -34,6 +103,17 @@ DISTORTION_ADVICE = {
     "jumping_to_conclusions": "Gather more evidence before concluding what others think or intend."
 }
 
+SUICIDAL_PHRASES = [
+    "kill myself", "want to die", "suicidal", "end my life",
+    "can't go on", "no reason to live", "die", "death wish"
+]
+
+STRICT_SUICIDAL_PHRASES = SUICIDAL_PHRASES + ["jump off a bridge", "nothing matters", "rather not live"]
+
+ABSOLUTE_TERMS = ["always", "never", "forever", "everything", "nothing"]
+
+UNREALISTIC_PHRASES = ["all my problems will cease", "live happily ever after", "do anything in the world"]
+
 # Distortion Class
 
 class Distortion:
@@ -56,10 +136,11 @@ class Distortion:
             explanation (str): Explanation of the distortion.
 
         Side Effects:
-            - Assigns instance attributes: name, patterns, explanation.
+            - Assigns instance attributes: name, patterns, compiled_patterns, explanation.
         """
         self.name = name
         self.patterns = patterns
+        self.compiled_patterns = [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
         self.explanation = explanation
 
     def __str__(self):
@@ -72,7 +153,7 @@ class Distortion:
         """
         return f"Distortion: {self.name}\nExplanation: {self.explanation}"
 
-    def match(self, text):
+    def match(self, text, instrumentation=None):
         """
         Primary Author: John
         No techniques claimed here.
@@ -81,394 +162,5461 @@ class Distortion:
         
         Parameters:
             text (str): The user input to analyze.
+            instrumentation (Instrumentation): If given, each pattern tried is counted and timed.
 
         Returns:
             (bool, str): (True, pattern) if a match is found, otherwise (False, None).
         
         Side Effects:
-            - None
+            - Updates instrumentation, if given
         """
-        for pattern in self.patterns:
-            if re.search(pattern, text, re.IGNORECASE):
+        if instrumentation is not None:
+            call_start = time.perf_counter()
+            result = False, None
+            for pattern, compiled in zip(self.patterns, self.compiled_patterns):
+                if instrumentation.search(self.name, pattern, compiled, text):
+                    result = True, pattern
+                    break
+            instrumentation.record_call('Distortion.match', time.perf_counter() - call_start)
+            return result
+        for pattern, compiled in zip(self.patterns, self.compiled_patterns):
+            if compiled.search(text):
                 return True, pattern
         return False, None
 
 
-# CognitiveDistortionAnalyzer Class
+# DistortionMatcher Class
 
-class CognitiveDistortionAnalyzer:
+# One detection in analyze_text_iter output; start and end are character offsets into the analyzed text.
+DistortionHit = collections.namedtuple('DistortionHit', ['name', 'pattern', 'start', 'end'])
+
+# Sentences are the runs of text between '.', '!' and '?', as re.split(r'[.!?]') would give them.
+_SENTENCE_RE = re.compile(r'[^.!?]+')
+# The same sentences with surrounding whitespace left out, as str.strip() would; blank ones never match.
+_STRIPPED_SENTENCE_RE = re.compile(r'[^.!?\s](?:[^.!?]*[^.!?\s])?')
+
+class DistortionMatcher:
     """
-    Analyzes user input for cognitive distortions and manages user data entries.
+    Scans a sentence for all known distortions at once, using one combined regex built from every pattern.
+    Primary Author: Team collectively
+    No techniques claimed here.
 
-    Composition: Holds a list of Distortion instances.
+    Composition: Holds the Distortion instances it was built from.
     """
 
-    def __init__(self):
+    def __init__(self, distortions):
         """
         Primary Author: Team collectively
         No techniques claimed here.
 
-        Initializes the analyzer with empty data structures.
-        
+        Compiles a single alternation with one named group per distortion, plus a per-distortion
+        alternation used to confirm which distortions are present once the combined scan finds a hit.
+        The same phrase may belong to several distortions (e.g. "always"), and an alternation only
+        reports one of them, so the combined regex is used to find the first hit and to skip sentences
+        with none, rather than as the final answer. A distortion whose patterns can't be joined (they
+        use backreferences, or inline flags that are only allowed at the start of a pattern) gets no
+        alternation; its patterns are tried one at a time, and there is no combined regex.
+
+        Parameters:
+            distortions (list of Distortion): The distortions to match, in reporting order.
+
         Side Effects:
-            - Sets self.distortions_data, self.user_data, and self.distortions to empty.
+            - Assigns instance attributes: distortions, display_patterns, distortion_regexes, combined.
         """
-        self.distortions_data = {}
-        self.user_data = []
-        self.distortions = []
+        self.distortions = list(distortions)
+        self.display_patterns = [[re.sub(r'\\b', '', p) for p in d.patterns] for d in self.distortions]
+        self.distortion_regexes = [self._join(d.patterns) for d in self.distortions]
 
-    def load_distortions_data(self):
+        alternatives = [
+            f"(?P<d{i}>{regex.pattern})"
+            for i, regex in enumerate(self.distortion_regexes) if regex is not None
+        ]
+        joinable = all(regex is not None or not d.patterns
+                       for d, regex in zip(self.distortions, self.distortion_regexes))
+        self.combined = None
+        if alternatives and joinable:
+            try:
+                self.combined = re.compile('|'.join(alternatives), re.IGNORECASE)
+            except re.error:
+                self.combined = None
+
+    @staticmethod
+    def _join(patterns):
         """
-        Primary Author: Josh
-        Techniques claimed: with statements, comprehensions
+        Primary Author: Team collectively
+        No techniques claimed here.
 
-        Loads distortion definitions from 'distortion_patterns.json' and builds Distortion objects.
+        Parameters:
+            patterns (list of str): One distortion's patterns.
 
-        Side Effects:
-            - Reads from 'distortion_patterns.json'
-            - Updates self.distortions_data and self.distortions
+        Returns:
+            re.Pattern: One alternation of all of them, or None if there are none or they can't be joined.
         """
+        # Numbered backreferences would point at the wrong group once patterns are joined.
+        if not patterns or any(re.search(r'\\[1-9]|\(\?P=', p) for p in patterns):
+            return None
         try:
-            with open('distortion_patterns.json', 'r') as file:
-                data = json.load(file)
-                self.distortions_data = data
-
-            self.distortions = [
-                Distortion(name=k, patterns=v["patterns"], explanation=v["explanation"])
-                for k, v in data.items()
-            ]
-        except FileNotFoundError:
-            print("Error: 'distortion_patterns.json' not found.")
-        except json.JSONDecodeError:
-            print("Error: 'distortion_patterns.json' isn't a valid JSON file.")
+            return re.compile('|'.join(f'(?:{p})' for p in patterns), re.IGNORECASE)
+        except re.error:
+            return None
 
-    def analyze_text(self, text):
+    def match(self, sentence):
         """
         Primary Author: Team collectively
         No techniques claimed here.
 
-        Examines the given text for distortions by checking each sentence against known patterns.
+        Finds every distortion present in a single sentence.
 
         Parameters:
-            text (str): The user's input text.
+            sentence (str): One stripped sentence of user input.
 
         Returns:
-            list of (str, str): Distortion name and the matched pattern.
+            list of (str, str): Distortion name and the first of its patterns (in file order) that matches,
+            with word-boundary markers removed, in the same order as the distortions.
 
         Side Effects:
             - None
         """
-        detected_distortions = []
-        sentences = re.split(r'[.!?]', text)
-        for sentence in sentences:
-            sentence = sentence.strip()
-            if not sentence:
-                continue
-            for d in self.distortions:
-                found, pattern = d.match(sentence)
-                if found:
-                    display_pattern = re.sub(r'\\b', '', pattern)
-                    detected_distortions.append((d.name, display_pattern))
-        return detected_distortions
+        return [(name, pattern) for name, pattern, _, _ in self.match_spans(sentence)]
 
-    def detect_suicidal_thoughts(self, text, strict=False):
+    def match_spans(self, sentence, instrumentation=None):
         """
-        Primary Author: Zainab
-        Techniques claimed: regular expressions
+        Primary Author: Team collectively
+        No techniques claimed here.
 
-        Checks text for suicidal ideation terms, optionally using stricter criteria.
+        Like match, but also reports where in the sentence each distortion was found.
 
         Parameters:
-            text (str)
-            strict (bool)
+            sentence (str): One stripped sentence of user input.
+            instrumentation (Instrumentation): If given, every pattern is tried on its own (in file
+                order, up to the first hit of each distortion) so each can be counted and timed.
+                The results are the same either way.
 
         Returns:
-            bool: True if suicidal patterns are found.
+            list of (str, str, int, int): Distortion name, matched pattern, and the start and end offsets
+            of that pattern's first match within the sentence.
 
         Side Effects:
-            - None
+            - Updates instrumentation, if given
         """
-        suicidal_patterns = [
-            "kill myself", "want to die", "suicidal", "end my life",
-            "can't go on", "no reason to live", "die", "death wish"
-        ]
-        if strict:
-            suicidal_patterns += ["jump off a bridge", "nothing matters", "rather not live"]
+        if instrumentation is not None:
+            results = []
+            for i, d in enumerate(self.distortions):
+                for j, compiled in enumerate(d.compiled_patterns):
+                    found = instrumentation.search(d.name, d.patterns[j], compiled, sentence)
+                    if found:
+                        results.append((d.name, self.display_patterns[i][j], found.start(), found.end()))
+                        break
+            return results
 
-        for pattern in suicidal_patterns:
-            if re.search(pattern, text, re.IGNORECASE):
-                return True
-        return False
+        start = 0
+        if self.combined is not None:
+            first = self.combined.search(sentence)
+            if first is None:
+                return []
+            # Nothing can match to the left of the leftmost hit of the combined regex.
+            start = first.start()
 
-    def filter_unrealistic_statements(self, text, intensity=1):
-        """
-        Primary Author: Zainab
-        Techniques claimed: optional parameters/keyword arguments
+        results = []
+        for i, regex in enumerate(self.distortion_regexes):
+            if regex is not None and not regex.search(sentence, start):
+                continue
+            d = self.distortions[i]
+            for j, compiled in enumerate(d.compiled_patterns):
+                found = compiled.search(sentence, start)
+                if found:
+                    results.append((d.name, self.display_patterns[i][j], found.start(), found.end()))
+                    break
+        return results
 
-        Evaluates text for absolute or unrealistic statements, with 'intensity' influencing strictness.
 
-        Parameters:
-            text (str)
-            intensity (int)
+# SentenceCache Class
 
-        Returns:
-            int: Severity level (0,1,2)
+class SentenceCache:
+    """
+    Size-bounded, least-recently-used cache of per-sentence match results.
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Journal text repeats a lot (the canned answers to controlled questions in particular), so a repeated
+    sentence costs one dictionary lookup instead of a full pattern scan. Results are only valid for the
+    pattern set that produced them, so the cache empties itself when it sees a new pattern-set version.
+    """
+
+    def __init__(self, maxsize=4096):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Parameters:
+            maxsize (int): Most sentences kept at once. 0 disables caching.
 
         Side Effects:
-            - None
+            - Assigns instance attributes: maxsize, version, hits, misses, evictions, invalidations.
+        """
+        self.maxsize = maxsize
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = collections.OrderedDict()
+        # Batch analysis and the service call analyze_text from several threads.
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(sentence):
         """
-        words = text.lower().split()
-        absolute_terms = {"always", "never", "forever", "everything", "nothing"}
-        unrealistic_phrases = {"all my problems will cease", "live happily ever after", "do anything in the world"}
+        Primary Author: Team collectively
+        No techniques claimed here.
 
-        has_abs = any(w in absolute_terms for w in words)
-        has_unreal = any(phrase in text.lower() for phrase in unrealistic_phrases)
+        Normalizes a stripped sentence into a cache key. Matching ignores case, so ASCII sentences are
+        lowercased to share one entry; other text is kept as-is, because str.lower() and the regex
+        engine's case folding disagree on a few non-ASCII characters.
 
-        severity = 2 if (has_abs and has_unreal and intensity > 1) else (1 if (has_abs or has_unreal) else 0)
-        return severity
+        Parameters:
+            sentence (str): One stripped sentence.
 
-    def add_user_entry(self, mood, responses, intensity):
+        Returns:
+            str: The cache key.
+        """
+        return sentence.lower() if sentence.isascii() else sentence
+
+    def get(self, version, key):
         """
         Primary Author: Team collectively
         No techniques claimed here.
 
-        Records a new user entry, including mood, responses, intensity, and detected distortions.
+        Looks up the results cached for a sentence under a pattern-set version.
 
         Parameters:
-            mood (str)
-            responses (list of str)
-            intensity (int)
+            version (str): Version of the pattern set doing the matching.
+            key (str): Value from SentenceCache.key.
 
         Returns:
-            (list, str): (detected_distortions, combined_text)
+            tuple or None: The cached results, or None on a miss.
 
         Side Effects:
-            - Modifies self.user_data
+            - Counts a hit or miss, marks the entry as recently used, and empties the cache when
+              the version differs from the one it holds.
         """
-        combined_text = ' '.join(responses)
-        distortions = self.analyze_text(combined_text)
-        entry = {
-            'timestamp': datetime.datetime.now().isoformat(),
-            'mood': mood,
-            'responses': responses,
-            'distortions': [d[0] for d in distortions],
-            'intensity': intensity
-        }
-        self.user_data.append(entry)
-        return distortions, combined_text
+        if self.maxsize <= 0:
+            return None
+        with self._lock:
+            if version != self.version:
+                if self._entries:
+                    self._entries.clear()
+                    self.invalidations += 1
+                self.version = version
+            results = self._entries.get(key)
+            if results is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return results
 
-    def save_user_data(self):
+    def put(self, version, key, results):
         """
-        Primary Author: John
-        Technique claimed: json.dump()
+        Primary Author: Team collectively
+        No techniques claimed here.
 
-        Saves user_data to 'user_data.json'.
+        Stores the results for a sentence, evicting the least recently used one when full.
+        Results from an older pattern set than the cache holds are dropped.
+
+        Parameters:
+            version (str): Version of the pattern set that produced the results.
+            key (str): Value from SentenceCache.key.
+            results (tuple): The match results.
 
         Side Effects:
-            - Writes to 'user_data.json'
+            - Updates the cache and the eviction count.
         """
-        try:
-            with open('user_data.json', 'w') as f:
-                json.dump(self.user_data, f, indent=4)
-        except Exception as e:
-            print(f"Error saving user data: {e}")
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if version != self.version:
+                return
+            self._entries[key] = results
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
 
-    def load_user_data(self):
+    def clear(self):
         """
         Primary Author: Team collectively
         No techniques claimed here.
 
-        Loads existing user data from 'user_data.json', if present.
+        Empties the cache and resets its counters.
 
         Side Effects:
-            - Updates self.user_data
+            - Modifies the cache in place.
         """
-        if os.path.exists('user_data.json'):
-            try:
-                with open('user_data.json', 'r') as f:
-                    self.user_data = json.load(f)
-            except json.JSONDecodeError:
-                print("Error: 'user_data.json' is not valid JSON.")
-                self.user_data = []
-        else:
-            self.user_data = []
+        with self._lock:
+            self._entries.clear()
+            self.version = None
+            self.hits = self.misses = self.evictions = self.invalidations = 0
 
-    def visualize_user_mood_timeline(self):
+    def stats(self):
         """
-        Primary Author: Josh
-        Techniques claimed: visualizing data with pyplot 
-
-        Shows a scatter plot of mood intensity over the current week, with different colors for each mood.
-        This method uses matplotlib only to generate a clear, color-coded scatter plot.
-
-        Parameters:
-            None
+        Primary Author: Team collectively
+        No techniques claimed here.
 
         Returns:
-            None
-
-        Side Effects:
-            - Displays a matplotlib figure window.
+            dict: size, maxsize, hits, misses, evictions, invalidations and hit_rate.
         """
-        if not self.user_data:
-            print("No user data to visualize.")
-            return
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
 
-        today = datetime.date.today()
-        start_of_week = today - datetime.timedelta(days=today.weekday())
-        end_of_week = start_of_week + datetime.timedelta(days=6)
 
-        mood_entries = []
-        for entry in self.user_data:
-            ts = datetime.datetime.fromisoformat(entry['timestamp'])
-            day = ts.date()
-            if start_of_week <= day <= end_of_week:
-                mood_entries.append({
-                    'date': day,
-                    'intensity': entry['intensity'],
-                    'mood': entry['mood']
-                })
-
-        if not mood_entries:
-            print("No data in the current week to visualize.")
-            return
+# Instrumentation Class
 
-        df = pd.DataFrame(mood_entries)
-        df['date'] = df['date'].astype(str)
+# Upper bounds, in seconds, of the latency histogram buckets; a final +Inf bucket is implied.
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
 
-        fig, ax = plt.subplots(figsize=(10, 6))
 
-        unique_moods = df['mood'].unique()
-        colors = plt.cm.get_cmap('tab10', len(unique_moods))
+def _prometheus_labels(**labels):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
 
-        for i, mood_cat in enumerate(unique_moods):
-            subset = df[df['mood'] == mood_cat]
-            ax.scatter(subset['date'], subset['intensity'], label=mood_cat, color=colors(i), s=100)
+    Formats a Prometheus label set, escaping backslashes, quotes and newlines in the values.
 
-        ax.set_xlabel("Date")
-        ax.set_ylabel("Intensity (1-5)")
-        ax.set_title("Weekly Mood Intensity by Day and Emotion")
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        ax.legend(title="Mood")
-        plt.show()
+    Returns:
+        str: e.g. '{distortion="labeling",pattern="I\'m a"}'
+    """
+    pairs = []
+    for key, value in labels.items():
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{key}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+class Instrumentation:
+    """
+    Opt-in counters for the distortion patterns: how often each one is tried, how often it hits and
+    how long it takes, plus latency histograms for whole analyze_text and Distortion.match calls.
+    Matching only pays for this when an Instrumentation is passed in (see
+    CognitiveDistortionAnalyzer.instrumentation); otherwise the cost is one None check per call.
+    Sentences answered from the analyzer's sentence cache aren't matched again, so they add to the
+    analyze_text latencies but not to the pattern counts.
+    Primary Author: Team collectively
+    No techniques claimed here.
+    """
 
-    def display_mood_table(self):
+    def __init__(self, buckets=LATENCY_BUCKETS):
         """
-        Primary Author: Josh
+        Primary Author: Team collectively
         No techniques claimed here.
 
-        Prints a table of recorded moods and their intensities using pandas.
+        Parameters:
+            buckets (tuple of float): Ascending histogram bucket upper bounds, in seconds.
 
         Side Effects:
-            - Prints a table to console
+            - Assigns instance attributes: buckets, patterns, calls.
         """
-        if not self.user_data:
-            print("No user data available to display.")
-            return
+        self.buckets = tuple(buckets)
+        # (distortion, pattern) -> [evaluations, hits, seconds]
+        self.patterns = {}
+        # call name -> [count per bucket (last one is +Inf), total seconds]
+        self.calls = {}
+        self._lock = threading.Lock()
 
-        data = [(entry['mood'], entry['intensity']) for entry in self.user_data]
-        df = pd.DataFrame(data, columns=['Mood', 'Intensity'])
-        print(df.to_string(index=False))
-
-    def clear_user_data(self):
+    def search(self, distortion, pattern, compiled, text):
         """
         Primary Author: Team collectively
         No techniques claimed here.
 
-        Clears all user data and removes any existing 'user_data.json', and closes all figure windows.
+        Runs one compiled pattern over the text and records the evaluation.
 
-        Side Effects:
-            - Empties self.user_data
-            - Deletes user_data.json if present
-            - Closes matplotlib figures
-        """
-        self.user_data = []
-        if os.path.exists('user_data.json'):
-            os.remove('user_data.json')
-        plt.close('all')
-        print("All user data has been cleared.")
+        Parameters:
+            distortion (str): Name of the distortion the pattern belongs to.
+            pattern (str): The pattern as written in the patterns file.
+            compiled (re.Pattern): Its compiled form.
+            text (str): Text to search.
 
-# User Input Handling Class
+        Returns:
+            re.Match or None: The search result.
 
-class UserInputHandler:
-    """
-    Manages user interactions related to selecting moods and responding to guided questions.
-    Primary Author: Team collectively
-    No techniques claimed here.
-    """
+        Side Effects:
+            - Updates the pattern's counters.
+        """
+        start = time.perf_counter()
+        found = compiled.search(text)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            stats = self.patterns.get((distortion, pattern))
+            if stats is None:
+                stats = self.patterns[(distortion, pattern)] = [0, 0, 0.0]
+            stats[0] += 1
+            if found:
+                stats[1] += 1
+            stats[2] += elapsed
+        return found
 
-    def __init__(self):
+    def track(self, distortions):
         """
         Primary Author: Team collectively
         No techniques claimed here.
 
-        Initializes with a predefined list of moods.
-        
+        Lists every pattern up front, so patterns that are never tried or never hit still show up
+        in the output with zero counts.
+
+        Parameters:
+            distortions (list of Distortion)
+
         Side Effects:
-            - Sets self.moods
+            - Adds zeroed counters for patterns not seen yet.
         """
-        self.moods = ['happy', 'sad', 'anxious', 'angry', 'neutral', 'excited', 'frustrated', 'confused', 'content', 'overwhelmed']
+        with self._lock:
+            for d in distortions:
+                for pattern in d.patterns:
+                    self.patterns.setdefault((d.name, pattern), [0, 0, 0.0])
 
-    def select_mood(self):
+    def record_call(self, name, seconds):
         """
         Primary Author: Team collectively
         No techniques claimed here.
 
-        Lets the user pick a mood from a list or provide a custom one.
+        Adds one call duration to the named latency histogram.
 
-        Side Effects:
-            - Prints instructions and reads user input.
+        Parameters:
+            name (str): The call measured, e.g. 'analyze_text'.
+            seconds (float): How long it took.
 
-        Returns:
-            str: The chosen mood.
+        Side Effects:
+            - Updates the histogram.
         """
-        print("\nHow are you feeling today? You can select one of the following moods or enter your own:")
-        for idx, mood in enumerate(self.moods, 1):
-            print(f"{idx}. {mood.capitalize()}")
-        while True:
-            mood_choice = input("Enter the number, name, or your own mood: ").strip().lower()
-            if mood_choice.isdigit():
-                mood_index = int(mood_choice) - 1
-                if 0 <= mood_index < len(self.moods):
-                    return self.moods[mood_index]
-            elif mood_choice in self.moods:
-                return mood_choice
-            else:
-                confirm = input(f"You entered '{mood_choice}'. Is this correct? (yes/no): ").strip().lower()
-                if confirm == 'yes':
-                    return mood_choice
-            print("Invalid input. Please try again.")
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            histogram = self.calls.get(name)
+            if histogram is None:
+                histogram = self.calls[name] = [[0] * (len(self.buckets) + 1), 0.0]
+            histogram[0][index] += 1
+            histogram[1] += seconds
 
-    def ask_controlled_question(self, prompt, options):
+    def reset(self):
         """
         Primary Author: Team collectively
         No techniques claimed here.
 
-        Presents a multiple-choice question and returns the user's choice.
+        Zeroes every counter and histogram.
 
         Side Effects:
-            - Prints prompt and reads user input.
-        
-        Parameters:
-            prompt (str)
-            options (list of str)
+            - Modifies the instance in place.
+        """
+        with self._lock:
+            self.patterns.clear()
+            self.calls.clear()
+
+    def to_dict(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
 
         Returns:
-            str: The chosen option.
+            dict: 'patterns', a list of {distortion, pattern, evaluations, hits, seconds} sorted by
+            total time (slowest first), and 'calls', mapping each call name to {count, seconds, buckets},
+            where buckets maps each upper bound (as a string, '+Inf' last) to a cumulative count.
         """
-        print(prompt)
-        for i, opt in enumerate(options, 1):
-            print(f"{i}. {opt}")
-        while True:
-            choice = input("Select a number: ").strip()
-            if choice.isdigit():
-                idx = int(choice) - 1
-                if 0 <= idx < len(options):
-                    return options[idx]
-            print("Invalid choice. Please enter a valid number.")
+        with self._lock:
+            patterns = [
+                {'distortion': distortion, 'pattern': pattern, 'evaluations': evaluations,
+                 'hits': hits, 'seconds': seconds}
+                for (distortion, pattern), (evaluations, hits, seconds) in self.patterns.items()
+            ]
+            calls = {}
+            for name, (counts, seconds) in self.calls.items():
+                cumulative = list(itertools.accumulate(counts))
+                bounds = [repr(bound) for bound in self.buckets] + ['+Inf']
+                calls[name] = {'count': cumulative[-1], 'seconds': seconds,
+                               'buckets': dict(zip(bounds, cumulative))}
+        patterns.sort(key=lambda p: p['seconds'], reverse=True)
+        return {'patterns': patterns, 'calls': calls}
 
-    def ask_scaled_question(self, prompt):
+    def to_json(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Returns:
+            str: to_dict() as indented JSON.
+        """
+        return json.dumps(self.to_dict(), indent=4)
+
+    def to_prometheus(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Returns:
+            str: The counters and histograms in the Prometheus text exposition format.
+        """
+        data = self.to_dict()
+        lines = []
+        for metric, key, help_text in (
+            ('cda_pattern_evaluations_total', 'evaluations', 'Times the pattern was tried.'),
+            ('cda_pattern_hits_total', 'hits', 'Times the pattern matched.'),
+            ('cda_pattern_seconds_total', 'seconds', 'Time spent searching with the pattern.')
+        ):
+            lines.append(f'# HELP {metric} {help_text}')
+            lines.append(f'# TYPE {metric} counter')
+            for p in data['patterns']:
+                labels = _prometheus_labels(distortion=p['distortion'], pattern=p['pattern'])
+                lines.append(f'{metric}{labels} {p[key]!r}')
+        lines.append('# HELP cda_call_duration_seconds Latency of instrumented calls.')
+        lines.append('# TYPE cda_call_duration_seconds histogram')
+        for name, histogram in data['calls'].items():
+            for bound, count in histogram['buckets'].items():
+                lines.append(f'cda_call_duration_seconds_bucket{_prometheus_labels(call=name, le=bound)} {count}')
+            lines.append(f'cda_call_duration_seconds_sum{_prometheus_labels(call=name)} {histogram["seconds"]!r}')
+            lines.append(f'cda_call_duration_seconds_count{_prometheus_labels(call=name)} {histogram["count"]}')
+        return '\n'.join(lines) + '\n'
+
+    def save(self, path):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Writes the metrics to a file: Prometheus text if the name ends in '.prom', JSON otherwise.
+
+        Parameters:
+            path (str): Output file.
+
+        Side Effects:
+            - Writes the file.
+        """
+        text = self.to_prometheus() if path.endswith('.prom') else self.to_json()
+        with open(path, 'w') as f:
+            f.write(text)
+
+
+# Pattern Registry
+
+class PatternError(ValueError):
+    """
+    Raised when distortion definitions contain patterns that don't compile or are malformed.
+    Primary Author: Team collectively
+    No techniques claimed here.
+    """
+
+    def __init__(self, problems):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Parameters:
+            problems (list of (str, str, str)): Distortion name, offending pattern (or None) and the error message.
+
+        Side Effects:
+            - Assigns instance attribute: problems.
+        """
+        self.problems = problems
+        super().__init__('; '.join(f"{name}: {pattern!r}: {message}" for name, pattern, message in problems))
+
+
+# Backtracking Lint
+
+try:
+    from re import _parser as _sre_parse
+except ImportError:
+    # Before Python 3.11 the parser was a top-level module.
+    import sre_parse as _sre_parse
+
+_REPEATS = (_sre_parse.MAX_REPEAT, _sre_parse.MIN_REPEAT)
+# Possessive quantifiers and atomic groups (3.11+) never backtrack into what they matched.
+_NO_BACKTRACK = tuple(op for op in (getattr(_sre_parse, 'POSSESSIVE_REPEAT', None),
+                                    getattr(_sre_parse, 'ATOMIC_GROUP', None)) if op is not None)
+
+
+def _first_chars(items):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Works out which characters a parsed pattern can start with, lowercased.
+
+    Parameters:
+        items (list): Parsed pattern items, as produced by the regex parser.
+
+    Returns:
+        set of str: The possible first characters (empty if the pattern only matches empty text),
+        or None if they can't be listed (classes like \\w, '.', negated sets).
+    """
+    chars = set()
+    for op, av in items:
+        if op == _sre_parse.AT:
+            continue
+        if op == _sre_parse.LITERAL:
+            return chars | {chr(av).lower()}
+        if op == _sre_parse.IN:
+            for kind, value in av:
+                if kind == _sre_parse.LITERAL:
+                    chars.add(chr(value).lower())
+                elif kind == _sre_parse.RANGE and value[1] - value[0] < 256:
+                    chars.update(chr(c).lower() for c in range(value[0], value[1] + 1))
+                else:
+                    return None
+            return chars
+        if op == _sre_parse.SUBPATTERN or op in _REPEATS:
+            body = av[3] if op == _sre_parse.SUBPATTERN else av[2]
+            first = _first_chars(body)
+            if first is None:
+                return None
+            chars |= first
+            # Only an item that always consumes something ends the search for first characters.
+            if body.getwidth()[0] > 0 and (op == _sre_parse.SUBPATTERN or av[0] > 0):
+                return chars
+            continue
+        return None
+    return chars
+
+
+def _branches_overlap(a, b):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Decides whether two alternatives of a repeated alternation can match the same text in more than
+    one way, which makes a failing match try every way of splitting the input between them.
+
+    Parameters:
+        a, b: Parsed alternatives.
+
+    Returns:
+        bool
+    """
+    if a.data == b.data:
+        return True
+    first_a, first_b = _first_chars(a), _first_chars(b)
+    if first_a == set() or first_b == set():
+        return False
+    if first_a is not None and first_b is not None and not first_a & first_b:
+        return False
+    width_a, width_b = a.getwidth(), b.getwidth()
+    single = width_a == (1, 1) and width_b == (1, 1)
+    return single or width_a[0] != width_a[1] or width_b[0] != width_b[1]
+
+
+def lint_pattern(pattern):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Looks for constructs that make the regex engine backtrack exponentially on inputs that almost match:
+    a quantified group containing another unbounded quantifier, like (a+)+ or (\\w+\\s?)*, and a
+    quantified alternation whose alternatives can match the same text, like (a|a)* or (\\w|\\d)+.
+    Possessive quantifiers, atomic groups and lookarounds are not flagged. The check is conservative,
+    so a few harmless patterns can be flagged too.
+
+    Parameters:
+        pattern (str)
+
+    Returns:
+        list of str: One message per problem found; empty if the pattern looks safe or doesn't parse
+        (compile errors are reported separately).
+    """
+    try:
+        parsed = _sre_parse.parse(pattern, re.IGNORECASE)
+    except (re.error, TypeError):
+        return []
+    problems = []
+
+    def walk(items, repeated):
+        for op, av in items:
+            if op in _REPEATS:
+                low, high, body = av
+                if repeated and low != high and high > 1 and body.getwidth()[1] > 0:
+                    problems.append("nested quantifier, as in (a+)+")
+                walk(body, repeated or high > 1)
+            elif op == _sre_parse.BRANCH:
+                branches = av[1]
+                if repeated and any(_branches_overlap(a, b) for a, b in itertools.combinations(branches, 2)):
+                    problems.append("repeated alternatives that can match the same text, as in (a|a)*")
+                for branch in branches:
+                    walk(branch, repeated)
+            elif op == _sre_parse.SUBPATTERN:
+                walk(av[3], repeated)
+            elif op in _NO_BACKTRACK:
+                walk(av[2] if isinstance(av, tuple) else av, False)
+            elif op in (_sre_parse.ASSERT, _sre_parse.ASSERT_NOT):
+                walk(av[1], False)
+            elif op == _sre_parse.GROUPREF_EXISTS:
+                walk(av[1], repeated)
+                if av[2] is not None:
+                    walk(av[2], repeated)
+
+    walk(parsed, False)
+    return list(dict.fromkeys(problems))
+
+
+def pattern_set_version(data):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Computes a short, stable identifier for a set of distortion definitions.
+
+    Parameters:
+        data (dict): Parsed distortion definitions.
+
+    Returns:
+        str: A hash of the definitions' canonical JSON form.
+    """
+    canonical = json.dumps(data, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:12]
+
+
+class PatternSet:
+    """
+    One fully compiled, read-only set of distortion definitions. The registry swaps whole PatternSet
+    objects, so code holding one keeps a consistent view while a newer set is being installed.
+    Primary Author: Team collectively
+    No techniques claimed here.
+    """
+
+    def __init__(self, data, strict=False, checked_warnings=None):
+        """
+        Primary Author: Team collectively
+        Techniques claimed: comprehensions
+
+        Validates and compiles every pattern up front, and lints each one for catastrophic backtracking.
+
+        Parameters:
+            data (dict): Mapping of distortion name to {"patterns": [...], "explanation": str}.
+            strict (bool): If True, patterns flagged by lint_pattern are rejected like invalid ones.
+                Otherwise they are only listed in self.warnings.
+            checked_warnings (list): The warnings of an earlier build of exactly this data, as kept by
+                PatternCheckCache. Validation and linting are skipped and these are used instead.
+
+        Raises:
+            PatternError: Listing every malformed definition and every pattern that doesn't compile
+                (or, when strict, that lint_pattern flags).
+
+        Side Effects:
+            - Assigns instance attributes: data, version, warnings, distortions, matcher.
+        """
+        problems = []
+        lint_warnings = [] if checked_warnings is None else list(checked_warnings)
+        for name, definition in data.items() if checked_warnings is None else ():
+            if not isinstance(definition, dict) or not isinstance(definition.get('patterns'), list):
+                problems.append((name, None, "expected an object with a 'patterns' list"))
+                continue
+            for pattern in definition['patterns']:
+                try:
+                    re.compile(pattern, re.IGNORECASE)
+                except (re.error, TypeError) as e:
+                    problems.append((name, pattern, str(e)))
+                    continue
+                lint_warnings.extend((name, pattern, f"may backtrack catastrophically: {message}")
+                                     for message in lint_pattern(pattern))
+        if strict:
+            problems.extend(lint_warnings)
+        if problems:
+            raise PatternError(problems)
+
+        self.data = data
+        self.warnings = lint_warnings
+        self.version = pattern_set_version(data)
+        self.distortions = [
+            Distortion(name=k, patterns=v["patterns"], explanation=v.get("explanation", ""))
+            for k, v in data.items()
+        ]
+        self.matcher = DistortionMatcher(self.distortions)
+
+
+class PatternCheckCache:
+    """
+    Remembers, on disk, that a patterns file passed validation and which lint warnings it produced,
+    so a cold start with an unchanged file only has to compile the patterns. Like a .pyc file, the
+    cache lives in __pycache__ next to the patterns file and is tagged with the interpreter. It is
+    plain JSON and is only used when the file's content hash, the Python version and the lint rules
+    all match; anything else, including a damaged cache, means a normal build.
+    Primary Author: Team collectively
+    No techniques claimed here.
+    """
+
+    # Bump when validation or the lint rules change, so old verdicts are checked again.
+    FORMAT = 1
+
+    def __init__(self, patterns_path):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Parameters:
+            patterns_path (str): The distortion patterns JSON file the cache is for.
+
+        Side Effects:
+            - Assigns instance attribute: path (None if this interpreter has no cache tag, which disables caching).
+        """
+        tag = sys.implementation.cache_tag
+        directory, name = os.path.split(os.path.abspath(patterns_path))
+        self.path = os.path.join(directory, '__pycache__', f'{name}.{tag}.checked.json') if tag else None
+
+    @staticmethod
+    def _key(raw):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Parameters:
+            raw (bytes): Contents of the patterns file.
+
+        Returns:
+            list: What the cached verdict must have been made for to be used for this file and interpreter.
+        """
+        return [PatternCheckCache.FORMAT, sys.version, hashlib.sha256(raw).hexdigest()]
+
+    def load(self, raw):
+        """
+        Primary Author: Team collectively
+        Techniques claimed: with statements
+
+        Parameters:
+            raw (bytes): Contents of the patterns file.
+
+        Returns:
+            list of (str, str, str) or None: The lint warnings of this exact file, or None if it hasn't
+            been checked before.
+
+        Side Effects:
+            - Reads the cache file.
+        """
+        if self.path is None:
+            return None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                cached = json.load(file)
+            if cached['key'] != self._key(raw):
+                return None
+            return [(str(name), str(pattern), str(message)) for name, pattern, message in cached['warnings']]
+        except Exception:
+            # Missing, truncated or foreign caches are all just misses.
+            return None
+
+    def save(self, raw, warnings):
+        """
+        Primary Author: Team collectively
+        Techniques claimed: with statements
+
+        Records that the file passed validation with these warnings. Failures (e.g. a read-only
+        directory) are ignored; the next start simply checks the patterns again.
+
+        Parameters:
+            raw (bytes): Contents of the patterns file.
+            warnings (list of (str, str, str)): PatternSet.warnings of the set built from it.
+
+        Side Effects:
+            - Atomically replaces the cache file.
+        """
+        if self.path is None:
+            return
+        temp_path = f'{self.path}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump({'key': self._key(raw), 'warnings': [list(w) for w in warnings]}, file)
+            os.replace(temp_path, self.path)
+        except OSError:
+            with contextlib.suppress(OSError):
+                os.remove(temp_path)
+
+
+class PatternRegistry:
+    """
+    Holds the current PatternSet for a distortion patterns file and swaps in a new one when the file changes.
+    Primary Author: Team collectively
+    No techniques claimed here.
+    """
+
+    def __init__(self, path='distortion_patterns.json', check_interval=1.0, strict=False, use_cache=True):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Parameters:
+            path (str): The distortion patterns JSON file.
+            check_interval (float): Seconds between checks of the file's modification time while watching.
+            strict (bool): Reject pattern sets with patterns that may backtrack catastrophically,
+                instead of only warning about them.
+            use_cache (bool): Skip validating and linting a file already checked, through a PatternCheckCache.
+
+        Side Effects:
+            - Sets self.current to an empty PatternSet. Nothing is read until load().
+            - Sets self.listeners, callables given each new PatternSet right after it is installed.
+        """
+        self.path = path
+        self.check_interval = check_interval
+        self.strict = strict
+        self.check_cache = PatternCheckCache(path) if use_cache else None
+        self.current = PatternSet({})
+        self.listeners = []
+        self._file_state = None
+        self._reload_lock = threading.Lock()
+        self._watcher = None
+        self._stop_watching = threading.Event()
+
+    def use(self, data, checked_warnings=None):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Installs already-parsed definitions as the current set.
+
+        Parameters:
+            data (dict)
+            checked_warnings (list): Passed to PatternSet, when data is known to be valid already.
+
+        Returns:
+            bool: True if the set changed.
+
+        Raises:
+            PatternError: If any pattern is invalid; the current set is left in place.
+
+        Side Effects:
+            - May replace self.current and call self.listeners with the new set.
+        """
+        if pattern_set_version(data) == self.current.version:
+            return False
+        # Building the new set happens off to the side; readers only ever see a complete set.
+        self.current = PatternSet(data, strict=self.strict, checked_warnings=checked_warnings)
+        for listener in self.listeners:
+            listener(self.current)
+        return True
+
+    def load(self):
+        """
+        Primary Author: Team collectively
+        Techniques claimed: with statements
+
+        Reads, validates and compiles the patterns file, then installs it as the current set. If the
+        check cache shows this exact file content was validated before, only the compiling is done;
+        otherwise the verdict is cached for next time.
+
+        Returns:
+            bool: True if the set changed.
+
+        Raises:
+            FileNotFoundError, json.JSONDecodeError, PatternError: The current set is left in place.
+
+        Side Effects:
+            - Reads the patterns file; may replace self.current; may read or write the check cache.
+        """
+        with self._reload_lock:
+            stat = os.stat(self.path)
+            with open(self.path, 'rb') as file:
+                raw = file.read()
+            data = json.loads(raw)
+            checked = self.check_cache.load(raw) if self.check_cache else None
+            changed = self.use(data, checked_warnings=checked)
+            if self.check_cache and checked is None:
+                self.check_cache.save(raw, self.current.warnings)
+            self._file_state = (stat.st_mtime_ns, stat.st_size)
+            return changed
+
+    def refresh(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Reloads the patterns file if its modification time or size changed since the last load.
+        Errors are reported and the previous set stays active; lint warnings for the new set are printed.
+
+        Returns:
+            bool: True if a new set was installed.
+
+        Side Effects:
+            - May read the patterns file and replace self.current; prints errors and warnings.
+        """
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False
+        state = (stat.st_mtime_ns, stat.st_size)
+        if state == self._file_state:
+            return False
+        try:
+            changed = self.load()
+        except (OSError, json.JSONDecodeError, PatternError) as e:
+            # Remember the broken file so it is reported once, not on every check.
+            self._file_state = state
+            print(f"Error: keeping the previous distortion patterns; '{self.path}' could not be loaded: {e}")
+            return False
+        if changed:
+            for name, pattern, message in self.current.warnings:
+                print(f"Warning: pattern {pattern!r} for distortion '{name}' in '{self.path}' {message}")
+        return changed
+
+    def start_watching(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Starts a daemon thread that calls refresh() every check_interval seconds.
+
+        Side Effects:
+            - Starts a background thread.
+        """
+        if self._watcher is not None:
+            return
+        self._stop_watching.clear()
+
+        def watch():
+            while not self._stop_watching.wait(self.check_interval):
+                self.refresh()
+
+        self._watcher = threading.Thread(target=watch, name='pattern-watcher', daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Stops the watcher thread, if running.
+
+        Side Effects:
+            - Joins the background thread.
+        """
+        if self._watcher is None:
+            return
+        self._stop_watching.set()
+        self._watcher.join()
+        self._watcher = None
+
+
+# MatchGuard Class
+
+class MatchBudgetExceeded(TimeoutError):
+    """
+    Raised when matching one text takes longer than the analyzer's match budget.
+    Primary Author: Team collectively
+    No techniques claimed here.
+    """
+
+    def __init__(self, distortion, pattern, budget):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Parameters:
+            distortion (str): Distortion whose pattern was running when time ran out, or None if unknown.
+            pattern (str): That pattern, as written in the patterns file, or None.
+            budget (float): The budget, in seconds.
+
+        Side Effects:
+            - Assigns instance attributes: distortion, pattern, budget.
+        """
+        self.distortion = distortion
+        self.pattern = pattern
+        self.budget = budget
+        if pattern is None:
+            message = f"distortion matching exceeded the {budget * 1000:g} ms budget"
+        else:
+            message = f"pattern {pattern!r} for distortion '{distortion}' exceeded the {budget * 1000:g} ms match budget"
+        super().__init__(message)
+
+
+class MatchWorkerError(RuntimeError):
+    """
+    Raised when a MatchGuard worker process dies while matching a text, and dies again after
+    being restarted.
+    Primary Author: Team collectively
+    No techniques claimed here.
+    """
+
+
+class _PatternProbe:
+    """
+    Stands in for an Instrumentation inside a guard worker: records which pattern is about to run
+    in shared memory, so the parent can name it if the worker has to be stopped.
+    Primary Author: Team collectively
+    No techniques claimed here.
+    """
+
+    def __init__(self, distortions, progress):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Parameters:
+            distortions (list of Distortion)
+            progress (multiprocessing.Value): Shared integer receiving the running pattern's index.
+        """
+        self.progress = progress
+        self.indexes = {}
+        for d in distortions:
+            for pattern in d.patterns:
+                self.indexes.setdefault((d.name, pattern), len(self.indexes))
+
+    def search(self, distortion, pattern, compiled, text):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Same interface as Instrumentation.search.
+
+        Returns:
+            re.Match or None
+        """
+        self.progress.value = self.indexes[(distortion, pattern)]
+        return compiled.search(text)
+
+
+def _match_guard_worker(conn, distortions_data, progress):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Body of a MatchGuard worker process: compiles the patterns once, then answers one sentence at a time.
+
+    Parameters:
+        conn (multiprocessing.connection.Connection): Receives sentences and sends back match_spans results.
+        distortions_data (dict): Parsed distortion definitions.
+        progress (multiprocessing.Value): Shared integer set to the index of the running pattern, -1 when idle.
+
+    Side Effects:
+        - Runs until the connection is closed.
+    """
+    import signal
+    # Ctrl-C is for the parent; it stops this process when it needs to.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    pattern_set = PatternSet(distortions_data)
+    probe = _PatternProbe(pattern_set.distortions, progress)
+    conn.send('ready')
+    while True:
+        try:
+            sentence = conn.recv()
+        except (EOFError, OSError):
+            return
+        results = pattern_set.matcher.match_spans(sentence, probe)
+        progress.value = -1
+        conn.send(results)
+
+
+class MatchGuard:
+    """
+    Enforces a time budget on distortion matching. Python's regex engine can't be interrupted from
+    another thread, so sentences are matched in a worker process that is killed when the budget runs
+    out; a runaway pattern costs one process restart instead of a stuck analyzer. Each thread gets
+    its own worker, which is started on first use and restarted when the pattern set changes.
+    Primary Author: Team collectively
+    No techniques claimed here.
+    """
+
+    def __init__(self, budget):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Parameters:
+            budget (float): Seconds allowed for matching all the sentences of one text.
+
+        Side Effects:
+            - Assigns instance attributes: budget, timeouts, restarts. No process is started yet.
+        """
+        self.budget = budget
+        self.timeouts = 0
+        # Workers that died (killed, out of memory, crashed) and were replaced.
+        self.restarts = 0
+        self._local = threading.local()
+        # id -> worker, across all threads, so close() can reach them.
+        self._workers = {}
+        self._lock = threading.Lock()
+
+    def deadline(self, pattern_set):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Makes sure this thread's worker is ready for the pattern set, so starting it doesn't count
+        against the budget, then starts the clock.
+
+        Parameters:
+            pattern_set (PatternSet): The set the text will be matched with.
+
+        Returns:
+            float: The time.perf_counter() value by which a text analyzed from now must be done.
+
+        Side Effects:
+            - May start a worker process.
+        """
+        self._worker(pattern_set)
+        return time.perf_counter() + self.budget
+
+    def _worker(self, pattern_set):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Returns this thread's worker for the given pattern set, starting one if needed.
+
+        Returns:
+            dict: 'process', 'conn', 'progress', 'version' and 'patterns' (index -> (distortion, pattern)).
+
+        Side Effects:
+            - May stop an outdated worker and start a new process.
+        """
+        worker = getattr(self._local, 'worker', None)
+        if worker is not None and worker['version'] == pattern_set.version and worker['process'].is_alive():
+            return worker
+        if worker is not None:
+            if worker['version'] == pattern_set.version:
+                self.restarts += 1
+            self._stop(worker)
+        import multiprocessing
+
+        parent_conn, child_conn = multiprocessing.Pipe()
+        progress = multiprocessing.Value('i', -1, lock=False)
+        process = multiprocessing.Process(target=_match_guard_worker, args=(child_conn, pattern_set.data, progress),
+                                          name='match-guard', daemon=True)
+        process.start()
+        child_conn.close()
+        # The worker says when its patterns are compiled; EOFError here means it died on the way.
+        try:
+            parent_conn.recv()
+        except (EOFError, OSError):
+            process.kill()
+            process.join()
+            parent_conn.close()
+            raise
+        indexes = _PatternProbe(pattern_set.distortions, progress).indexes
+        worker = {'process': process, 'conn': parent_conn, 'progress': progress, 'version': pattern_set.version,
+                  'patterns': {index: key for key, index in indexes.items()}}
+        self._local.worker = worker
+        with self._lock:
+            self._workers[id(worker)] = worker
+        return worker
+
+    def _stop(self, worker):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Kills a worker process and forgets it.
+
+        Side Effects:
+            - Terminates the process and closes its connection.
+        """
+        worker['process'].kill()
+        worker['process'].join()
+        worker['conn'].close()
+        if getattr(self._local, 'worker', None) is worker:
+            self._local.worker = None
+        with self._lock:
+            self._workers.pop(id(worker), None)
+
+    def match_spans(self, pattern_set, sentence, deadline):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Runs DistortionMatcher.match_spans for one sentence in the worker process.
+
+        Parameters:
+            pattern_set (PatternSet): The set to match with.
+            sentence (str): One stripped sentence.
+            deadline (float): From deadline(); matching must finish by then.
+
+        Returns:
+            list of (str, str, int, int): As DistortionMatcher.match_spans.
+
+        Raises:
+            MatchBudgetExceeded: If the deadline passes first. The worker is killed, and the error
+                names the pattern it was running.
+            MatchWorkerError: If the worker process dies, and the one started to replace it dies too.
+
+        Side Effects:
+            - May start or kill a worker process.
+        """
+        error = None
+        for attempt in range(2):
+            started = time.perf_counter()
+            try:
+                worker = self._worker(pattern_set)
+            except (EOFError, OSError) as e:
+                error = e
+                continue
+            if attempt:
+                # Restarting a dead worker doesn't count against the budget.
+                deadline += time.perf_counter() - started
+            conn = worker['conn']
+            try:
+                conn.send(sentence)
+                if conn.poll(max(deadline - time.perf_counter(), 0)):
+                    return conn.recv()
+            except (EOFError, OSError) as e:
+                # The worker died; forget it so the next attempt (and later calls) start a new one.
+                self._stop(worker)
+                self.restarts += 1
+                error = e
+                continue
+            distortion, pattern = worker['patterns'].get(worker['progress'].value, (None, None))
+            self._stop(worker)
+            self.timeouts += 1
+            raise MatchBudgetExceeded(distortion, pattern, self.budget)
+        raise MatchWorkerError("the pattern matching process stopped unexpectedly, twice in a row") from error
+
+    def close(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Stops every worker process.
+
+        Side Effects:
+            - Kills the workers of all threads.
+        """
+        with self._lock:
+            workers = list(self._workers.values())
+        for worker in workers:
+            self._stop(worker)
+
+
+# MultiLiteralMatcher Class
+
+class MultiLiteralMatcher:
+    """
+    Finds occurrences of a fixed set of phrases, case-insensitively, in a single pass over the text.
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    The phrases are compiled once into a regex alternation (longest first) and matched against the
+    lowercased text. CPython's regex engine runs this faster than an Aho-Corasick automaton written in
+    Python, and a case-sensitive search over lowercased text is several times faster than IGNORECASE.
+    """
+
+    BOUNDARIES = {
+        None: ('', ''),
+        'word': (r'(?<!\w)', r'(?!\w)'),
+        'space': (r'(?<!\S)', r'(?!\S)')
+    }
+
+    def __init__(self, phrases, boundary=None):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Parameters:
+            phrases (iterable of str): The literal phrases to look for.
+            boundary (str): None to match anywhere (plain substring search), 'word' to require
+                non-word characters on both sides, or 'space' to match whole whitespace-separated tokens.
+
+        Side Effects:
+            - Assigns instance attributes and compiles the regexes.
+        """
+        self.phrases = sorted(set(phrases), key=len, reverse=True)
+        self.boundary = boundary
+        self._canonical = {p.lower(): p for p in self.phrases}
+        # A hit on a phrase implies a hit on any shorter phrase it starts with, at the same position.
+        self._prefixes = {
+            p: [q for q in self.phrases if len(q) < len(p) and p.lower().startswith(q.lower())]
+            for p in self.phrases
+        }
+        before, after = self.BOUNDARIES[boundary]
+        self._after = re.compile(after) if after else None
+        alternation = '|'.join(re.escape(p.lower()) for p in self.phrases) if self.phrases else '(?!)'
+        # search() only needs the leftmost hit; finditer() uses a lookahead so overlapping hits are seen too.
+        self._search_source = f'{before}(?:{alternation}){after}'
+        self._overlap_source = f'{before}(?=({alternation}){after})'
+        self.search_regex = re.compile(self._search_source)
+        self.overlap_regex = re.compile(self._overlap_source)
+        # Whole-token phrases can be looked up in a TextDocument's token set instead of scanning the text.
+        single_tokens = boundary == 'space' and all(p.split() == [p] for p in self.phrases)
+        self._token_phrases = frozenset(self._canonical) if single_tokens else None
+
+    def _prepare(self, text, lowered):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Picks the string to scan and the regexes to scan it with. Lowercasing a few rare characters
+        changes the length of the text; those texts are matched with IGNORECASE instead so that
+        offsets still point into the original text.
+
+        Parameters:
+            text (str)
+            lowered (str): text.lower(), if the caller already has it, or None.
+
+        Returns:
+            (str, re.Pattern, re.Pattern): Text to scan, search regex, overlap regex.
+        """
+        if lowered is None:
+            lowered = text.lower()
+        if len(lowered) == len(text):
+            return lowered, self.search_regex, self.overlap_regex
+        return (text, re.compile(self._search_source, re.IGNORECASE),
+                re.compile(self._overlap_source, re.IGNORECASE))
+
+    def finditer(self, text, lowered=None):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Yields every hit, including overlapping ones, ordered by start offset (longest phrase first).
+
+        Parameters:
+            text (str)
+            lowered (str): text.lower(), if the caller already has it.
+
+        Yields:
+            (int, int, str): Start offset, end offset and the phrase that matched.
+        """
+        scanned, _, overlap_regex = self._prepare(text, lowered)
+        for m in overlap_regex.finditer(scanned):
+            start, found = m.start(), m.group(1)
+            phrase = self._canonical.get(found.lower(), found)
+            yield start, start + len(found), phrase
+            for shorter in self._prefixes.get(phrase, ()):
+                end = start + len(shorter)
+                if self._after is None or self._after.match(scanned, end):
+                    yield start, end, shorter
+
+    def findall(self, text, lowered=None):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Parameters:
+            text (str)
+            lowered (str): text.lower(), if the caller already has it.
+
+        Returns:
+            list of (int, int, str): Every hit, as yielded by finditer.
+        """
+        return list(self.finditer(text, lowered))
+
+    def search(self, text, lowered=None):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Parameters:
+            text (str)
+            lowered (str): text.lower(), if the caller already has it.
+
+        Returns:
+            (int, int, str): The leftmost hit (longest phrase at that position), or None.
+        """
+        scanned, search_regex, _ = self._prepare(text, lowered)
+        m = search_regex.search(scanned)
+        if m is None:
+            return None
+        return m.start(), m.end(), self._canonical.get(m.group().lower(), m.group())
+
+    def contains(self, document):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Checks whether any phrase occurs in a preprocessed text. When every phrase is a single
+        whitespace-separated token, each of the document's tokens is looked up in a set instead.
+
+        Parameters:
+            document (TextDocument)
+
+        Returns:
+            bool: The same answer as search(document.text) is not None.
+        """
+        if self._token_phrases is not None and len(document.lowered) == len(document.text):
+            return not self._token_phrases.isdisjoint(document.tokens)
+        return self.search(document.text, document.lowered) is not None
+
+
+# Text Preprocessing
+
+class TextDocument:
+    """
+    One text prepared once for every stage that reads it: the lowercased text, the sentence spans
+    and the whitespace-separated tokens.
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    The text is lowercased with str.lower() rather than str.casefold(), which changes the length of
+    more characters (e.g. 'ß' becomes 'ss'); the phrase matchers report offsets into the original text,
+    so they need the two to line up. Sentences and tokens are only worked out when a stage first asks
+    for them, so a session stopped by the crisis screen never splits its text.
+    """
+
+    __slots__ = ('text', 'lowered', 'ascii', '_spans', '_tokens')
+
+    def __init__(self, text):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Parameters:
+            text (str): The text to prepare.
+
+        Side Effects:
+            - Assigns instance attributes: text, lowered, ascii.
+        """
+        self.text = text
+        self.lowered = text.lower()
+        self.ascii = text.isascii()
+        self._spans = None
+        self._tokens = None
+
+    @classmethod
+    def of(cls, text):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Parameters:
+            text (str or TextDocument)
+
+        Returns:
+            TextDocument: text itself if it is already prepared, otherwise a new document for it.
+        """
+        return text if isinstance(text, cls) else cls(text)
+
+    def sentences(self, limit=None):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Lists the sentences of the text as analyze_text sees them: the stripped runs of text
+        between '.', '!' and '?'. The spans are found in one pass and kept, so later callers with
+        the same limit reuse them.
+
+        Parameters:
+            limit (int): Only look at the first limit characters, as if the text were cut there.
+                None for the whole text.
+
+        Returns:
+            list of (int, int): Start and end offsets of each sentence in the text.
+        """
+        if self._spans is None or self._spans[0] != limit:
+            end = len(self.text) if limit is None else min(limit, len(self.text))
+            self._spans = limit, [m.span() for m in _STRIPPED_SENTENCE_RE.finditer(self.text, 0, end)]
+        return self._spans[1]
+
+    def sentence_key(self, start, end):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Parameters:
+            start (int), end (int): A span from sentences().
+
+        Returns:
+            str: SentenceCache.key of that sentence, sliced from the lowercased text when it can be.
+        """
+        if self.ascii:
+            return self.lowered[start:end]
+        return SentenceCache.key(self.text[start:end])
+
+    @property
+    def tokens(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Returns:
+            list of str: The lowercased text split on whitespace.
+        """
+        if self._tokens is None:
+            self._tokens = self.lowered.split()
+        return self._tokens
+
+
+# One step of a TextPipeline. run(document) returns the step's result; if stop is given and
+# stop(result) is true, the steps after it are skipped.
+PipelineStage = collections.namedtuple('PipelineStage', ['name', 'run', 'stop'])
+
+
+class TextPipeline:
+    """
+    Runs named stages, in order, over one TextDocument, so that each stage reuses the same
+    lowercased text, sentences and tokens instead of preparing the text again. A new screening step
+    is one more add() call and doesn't add another pass over the raw text.
+    Primary Author: Team collectively
+    No techniques claimed here.
+    """
+
+    def __init__(self, stages=()):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Parameters:
+            stages (iterable of tuple): (name, run) or (name, run, stop) for each stage, in order.
+
+        Side Effects:
+            - Assigns instance attribute: stages.
+        """
+        self.stages = []
+        for stage in stages:
+            self.add(*stage)
+
+    def add(self, name, run, stop=None):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Appends a stage.
+
+        Parameters:
+            name (str): Key of the stage's result and timing.
+            run (callable): Called with the TextDocument; returns the stage's result.
+            stop (callable): Called with the result; a true value ends the pipeline after this stage.
+
+        Returns:
+            TextPipeline: self, so calls can be chained.
+        """
+        self.stages.append(PipelineStage(name, run, stop))
+        return self
+
+    def run(self, text, results=None, timings=None):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Prepares the text once and passes it through the stages.
+
+        Parameters:
+            text (str or TextDocument)
+            results (dict): Filled with each stage's result as it finishes, so the results of earlier
+                stages are kept if a later one raises. A new dict if None.
+            timings (dict): If given, the seconds spent preparing the text ('preprocess') and in each
+                stage are added to it. A stage that raises is timed too.
+
+        Returns:
+            dict: results. Stages skipped because an earlier one stopped the pipeline are missing.
+
+        Side Effects:
+            - Whatever the stages do.
+        """
+        if results is None:
+            results = {}
+        if timings is None:
+            document = TextDocument.of(text)
+            for name, run, stop in self.stages:
+                results[name] = result = run(document)
+                if stop is not None and stop(result):
+                    break
+            return results
+
+        clock = time.perf_counter()
+        document = TextDocument.of(text)
+        now = time.perf_counter()
+        timings['preprocess'] = timings.get('preprocess', 0.0) + now - clock
+        clock = now
+        for name, run, stop in self.stages:
+            try:
+                results[name] = result = run(document)
+            finally:
+                now = time.perf_counter()
+                timings[name] = timings.get(name, 0.0) + now - clock
+                clock = now
+            if stop is not None and stop(result):
+                break
+        return results
+
+
+# JsonJournalStorage Class
+
+def iter_json_lines(path):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Reads a JSON Lines file one record at a time. A torn final line (from a crash mid-append)
+    is ignored silently; any other invalid line is reported and skipped.
+
+    Parameters:
+        path (str)
+
+    Yields:
+        The decoded value of each line.
+
+    Side Effects:
+        - Prints an error for each invalid line that isn't the last one.
+    """
+    with open(path, 'r') as f:
+        invalid = None
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            if invalid is not None:
+                print(f"Error: skipping invalid line {invalid} in '{path}'.")
+                invalid = None
+            try:
+                value = json.loads(line)
+            except json.JSONDecodeError:
+                invalid = line_number
+                continue
+            yield value
+
+
+def iter_json_array(path, chunk_size=1 << 16):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Reads the elements of a top-level JSON array one at a time, decoding from a buffer refilled
+    chunk by chunk, so only one element (plus a chunk of text) is in memory at once rather than
+    the whole parsed document.
+
+    Parameters:
+        path (str): File holding a JSON array, like 'user_data.json'.
+        chunk_size (int): Characters read per refill.
+
+    Yields:
+        Each element of the array, in order.
+
+    Raises:
+        json.JSONDecodeError: If the file isn't a JSON array, or has anything but whitespace after it.
+            Elements before the problem have already been yielded.
+    """
+    decoder = json.JSONDecoder()
+    whitespace = re.compile(r'\s*')
+    with open(path, 'r') as f:
+        buffer = ''
+        pos = 0
+        eof = False
+        expecting = '['
+
+        def refill():
+            nonlocal buffer, pos, eof
+            chunk = f.read(chunk_size)
+            if not chunk:
+                eof = True
+            buffer = buffer[pos:] + chunk
+            pos = 0
+
+        while True:
+            pos = whitespace.match(buffer, pos).end()
+            if pos == len(buffer):
+                if eof:
+                    if expecting == 'end':
+                        return
+                    raise json.JSONDecodeError("Unexpected end of file", buffer, pos)
+                refill()
+                continue
+            char = buffer[pos]
+            if expecting == '[':
+                if char != '[':
+                    raise json.JSONDecodeError("Expecting '['", buffer, pos)
+                pos += 1
+                expecting = 'first'
+            elif expecting in ('first', 'separator') and char == ']':
+                pos += 1
+                expecting = 'end'
+            elif expecting == 'end':
+                # Like json.load, nothing but whitespace may follow the array.
+                raise json.JSONDecodeError("Extra data", buffer, pos)
+            elif expecting == 'separator':
+                if char != ',':
+                    raise json.JSONDecodeError("Expecting ',' delimiter", buffer, pos)
+                pos += 1
+                expecting = 'value'
+            else:
+                try:
+                    value, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    refill()
+                    continue
+                # A number cut off by the chunk boundary (e.g. '12.' of '12.5') still decodes; only trust
+                # a value once the ',' or ']' after it has been read too.
+                after = whitespace.match(buffer, end).end()
+                if not eof and (after == len(buffer) or buffer[after] not in ',]'):
+                    refill()
+                    continue
+                pos = end
+                expecting = 'separator'
+                yield value
+
+
+class JsonJournalStorage:
+    """
+    Stores user entries as a JSON snapshot ('user_data.json') plus an append-only JSON Lines journal
+    ('user_data.jsonl') holding every entry recorded since the last snapshot.
+    Primary Author: Team collectively
+    No techniques claimed here.
+    """
+
+    def __init__(self, snapshot_path='user_data.json', journal_path='user_data.jsonl', fsync_every=1,
+                 aggregates_path='user_stats.json'):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Parameters:
+            snapshot_path (str): Path of the JSON array snapshot. Files written by older versions are read as-is.
+            journal_path (str): Path of the JSON Lines journal.
+            fsync_every (int): Number of appended entries between fsync calls. 0 leaves syncing to flush().
+            aggregates_path (str): Path where the running mood/distortion totals are saved.
+
+        Side Effects:
+            - Assigns instance attributes. No files are opened until the first append.
+        """
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.aggregates_path = aggregates_path
+        self.fsync_every = fsync_every
+        self.journal_length = 0
+        self._journal_file = None
+        self._unsynced = 0
+
+    def load(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Streams the snapshot followed by the journal tail. A torn final journal line (from a crash
+        mid-append) is ignored, as is a journal already folded into the snapshot by an interrupted compaction.
+
+        Yields:
+            dict: All stored entries, oldest first, one at a time.
+
+        Side Effects:
+            - Reads the snapshot and journal files, if present.
+            - Prints an error if either file is corrupt.
+        """
+        return self.iter_entries()
+
+    def iter_entries(self, start=None, end=None, mood=None):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Streams the stored entries that pass the given filters. The snapshot is decoded one entry at
+        a time and the filters are applied during the scan, so only matching entries are ever kept.
+
+        Parameters:
+            start (str): ISO timestamp; entries at or after it are included. None for no lower bound.
+            end (str): ISO timestamp; entries before it are included. None for no upper bound.
+            mood (str): Only yield entries with this mood, or None.
+
+        Yields:
+            dict: The matching entries, oldest first.
+
+        Side Effects:
+            - Reads the snapshot and journal files, if present, and sets journal_length.
+            - Prints an error if either file is corrupt.
+        """
+        def wanted(entry):
+            return ((start is None or entry['timestamp'] >= start)
+                    and (end is None or entry['timestamp'] < end)
+                    and (mood is None or entry['mood'] == mood))
+
+        # The journal is kept short by compaction, so it is read up front to spot a tail that an
+        # interrupted compaction already folded into the snapshot.
+        tail = list(iter_json_lines(self.journal_path)) if os.path.exists(self.journal_path) else []
+        last = collections.deque(maxlen=len(tail))
+
+        if os.path.exists(self.snapshot_path):
+            try:
+                for entry in iter_json_array(self.snapshot_path):
+                    if tail:
+                        last.append(entry)
+                    if wanted(entry):
+                        yield entry
+            except json.JSONDecodeError:
+                print(f"Error: '{self.snapshot_path}' is not valid JSON.")
+
+        if tail and list(last) == tail:
+            tail = []
+        self.journal_length = len(tail)
+        for entry in tail:
+            if wanted(entry):
+                yield entry
+
+    def append(self, entry):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Appends one compact JSON record to the journal.
+
+        Parameters:
+            entry (dict)
+
+        Side Effects:
+            - Writes to the journal file, syncing it to disk every fsync_every entries.
+        """
+        self.append_many([entry])
+
+    def append_many(self, entries):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Appends several records with one write, syncing at most once for the whole batch.
+
+        Parameters:
+            entries (list of dict)
+
+        Side Effects:
+            - Writes to the journal file, syncing it to disk once fsync_every entries are unsynced.
+        """
+        if self._journal_file is None:
+            self._journal_file = open(self.journal_path, 'a')
+            # Terminate a torn line left by a crash so it doesn't swallow this record.
+            if self._journal_file.tell() > 0:
+                with open(self.journal_path, 'rb') as f:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b'\n':
+                        self._journal_file.write('\n')
+        self._journal_file.write(''.join(json.dumps(entry, separators=(',', ':')) + '\n' for entry in entries))
+        self._journal_file.flush()
+        self.journal_length += len(entries)
+        self._unsynced += len(entries)
+        if self.fsync_every and self._unsynced >= self.fsync_every:
+            os.fsync(self._journal_file.fileno())
+            self._unsynced = 0
+
+    def flush(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Forces every appended entry to disk.
+
+        Side Effects:
+            - Calls fsync on the journal file, if it is open.
+        """
+        if self._journal_file is not None and self._unsynced:
+            self._journal_file.flush()
+            os.fsync(self._journal_file.fileno())
+            self._unsynced = 0
+
+    def compact(self, entries):
+        """
+        Primary Author: Team collectively
+        Technique claimed: json.dump()
+
+        Writes all entries to a fresh snapshot and empties the journal. The snapshot is written to a
+        temporary file and renamed into place, so a crash leaves either the old or the new snapshot.
+
+        Parameters:
+            entries (iterable of dict): Every entry, oldest first.
+
+        Side Effects:
+            - Replaces the snapshot file and deletes the journal file.
+        """
+        tmp_path = self.snapshot_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(list(entries), f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        self.close()
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        self.journal_length = 0
+
+    def clear(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Deletes the snapshot, the journal and the saved aggregates.
+
+        Side Effects:
+            - Removes the files if present.
+        """
+        self.close()
+        for path in (self.snapshot_path, self.journal_path, self.aggregates_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self.journal_length = 0
+
+    def load_aggregates(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Returns:
+            dict: The saved aggregates, or None if there are none (or the file is unreadable).
+        """
+        try:
+            with open(self.aggregates_path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def save_aggregates(self, data):
+        """
+        Primary Author: Team collectively
+        Technique claimed: json.dump()
+
+        Parameters:
+            data (dict): Output of MoodAggregates.to_dict().
+
+        Side Effects:
+            - Atomically replaces the aggregates file.
+        """
+        tmp_path = self.aggregates_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp_path, self.aggregates_path)
+
+    def close(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Syncs and closes the journal file.
+
+        Side Effects:
+            - Closes the open journal file handle, if any.
+        """
+        if self._journal_file is not None:
+            self.flush()
+            self._journal_file.close()
+            self._journal_file = None
+
+
+# SQLiteStorage Class
+
+ENTRY_FIELDS = ('timestamp', 'mood', 'responses', 'distortions', 'intensity')
+
+
+class SQLiteStorage:
+    """
+    Stores user entries in a SQLite database with indexed timestamp and mood columns and a
+    normalized table of detected distortions, so date-range and per-mood queries are index lookups.
+    Drop-in alternative to JsonJournalStorage.
+    Primary Author: Team collectively
+    No techniques claimed here.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS entries (
+            id INTEGER PRIMARY KEY,
+            timestamp TEXT NOT NULL,
+            mood TEXT NOT NULL,
+            intensity INTEGER,
+            responses TEXT NOT NULL,
+            extra TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_entries_timestamp ON entries (timestamp);
+        CREATE INDEX IF NOT EXISTS idx_entries_mood ON entries (mood, timestamp);
+        CREATE TABLE IF NOT EXISTS entry_distortions (
+            entry_id INTEGER NOT NULL REFERENCES entries (id) ON DELETE CASCADE,
+            position INTEGER NOT NULL,
+            distortion TEXT NOT NULL,
+            PRIMARY KEY (entry_id, position)
+        );
+        CREATE INDEX IF NOT EXISTS idx_entry_distortions_name ON entry_distortions (distortion);
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, path='user_data.db', commit_every=1):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Parameters:
+            path (str): Database file path.
+            commit_every (int): Number of appended entries between commits. 0 leaves committing to flush().
+
+        Side Effects:
+            - Opens (and if needed creates) the database and its tables.
+        """
+        self.path = path
+        self.commit_every = commit_every
+        self.journal_length = 0
+        self._uncommitted = 0
+        # Entries may be written by a StorageWriter thread; every use of the connection is serialized by its lock.
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA foreign_keys=ON')
+        self.conn.executescript(self.SCHEMA)
+        self.conn.commit()
+
+    def _insert(self, entry):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Inserts one entry and its distortions without committing.
+
+        Parameters:
+            entry (dict)
+
+        Side Effects:
+            - Writes to the entries and entry_distortions tables.
+        """
+        extra = {k: v for k, v in entry.items() if k not in ENTRY_FIELDS}
+        cursor = self.conn.execute(
+            'INSERT INTO entries (timestamp, mood, intensity, responses, extra) VALUES (?, ?, ?, ?, ?)',
+            (entry['timestamp'], entry['mood'], entry.get('intensity'), json.dumps(entry.get('responses', [])),
+             json.dumps(extra) if extra else None)
+        )
+        self.conn.executemany(
+            'INSERT INTO entry_distortions (entry_id, position, distortion) VALUES (?, ?, ?)',
+            [(cursor.lastrowid, i, name) for i, name in enumerate(entry.get('distortions', []))]
+        )
+
+    def iter_entries(self, start=None, end=None, mood=None, batch_size=500):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Streams entries matching the given filters, oldest first. The filters run in SQL on the
+        indexed columns, and rows are fetched batch_size at a time together with their distortions.
+
+        Parameters:
+            start (str): Inclusive lower bound on the ISO timestamp, or None.
+            end (str): Exclusive upper bound on the ISO timestamp, or None.
+            mood (str): Only return entries with this mood, or None.
+            batch_size (int): Rows fetched per round trip.
+
+        Yields:
+            dict: The matching entries.
+
+        Side Effects:
+            - None
+        """
+        conditions, params = [], []
+        if start is not None:
+            conditions.append('timestamp >= ?')
+            params.append(start)
+        if end is not None:
+            conditions.append('timestamp < ?')
+            params.append(end)
+        if mood is not None:
+            conditions.append('mood = ?')
+            params.append(mood)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+        cursor = self.conn.execute(
+            f'SELECT id, timestamp, mood, responses, intensity, extra FROM entries {where} ORDER BY timestamp, id',
+            params
+        )
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            distortions = collections.defaultdict(list)
+            ids = [row[0] for row in rows]
+            for entry_id, name in self.conn.execute(
+                f"SELECT entry_id, distortion FROM entry_distortions "
+                f"WHERE entry_id IN ({','.join('?' * len(ids))}) ORDER BY entry_id, position",
+                ids
+            ):
+                distortions[entry_id].append(name)
+
+            for entry_id, timestamp, mood_name, responses, intensity, extra in rows:
+                entry = {
+                    'timestamp': timestamp,
+                    'mood': mood_name,
+                    'responses': json.loads(responses),
+                    'distortions': distortions.get(entry_id, []),
+                    'intensity': intensity
+                }
+                if extra:
+                    entry.update(json.loads(extra))
+                yield entry
+
+    def query_entries(self, start=None, end=None, mood=None):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Fetches entries matching the given filters, oldest first.
+
+        Parameters:
+            start (str): Inclusive lower bound on the ISO timestamp, or None.
+            end (str): Exclusive upper bound on the ISO timestamp, or None.
+            mood (str): Only return entries with this mood, or None.
+
+        Returns:
+            list of dict: The matching entries.
+
+        Side Effects:
+            - None
+        """
+        return list(self.iter_entries(start=start, end=end, mood=mood))
+
+    def mood_rows(self, start=None, end=None):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Reads just the day, mood and intensity of the entries in a time range, for mood timelines.
+        The range is a lookup on the timestamp index, and responses and distortions aren't read.
+
+        Parameters:
+            start (str): Inclusive lower bound on the ISO timestamp, or None.
+            end (str): Exclusive upper bound on the ISO timestamp, or None.
+
+        Returns:
+            list of (str, str, int): Date (YYYY-MM-DD), mood and intensity of each entry.
+
+        Side Effects:
+            - None
+        """
+        conditions, params = [], []
+        if start is not None:
+            conditions.append('timestamp >= ?')
+            params.append(start)
+        if end is not None:
+            conditions.append('timestamp < ?')
+            params.append(end)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        return self.conn.execute(f'SELECT substr(timestamp, 1, 10), mood, intensity FROM entries {where}',
+                                 params).fetchall()
+
+    def load(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Returns:
+            iterator of dict: All stored entries, oldest first, streamed from the database.
+        """
+        return self.iter_entries()
+
+    def append(self, entry):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Inserts one entry, committing every commit_every entries.
+
+        Parameters:
+            entry (dict)
+
+        Side Effects:
+            - Writes to the database.
+        """
+        self.append_many([entry])
+
+    def append_many(self, entries):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Inserts several entries in one transaction, committing at most once for the whole batch.
+
+        Parameters:
+            entries (list of dict)
+
+        Side Effects:
+            - Writes to the database.
+        """
+        for entry in entries:
+            self._insert(entry)
+        self._uncommitted += len(entries)
+        if self.commit_every and self._uncommitted >= self.commit_every:
+            self.flush()
+
+    def flush(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Commits any pending inserts.
+
+        Side Effects:
+            - Commits the current transaction.
+        """
+        self.conn.commit()
+        self._uncommitted = 0
+
+    def compact(self, entries):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        The database is already the durable copy of every entry, so there is no snapshot to
+        rewrite; this only commits pending inserts. Use rewrite() to replace the stored entries.
+
+        Parameters:
+            entries (iterable of dict): Ignored; accepted for compatibility with JsonJournalStorage.
+
+        Side Effects:
+            - Commits the current transaction.
+        """
+        self.flush()
+
+    def _replace(self, entries):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Deletes every stored entry and inserts the given ones, inside the caller's transaction.
+
+        Parameters:
+            entries (iterable of dict): Every entry, oldest first.
+
+        Side Effects:
+            - Rewrites both entry tables.
+        """
+        self.conn.execute('DELETE FROM entry_distortions')
+        self.conn.execute('DELETE FROM entries')
+        for entry in entries:
+            self._insert(entry)
+
+    def rewrite(self, entries):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Replaces the stored entries with the given ones in a single transaction, e.g. after they
+        were changed in memory.
+
+        Parameters:
+            entries (iterable of dict): Every entry, oldest first.
+
+        Side Effects:
+            - Rewrites both entry tables.
+        """
+        with self.conn:
+            self._replace(entries)
+        self._uncommitted = 0
+
+    def import_from(self, other):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Copies entries from another storage (e.g. an existing 'user_data.json') the first time the
+        database is used. A marker in the meta table records that this happened, so entries deleted
+        later (with clear()) are not imported again on the next start.
+
+        Parameters:
+            other: Any storage with a load() method.
+
+        Returns:
+            int: Number of entries imported.
+
+        Side Effects:
+            - Writes to the database and sets the import marker.
+        """
+        if self.conn.execute("SELECT 1 FROM meta WHERE key = 'imported'").fetchone():
+            return 0
+        # Databases made before the marker existed already hold their imported entries.
+        has_entries = self.conn.execute('SELECT 1 FROM entries LIMIT 1').fetchone() is not None
+        entries = [] if has_entries else list(other.load())
+        with self.conn:
+            if entries:
+                self._replace(entries)
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('imported', ?)",
+                              (datetime.datetime.now().isoformat(),))
+        self._uncommitted = 0
+        return len(entries)
+
+    def clear(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Deletes every stored entry and the saved aggregates. The import marker is kept.
+
+        Side Effects:
+            - Empties the entry tables and removes the aggregates from the meta table.
+        """
+        with self.conn:
+            self._replace([])
+            self.conn.execute("DELETE FROM meta WHERE key = 'aggregates'")
+        self._uncommitted = 0
+
+    def load_aggregates(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Returns:
+            dict: The saved aggregates, or None if there are none.
+        """
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'aggregates'").fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_aggregates(self, data):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Parameters:
+            data (dict): Output of MoodAggregates.to_dict().
+
+        Side Effects:
+            - Writes to the meta table.
+        """
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('aggregates', ?)",
+                              (json.dumps(data, separators=(',', ':')),))
+
+    def close(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Commits and closes the database connection.
+
+        Side Effects:
+            - Closes self.conn
+        """
+        self.flush()
+        self.conn.close()
+
+
+# PartitionedStorage Class
+
+def _month_key(date, months_back=0):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Parameters:
+        date (datetime.date)
+        months_back (int): Whole months to step back from date's month.
+
+    Returns:
+        str: The 'YYYY-MM' key of the resulting month.
+    """
+    index = date.year * 12 + date.month - 1 - months_back
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+class PartitionedStorage:
+    """
+    Stores each user's entries in their own directory, one JSON Lines file per month:
+    root/<user>/<YYYY-MM>.jsonl. A session only reads the user's recent months, date-range queries
+    only open the months they cover, and clearing or pruning deletes whole files.
+    Primary Author: Team collectively
+    No techniques claimed here.
+    """
+
+    USER_NAME = re.compile(r'[A-Za-z0-9_-][A-Za-z0-9_.-]*')
+    PARTITION_NAME = re.compile(r'(\d{4}-\d{2})\.jsonl')
+
+    def __init__(self, root='user_data', user='default', recent_months=None, fsync_every=1):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Parameters:
+            root (str): Directory holding one subdirectory per user.
+            user (str): User name: letters, digits, '_', '-' and '.', not starting with '.'.
+            recent_months (int): How many months, counting the current one, load() reads. None reads all.
+            fsync_every (int): Number of appended entries between fsync calls. 0 leaves syncing to flush().
+
+        Raises:
+            ValueError: If the user name isn't allowed.
+
+        Side Effects:
+            - Assigns instance attributes. Nothing is created on disk until the first append.
+        """
+        if not self.USER_NAME.fullmatch(user):
+            raise ValueError(f"invalid user name {user!r}")
+        self.directory = os.path.join(root, user)
+        self.user = user
+        self.recent_months = recent_months
+        self.fsync_every = fsync_every
+        self.aggregates_path = os.path.join(self.directory, 'stats.json')
+        self.manifest_path = os.path.join(self.directory, 'partitions.json')
+        self.journal_length = 0
+        # Set by load(): entries in older partitions it didn't read, and the first day it did read
+        # (None when nothing was left out).
+        self.skipped_count = 0
+        self.loaded_since = None
+        self._counts = {}
+        self._skipped = set()
+        self._month = None
+        self._file = None
+        self._unsynced = 0
+
+    def partition_path(self, month):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Parameters:
+            month (str): 'YYYY-MM'.
+
+        Returns:
+            str: Path of that month's file.
+        """
+        return os.path.join(self.directory, f"{month}.jsonl")
+
+    def partitions(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Returns:
+            list of str: 'YYYY-MM' keys of the user's existing partitions, oldest first.
+        """
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted(match.group(1) for match in map(self.PARTITION_NAME.fullmatch, names) if match)
+
+    def _read_partition(self, month):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Streams one month's entries. A torn final line (from a crash mid-append) is ignored.
+
+        Parameters:
+            month (str): 'YYYY-MM'.
+
+        Yields:
+            dict: The month's entries, in the order they were recorded.
+
+        Side Effects:
+            - Prints an error for each other invalid line.
+        """
+        path = self.partition_path(month)
+        if os.path.exists(path):
+            yield from iter_json_lines(path)
+
+    def _load_manifest(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Returns:
+            dict: 'YYYY-MM' -> [file size, entry count] as last saved, or {} if there is none.
+        """
+        try:
+            with open(self.manifest_path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _count_entries(self, month, manifest):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Counts a partition's entries without loading them, trusting the manifest while the file
+        is still the size it recorded.
+
+        Returns:
+            int
+        """
+        recorded = manifest.get(month)
+        try:
+            size = os.path.getsize(self.partition_path(month))
+        except FileNotFoundError:
+            return 0
+        if isinstance(recorded, list) and len(recorded) == 2 and recorded[0] == size:
+            return recorded[1]
+        return sum(1 for _ in self._read_partition(month))
+
+    def load(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Streams the user's entries from the last recent_months months (all months if recent_months is None).
+        Older partitions are only counted, so the analyzer's saved totals still line up.
+
+        Yields:
+            dict: The loaded entries, oldest first.
+
+        Side Effects:
+            - Reads the recent partition files.
+            - Sets skipped_count and loaded_since before the first entry is yielded.
+        """
+        months = self.partitions()
+        older = []
+        if self.recent_months is not None:
+            first = _month_key(datetime.date.today(), self.recent_months - 1)
+            older = [month for month in months if month < first]
+            months = months[len(older):]
+
+        manifest = self._load_manifest() if older else {}
+        self._counts = {month: self._count_entries(month, manifest) for month in older}
+        self._skipped = set(older)
+        self.skipped_count = sum(self._counts.values())
+        self.loaded_since = datetime.date.fromisoformat(f"{first}-01") if older else None
+
+        for month in months:
+            count = 0
+            for entry in self._read_partition(month):
+                count += 1
+                yield entry
+            self._counts[month] = count
+
+    def iter_entries(self, start=None, end=None, mood=None):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Streams the entries in a time range, opening only the partitions that overlap it.
+
+        Parameters:
+            start (str): ISO timestamp; entries at or after it are included. None for no lower bound.
+            end (str): ISO timestamp; entries before it are included. None for no upper bound.
+            mood (str): Only yield entries with this mood, or None.
+
+        Yields:
+            dict: The matching entries, oldest first.
+
+        Side Effects:
+            - Reads the overlapping partition files.
+        """
+        self.flush()
+        for month in self.partitions():
+            if start is not None and month < start[:7]:
+                continue
+            if end is not None and f"{month}-01" >= end:
+                break
+            for entry in self._read_partition(month):
+                if ((start is None or entry['timestamp'] >= start)
+                        and (end is None or entry['timestamp'] < end)
+                        and (mood is None or entry['mood'] == mood)):
+                    yield entry
+
+    def query_entries(self, start=None, end=None, mood=None):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Parameters:
+            start (str): ISO timestamp; entries at or after it are included. None for no lower bound.
+            end (str): ISO timestamp; entries before it are included. None for no upper bound.
+            mood (str): Only return entries with this mood, or None.
+
+        Returns:
+            list of dict: The entries iter_entries yields.
+        """
+        return list(self.iter_entries(start=start, end=end, mood=mood))
+
+    def append(self, entry):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Appends one compact JSON record to the partition of the entry's month.
+
+        Parameters:
+            entry (dict)
+
+        Side Effects:
+            - Creates the user directory and partition file as needed.
+            - Writes to the partition file, syncing it to disk every fsync_every entries.
+        """
+        self.append_many([entry])
+
+    def append_many(self, entries):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Appends several records, one write per run of entries from the same month, syncing at most
+        once per partition touched.
+
+        Parameters:
+            entries (list of dict)
+
+        Side Effects:
+            - Creates the user directory and partition files as needed.
+            - Writes to the partition files, syncing to disk once fsync_every entries are unsynced.
+        """
+        for month, run in itertools.groupby(entries, key=lambda entry: entry['timestamp'][:7]):
+            self._append_run(month, list(run))
+
+    def _append_run(self, month, entries):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Parameters:
+            month (str): 'YYYY-MM' of every entry in the run.
+            entries (list of dict)
+
+        Side Effects:
+            - Switches the open partition file if needed, then writes and maybe syncs it.
+        """
+        if month != self._month:
+            self.close()
+            os.makedirs(self.directory, exist_ok=True)
+            path = self.partition_path(month)
+            self._file = open(path, 'a')
+            self._month = month
+            # Terminate a torn line left by a crash so it doesn't swallow this record.
+            if self._file.tell() > 0:
+                with open(path, 'rb') as f:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b'\n':
+                        self._file.write('\n')
+        self._file.write(''.join(json.dumps(entry, separators=(',', ':')) + '\n' for entry in entries))
+        self._file.flush()
+        self._counts[month] = self._counts.get(month, 0) + len(entries)
+        self._unsynced += len(entries)
+        if self.fsync_every and self._unsynced >= self.fsync_every:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    def flush(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Forces every appended entry to disk.
+
+        Side Effects:
+            - Calls fsync on the open partition file, if any.
+        """
+        if self._file is not None and self._unsynced:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    def compact(self, entries):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        The partitions are already the stored form, so there is nothing to fold; this only syncs.
+        The entries are ignored, since they may cover only the recent months.
+
+        Parameters:
+            entries (iterable of dict): Unused.
+
+        Side Effects:
+            - Syncs the open partition file.
+        """
+        self.flush()
+
+    def rewrite(self, entries):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Replaces the partitions of the months the entries cover with those entries, e.g. after they
+        were changed in memory. Months with no entries given are left alone, so the entries only
+        need to hold whole months (as load() gives them), not the full history.
+
+        Parameters:
+            entries (iterable of dict): Every entry of each month covered, oldest first.
+
+        Side Effects:
+            - Atomically replaces each covered partition file.
+        """
+        self.close()
+        os.makedirs(self.directory, exist_ok=True)
+        written = set()
+        for month, month_entries in itertools.groupby(entries, key=lambda entry: entry['timestamp'][:7]):
+            path = self.partition_path(month)
+            # A month seen again (timestamps out of order) is added to the file just written.
+            target = path if month in written else path + '.tmp'
+            count = 0
+            with open(target, 'a' if month in written else 'w') as f:
+                for entry in month_entries:
+                    f.write(json.dumps(entry, separators=(',', ':')) + '\n')
+                    count += 1
+                f.flush()
+                os.fsync(f.fileno())
+            if month not in written:
+                os.replace(target, path)
+                self._counts[month] = 0
+                written.add(month)
+            self._counts[month] += count
+
+    def prune(self, before):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Deletes every partition for a month before the given date's month.
+
+        Parameters:
+            before (datetime.date): Partitions for this month and later are kept.
+
+        Returns:
+            list of dict: The deleted entries, so callers can take them out of running totals.
+
+        Side Effects:
+            - Removes partition files and updates the manifest.
+        """
+        first = _month_key(before)
+        removed = []
+        for month in self.partitions():
+            if month >= first:
+                break
+            if month == self._month:
+                self.close()
+            removed.extend(self._read_partition(month))
+            os.remove(self.partition_path(month))
+            self._counts.pop(month, None)
+            self._skipped.discard(month)
+        self.skipped_count = sum(self._counts[month] for month in self._skipped)
+        if not self._skipped:
+            self.loaded_since = None
+        self._save_manifest()
+        return removed
+
+    def clear(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Deletes all of this user's partitions, saved aggregates and manifest. Other users are untouched.
+
+        Side Effects:
+            - Removes the user's files and, if it ends up empty, the user's directory.
+        """
+        self.close()
+        for month in self.partitions():
+            os.remove(self.partition_path(month))
+        for path in (self.aggregates_path, self.manifest_path):
+            if os.path.exists(path):
+                os.remove(path)
+        try:
+            os.rmdir(self.directory)
+        except OSError:
+            pass
+        self._counts = {}
+        self._skipped = set()
+        self.skipped_count = 0
+        self.loaded_since = None
+
+    def _save_manifest(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Records the size and entry count of every partition whose count is known, so the next load
+        can count skipped partitions without reading them.
+
+        Side Effects:
+            - Atomically replaces the manifest file.
+        """
+        manifest = {}
+        for month, count in sorted(self._counts.items()):
+            try:
+                manifest[month] = [os.path.getsize(self.partition_path(month)), count]
+            except FileNotFoundError:
+                continue
+        if not manifest and not os.path.isdir(self.directory):
+            return
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, separators=(',', ':'))
+        os.replace(tmp_path, self.manifest_path)
+
+    def load_aggregates(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Returns:
+            dict: The user's saved aggregates, or None if there are none (or the file is unreadable).
+        """
+        try:
+            with open(self.aggregates_path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def save_aggregates(self, data):
+        """
+        Primary Author: Team collectively
+        Technique claimed: json.dump()
+
+        Parameters:
+            data (dict): Output of MoodAggregates.to_dict(), covering every partition.
+
+        Side Effects:
+            - Atomically replaces the aggregates file and refreshes the manifest.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self.aggregates_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp_path, self.aggregates_path)
+        self._save_manifest()
+
+    def close(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Syncs and closes the open partition file.
+
+        Side Effects:
+            - Closes the file handle, if any.
+        """
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+            self._month = None
+
+
+# StorageWriter Class
+
+class StorageWriter:
+    """
+    Writes entries to a storage backend from a background thread, in batches: entries recorded close
+    together are appended with one append_many call, so they share one fsync (or SQLite commit)
+    instead of paying for one each. A batch is written once max_batch entries are waiting or the
+    oldest has waited max_delay seconds, whichever comes first. Entries reach the storage in the
+    order they were submitted.
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Composition: Holds the storage it writes to.
+    """
+
+    # Seconds to wait before retrying a batch the storage failed to write.
+    RETRY_DELAY = 1.0
+
+    def __init__(self, storage, max_batch=256, max_delay=0.05):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Parameters:
+            storage: Any storage backend with append_many() and flush().
+            max_batch (int): Waiting entries that trigger a write right away.
+            max_delay (float): Longest time, in seconds, an entry waits before being written.
+
+        Side Effects:
+            - Assigns instance attributes. The thread starts with the first submitted entry.
+        """
+        self.storage = storage
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        # Held while the storage is in use. Anything else touching the storage (compaction,
+        # rewrites, clearing) must hold it too, so it never interleaves with a batch being written.
+        self.lock = threading.RLock()
+        self.entries_written = 0
+        self.batches_written = 0
+        # The last exception from the background thread; flush() raises its own.
+        self.error = None
+        self._pending = []
+        self._due_at = None
+        self._closing = False
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def submit(self, entry):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Queues an entry to be written. Returns at once; the entry is durable after the next flush().
+
+        Parameters:
+            entry (dict)
+
+        Side Effects:
+            - Starts the writer thread if it isn't running.
+        """
+        with self._condition:
+            if self._thread is None:
+                self._closing = False
+                self._thread = threading.Thread(target=self._run, name='storage-writer', daemon=True)
+                self._thread.start()
+            self._pending.append(entry)
+            if len(self._pending) == 1:
+                self._due_at = time.monotonic() + self.max_delay
+            if len(self._pending) >= self.max_batch:
+                self._condition.notify()
+
+    def pending_count(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Returns:
+            int: Entries submitted but not yet written.
+        """
+        with self._condition:
+            return len(self._pending)
+
+    def _write_pending(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Writes every waiting entry as one batch. The batch is taken while holding the storage lock,
+        so batches are written in the order they were taken. If the write fails, the batch is put
+        back in front of newer entries.
+
+        Raises:
+            Whatever the storage raised.
+
+        Side Effects:
+            - Appends to the storage.
+        """
+        with self.lock:
+            with self._condition:
+                batch, self._pending = self._pending, []
+                self._due_at = None
+            if not batch:
+                return
+            try:
+                self.storage.append_many(batch)
+            except Exception:
+                with self._condition:
+                    self._pending[:0] = batch
+                    self._due_at = time.monotonic() + self.RETRY_DELAY
+                raise
+            self.entries_written += len(batch)
+            self.batches_written += 1
+
+    def _run(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Body of the writer thread: waits for a batch to fill up or come due, writes it, repeats
+        until close().
+        """
+        while True:
+            with self._condition:
+                while not self._closing:
+                    if len(self._pending) >= self.max_batch:
+                        break
+                    timeout = None if self._due_at is None else self._due_at - time.monotonic()
+                    if timeout is not None and timeout <= 0:
+                        break
+                    self._condition.wait(timeout)
+                if self._closing:
+                    return
+            try:
+                self._write_pending()
+                self.error = None
+            except Exception as e:
+                self.error = e
+
+    def flush(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Writes everything submitted so far and forces it to disk, from the calling thread.
+
+        Raises:
+            Whatever the storage raised; the unwritten entries stay queued.
+
+        Side Effects:
+            - Appends to and flushes the storage.
+        """
+        with self.lock:
+            self._write_pending()
+            self.storage.flush()
+
+    def close(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Stops the writer thread, then flushes. A later submit() starts a new thread.
+
+        Raises:
+            Whatever the storage raised during the final flush.
+
+        Side Effects:
+            - Joins the writer thread; appends to and flushes the storage.
+        """
+        with self._condition:
+            thread = self._thread
+            self._closing = True
+            self._condition.notify()
+        if thread is not None:
+            thread.join()
+        with self._condition:
+            self._thread = None
+        self.flush()
+
+
+# EntryStore Class
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+_MICROSECOND = datetime.timedelta(microseconds=1)
+
+
+class EntryStore:
+    """
+    A list-like collection of user entries kept column by column instead of as one dict per entry:
+    timestamps as integer microseconds since 1970, moods, distortion names and pattern-set versions
+    as small integer codes, and repeated response strings shared. Indexing or iterating rebuilds the usual entry dicts, so
+    code written against a list of dicts (and the JSON files) sees the same data.
+    Primary Author: Team collectively
+    No techniques claimed here.
+    """
+
+    FIELDS = ('timestamp', 'mood', 'responses', 'distortions', 'intensity')
+    # Recorded on entries scored since pattern sets were versioned; older entries don't have it.
+    OPTIONAL_FIELDS = ('pattern_version',)
+
+    def __init__(self, entries=()):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Parameters:
+            entries (iterable of dict): Initial entries, oldest first.
+
+        Side Effects:
+            - Assigns the column arrays and code tables, then appends each entry.
+        """
+        self._timestamps = array('q')
+        self._moods = array('H')
+        self._intensities = array('b')
+        self._versions = array('H')
+        self._responses = []
+        self._distortions = []
+        self._mood_names = []
+        self._mood_codes = {}
+        self._distortion_names = []
+        self._distortion_codes = {}
+        # Code 0 stands for an entry without a pattern_version.
+        self._version_names = [None]
+        self._version_codes = {None: 0}
+        self._strings = {}
+        # Entries that don't fit the columns (extra keys, odd types, timezone-aware timestamps) are kept as-is.
+        self._irregular = {}
+        for entry in entries:
+            self.append(entry)
+
+    def _encode(self, entry):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Converts one entry dict into column values.
+
+        Parameters:
+            entry (dict)
+
+        Returns:
+            tuple: (timestamp, mood code, intensity, responses, distortion codes, version code), or
+            None if the entry can't be stored in the columns without changing it.
+
+        Side Effects:
+            - May add new mood, distortion or version names to the code tables.
+        """
+        keys = set(entry)
+        if not set(self.FIELDS) <= keys <= set(self.FIELDS + self.OPTIONAL_FIELDS):
+            return None
+        version = entry.get('pattern_version')
+        if version is not None and not isinstance(version, str):
+            return None
+        timestamp, mood, responses = entry['timestamp'], entry['mood'], entry['responses']
+        intensity, distortions = entry['intensity'], entry['distortions']
+        if type(intensity) is not int or not -128 <= intensity <= 127 or not isinstance(mood, str):
+            return None
+        if not isinstance(responses, list) or not all(isinstance(r, str) for r in responses):
+            return None
+        if not isinstance(distortions, list) or not all(isinstance(d, str) for d in distortions):
+            return None
+        try:
+            ts = datetime.datetime.fromisoformat(timestamp)
+        except (TypeError, ValueError):
+            return None
+        if ts.tzinfo is not None or ts.isoformat() != timestamp:
+            return None
+
+        if mood not in self._mood_codes:
+            if len(self._mood_names) > 0xFFFF:
+                return None
+            self._mood_codes[mood] = len(self._mood_names)
+            self._mood_names.append(mood)
+        if not self._encode_distortions(distortions) or not self._encode_version(version):
+            return None
+
+        return (
+            (ts - _EPOCH) // _MICROSECOND,
+            self._mood_codes[mood],
+            intensity,
+            tuple(self._strings.setdefault(r, r) for r in responses),
+            bytes(self._distortion_codes[name] for name in distortions),
+            self._version_codes[version]
+        )
+
+    def _encode_distortions(self, distortions):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Makes sure every distortion name has a code.
+
+        Parameters:
+            distortions (list of str)
+
+        Returns:
+            bool: False if the code table is full.
+
+        Side Effects:
+            - May add names to the distortion code table.
+        """
+        for name in distortions:
+            if name not in self._distortion_codes:
+                if len(self._distortion_names) > 0xFF:
+                    return False
+                self._distortion_codes[name] = len(self._distortion_names)
+                self._distortion_names.append(name)
+        return True
+
+    def _encode_version(self, version):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Makes sure a pattern-set version has a code.
+
+        Parameters:
+            version (str or None)
+
+        Returns:
+            bool: False if the code table is full.
+
+        Side Effects:
+            - May add the version to the version code table.
+        """
+        if version not in self._version_codes:
+            if len(self._version_names) > 0xFFFF:
+                return False
+            self._version_codes[version] = len(self._version_names)
+            self._version_names.append(version)
+        return True
+
+    def append(self, entry):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Adds one entry at the end.
+
+        Parameters:
+            entry (dict)
+
+        Side Effects:
+            - Grows every column by one.
+        """
+        encoded = self._encode(entry)
+        if encoded is None:
+            self._irregular[len(self._timestamps)] = dict(entry)
+            encoded = (0, 0, 0, (), b'', 0)
+        timestamp, mood, intensity, responses, distortions, version = encoded
+        self._timestamps.append(timestamp)
+        self._moods.append(mood)
+        self._intensities.append(intensity)
+        self._responses.append(responses)
+        self._distortions.append(distortions)
+        self._versions.append(version)
+
+    def extend(self, entries):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Parameters:
+            entries (iterable of dict)
+
+        Side Effects:
+            - Appends each entry.
+        """
+        for entry in entries:
+            self.append(entry)
+
+    def __len__(self):
+        """
+        Primary Author: Team collectively
+        Technique claimed: magic methods (other than __init__)
+
+        Returns:
+            int: Number of stored entries.
+        """
+        return len(self._timestamps)
+
+    def __getitem__(self, index):
+        """
+        Primary Author: Team collectively
+        Technique claimed: magic methods (other than __init__)
+
+        Rebuilds the entry dict at a position (or a list of them for a slice). The dict is a copy;
+        changing it doesn't change the store.
+
+        Parameters:
+            index (int or slice)
+
+        Returns:
+            dict, or list of dict for a slice.
+        """
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('EntryStore index out of range')
+        if index in self._irregular:
+            return dict(self._irregular[index])
+        entry = {
+            'timestamp': (_EPOCH + self._timestamps[index] * _MICROSECOND).isoformat(),
+            'mood': self._mood_names[self._moods[index]],
+            'responses': list(self._responses[index]),
+            'distortions': [self._distortion_names[code] for code in self._distortions[index]],
+            'intensity': self._intensities[index]
+        }
+        if self._versions[index]:
+            entry['pattern_version'] = self._version_names[self._versions[index]]
+        return entry
+
+    def __iter__(self):
+        """
+        Primary Author: Team collectively
+        Technique claimed: magic methods (other than __init__)
+
+        Yields:
+            dict: Each entry, oldest first.
+        """
+        for index in range(len(self)):
+            yield self[index]
+
+    def stale_positions(self, version):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Finds the entries that weren't scored with a given pattern-set version, comparing version codes
+        rather than rebuilding entries.
+
+        Parameters:
+            version (str): The current pattern-set version.
+
+        Returns:
+            list of int: Positions of entries with another version or none at all, in order.
+        """
+        current = self._version_codes.get(version, -1)
+        positions = [index for index, code in enumerate(self._versions) if code != current]
+        irregular = [index for index, entry in self._irregular.items() if entry.get('pattern_version') != version]
+        if irregular:
+            positions = sorted(set(positions) | set(irregular))
+        return positions
+
+    def responses_at(self, index):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Parameters:
+            index (int): Position of an entry.
+
+        Returns:
+            list of str: The entry's responses, without rebuilding the rest of the entry.
+        """
+        if index in self._irregular:
+            return list(self._irregular[index].get('responses', []))
+        return list(self._responses[index])
+
+    def set_distortions(self, index, distortions, version):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Replaces the detected distortions of one entry, e.g. after it was scored again.
+
+        Parameters:
+            index (int): Position of the entry.
+            distortions (list of str): The new distortion names.
+            version (str): Pattern-set version that produced them.
+
+        Returns:
+            list of str: The distortions the entry had before.
+
+        Side Effects:
+            - Updates the entry's distortion and version columns (or its dict, if irregular).
+        """
+        if index in self._irregular or not (self._encode_distortions(distortions) and self._encode_version(version)):
+            entry = self._irregular.get(index) or self[index]
+            old = entry.get('distortions', [])
+            entry['distortions'] = list(distortions)
+            entry['pattern_version'] = version
+            self._irregular[index] = entry
+            return list(old) if isinstance(old, list) else []
+        old = [self._distortion_names[code] for code in self._distortions[index]]
+        self._distortions[index] = bytes(self._distortion_codes[name] for name in distortions)
+        self._versions[index] = self._version_codes[version]
+        return old
+
+    def mood_columns(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Exposes the raw timestamp, mood and intensity columns for vectorized readers such as
+        CognitiveDistortionAnalyzer.mood_timeline, so they don't have to rebuild every entry dict.
+
+        Returns:
+            dict: 'timestamp' (array of microseconds since 1970), 'mood' (array of codes),
+            'mood_names' (list, indexed by code), 'intensity' (array), and 'irregular'
+            (dict of position to entry dict, for rows whose column values are placeholders).
+
+        Side Effects:
+            - None. The arrays are shared with the store and must not be modified.
+        """
+        return {
+            'timestamp': self._timestamps,
+            'mood': self._moods,
+            'mood_names': list(self._mood_names),
+            'intensity': self._intensities,
+            'irregular': {index: dict(entry) for index, entry in self._irregular.items()}
+        }
+
+    def to_arrow(self, start=None, end=None):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Builds a pyarrow Table straight from the columns, without rebuilding entry dicts: timestamps as
+        timestamp[us], mood and pattern_version dictionary-encoded over the existing code tables,
+        distortions as lists of dictionary-encoded names, intensity as int8 and responses as lists of
+        strings. Irregular entries are converted value by value; a timestamp that isn't ISO format
+        (or an intensity outside int8) becomes null.
+
+        Parameters:
+            start (datetime.date): First day to include, or None.
+            end (datetime.date): Last day to include, or None.
+
+        Returns:
+            pyarrow.Table: One row per entry in range, oldest first.
+
+        Raises:
+            ImportError: If pyarrow isn't installed.
+        """
+        count = len(self)
+        timestamps = np.frombuffer(self._timestamps, dtype=np.int64).copy() if count else np.zeros(0, np.int64)
+        moods = np.frombuffer(self._moods, dtype=np.uint16).astype(np.int32) if count else np.zeros(0, np.int32)
+        intensities = np.frombuffer(self._intensities, dtype=np.int8).copy() if count else np.zeros(0, np.int8)
+        versions = np.frombuffer(self._versions, dtype=np.uint16).astype(np.int32) if count else np.zeros(0, np.int32)
+        valid = np.ones(count, dtype=bool)
+        intensity_valid = np.ones(count, dtype=bool)
+        responses = list(self._responses)
+        distortions = list(self._distortions)
+        mood_names, mood_codes = list(self._mood_names), dict(self._mood_codes)
+        distortion_names, distortion_codes = list(self._distortion_names), dict(self._distortion_codes)
+        version_names, version_codes = list(self._version_names), dict(self._version_codes)
+
+        def code(value, names, codes):
+            if value not in codes:
+                codes[value] = len(names)
+                names.append(value)
+            return codes[value]
+
+        for index, entry in self._irregular.items():
+            try:
+                ts = datetime.datetime.fromisoformat(entry.get('timestamp'))
+                if ts.tzinfo is not None:
+                    ts = ts.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+                timestamps[index] = (ts - _EPOCH) // _MICROSECOND
+            except (TypeError, ValueError):
+                valid[index] = False
+            moods[index] = code(str(entry.get('mood')), mood_names, mood_codes)
+            intensity = entry.get('intensity')
+            if type(intensity) is int and -128 <= intensity <= 127:
+                intensities[index] = intensity
+            else:
+                intensity_valid[index] = False
+            listed = [entry[key] if isinstance(entry.get(key), list) else [] for key in ('responses', 'distortions')]
+            responses[index] = [str(r) for r in listed[0]]
+            distortions[index] = [code(str(d), distortion_names, distortion_codes) for d in listed[1]]
+            version = entry.get('pattern_version')
+            versions[index] = code(None if version is None else str(version), version_names, version_codes)
+
+        selected = valid.copy()
+        if start is not None:
+            selected &= timestamps >= (datetime.datetime.combine(start, datetime.time()) - _EPOCH) // _MICROSECOND
+        if end is not None:
+            end_day = datetime.datetime.combine(end + datetime.timedelta(days=1), datetime.time())
+            selected &= timestamps < (end_day - _EPOCH) // _MICROSECOND
+        if start is not None or end is not None:
+            rows = np.flatnonzero(selected)
+            timestamps, moods, intensities, versions = timestamps[rows], moods[rows], intensities[rows], versions[rows]
+            valid, intensity_valid = valid[rows], intensity_valid[rows]
+            responses = [responses[row] for row in rows]
+            distortions = [distortions[row] for row in rows]
+
+        lengths = np.fromiter((len(d) for d in distortions), dtype=np.int32, count=len(distortions))
+        offsets = np.concatenate(([0], np.cumsum(lengths, dtype=np.int32)))
+        codes = np.fromiter(itertools.chain.from_iterable(distortions), dtype=np.int16, count=int(offsets[-1]))
+        # Code 0 is "no version"; it becomes null rather than a dictionary value.
+        version_dictionary = ['' if name is None else name for name in version_names]
+        return pa.table({
+            'timestamp': pa.array(timestamps, type=pa.timestamp('us'), mask=~valid),
+            'mood': pa.DictionaryArray.from_arrays(pa.array(moods, type=pa.int32()),
+                                                   pa.array(mood_names, type=pa.string())),
+            'intensity': pa.array(intensities, type=pa.int8(), mask=~intensity_valid),
+            'responses': pa.array([list(r) for r in responses], type=pa.list_(pa.string())),
+            'distortions': pa.ListArray.from_arrays(
+                pa.array(offsets, type=pa.int32()),
+                pa.DictionaryArray.from_arrays(pa.array(codes, type=pa.int16()),
+                                               pa.array(distortion_names, type=pa.string()))),
+            'pattern_version': pa.DictionaryArray.from_arrays(
+                pa.array(versions, type=pa.int32(), mask=versions == 0),
+                pa.array(version_dictionary, type=pa.string()))
+        })
+
+
+# MoodAggregates Class
+
+class MoodAggregates:
+    """
+    Running totals over all user entries (mood counts, intensity sums, distortion counts and per-day
+    rollups), updated one entry at a time so summaries never need a pass over the full history.
+    Primary Author: Team collectively
+    No techniques claimed here.
+    """
+
+    def __init__(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Side Effects:
+            - Sets every total to empty.
+        """
+        self.clear()
+
+    def clear(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Resets every total.
+
+        Side Effects:
+            - Reassigns entry_count, mood_counts, intensity_sums, distortion_counts and daily.
+        """
+        self.entry_count = 0
+        self.mood_counts = collections.Counter()
+        self.intensity_sums = collections.Counter()
+        self.distortion_counts = collections.Counter()
+        # 'YYYY-MM-DD' -> {mood: [count, intensity sum]}
+        self.daily = {}
+
+    def add(self, entry):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Folds one entry into the totals.
+
+        Parameters:
+            entry (dict)
+
+        Side Effects:
+            - Updates the totals.
+        """
+        mood = entry['mood']
+        intensity = entry['intensity']
+        self.entry_count += 1
+        self.mood_counts[mood] += 1
+        self.intensity_sums[mood] += intensity
+        self.distortion_counts.update(entry['distortions'])
+        day = self.daily.setdefault(entry['timestamp'][:10], {})
+        totals = day.setdefault(mood, [0, 0])
+        totals[0] += 1
+        totals[1] += intensity
+
+    def remove(self, entry):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Takes a previously added entry back out of the totals, e.g. when old data is pruned.
+
+        Parameters:
+            entry (dict)
+
+        Side Effects:
+            - Updates the totals, dropping moods, distortions and days that reach zero.
+        """
+        mood = entry['mood']
+        intensity = entry['intensity']
+        self.entry_count -= 1
+        self.mood_counts[mood] -= 1
+        self.intensity_sums[mood] -= intensity
+        if self.mood_counts[mood] <= 0:
+            del self.mood_counts[mood]
+            del self.intensity_sums[mood]
+        self.distortion_counts.subtract(entry['distortions'])
+        for name in set(entry['distortions']):
+            if self.distortion_counts[name] <= 0:
+                del self.distortion_counts[name]
+        date = entry['timestamp'][:10]
+        day = self.daily.get(date, {})
+        totals = day.get(mood)
+        if totals is not None:
+            totals[0] -= 1
+            totals[1] -= intensity
+            if totals[0] <= 0:
+                del day[mood]
+            if not day:
+                del self.daily[date]
+
+    def replace_distortions(self, old, new):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Swaps one entry's distortions in the totals, e.g. after it was scored again.
+
+        Parameters:
+            old (list of str): Distortions counted so far.
+            new (list of str): Distortions to count instead.
+
+        Side Effects:
+            - Updates distortion_counts, dropping names that reach zero.
+        """
+        self.distortion_counts.subtract(old)
+        self.distortion_counts.update(new)
+        for name in set(old):
+            if self.distortion_counts[name] <= 0:
+                del self.distortion_counts[name]
+
+    def rebuild(self, entries):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Recomputes every total from scratch.
+
+        Parameters:
+            entries (iterable of dict)
+
+        Side Effects:
+            - Replaces the totals.
+        """
+        self.clear()
+        for entry in entries:
+            self.add(entry)
+
+    def average_intensity(self, mood):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Parameters:
+            mood (str)
+
+        Returns:
+            float: Mean intensity for the mood, or 0.0 if it was never recorded.
+        """
+        count = self.mood_counts[mood]
+        return self.intensity_sums[mood] / count if count else 0.0
+
+    def to_dict(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Returns:
+            dict: A JSON-serializable copy of the totals.
+        """
+        return {
+            'entry_count': self.entry_count,
+            'mood_counts': dict(self.mood_counts),
+            'intensity_sums': dict(self.intensity_sums),
+            'distortion_counts': dict(self.distortion_counts),
+            'daily': self.daily
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Parameters:
+            data (dict): Output of to_dict().
+
+        Returns:
+            MoodAggregates
+        """
+        aggregates = cls()
+        aggregates.entry_count = data['entry_count']
+        aggregates.mood_counts.update(data['mood_counts'])
+        aggregates.intensity_sums.update(data['intensity_sums'])
+        aggregates.distortion_counts.update(data['distortion_counts'])
+        aggregates.daily = data['daily']
+        return aggregates
+
+
+# Columnar Export
+
+# File suffixes that pick a columnar format when none is given.
+COLUMNAR_SUFFIXES = {'.parquet': 'parquet', '.pq': 'parquet', '.feather': 'feather', '.arrow': 'feather', '.ipc': 'feather'}
+# Parquet files start with this; Arrow IPC (Feather v2) files with b'ARROW1'.
+_PARQUET_MAGIC = b'PAR1'
+
+
+def columnar_format(path, fmt='auto'):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Decides how an export is written. Parquet is preferred; when pyarrow was built without Parquet
+    support, the export falls back to Arrow IPC (Feather v2) next to the requested path.
+
+    Parameters:
+        path (str): Requested output path.
+        fmt (str): 'parquet', 'feather' or 'auto' (from the suffix, Parquet if it doesn't name one).
+
+    Returns:
+        (str, str): The format and the path to write.
+
+    Raises:
+        ImportError: If pyarrow isn't installed.
+    """
+    importlib.import_module('pyarrow')
+    if fmt == 'auto':
+        fmt = COLUMNAR_SUFFIXES.get(os.path.splitext(path)[1].lower(), 'parquet')
+    if fmt == 'parquet':
+        try:
+            importlib.import_module('pyarrow.parquet')
+        except ImportError:
+            fmt, path = 'feather', os.path.splitext(path)[0] + '.arrow'
+    return fmt, path
+
+
+def write_columnar(table, path, fmt):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Writes a table atomically. Feather files are left uncompressed, so readers can memory-map them
+    and use the columns without copying.
+
+    Parameters:
+        table (pyarrow.Table)
+        path (str)
+        fmt (str): 'parquet' or 'feather'.
+
+    Side Effects:
+        - Replaces the file at path.
+    """
+    tmp_path = path + '.tmp'
+    if fmt == 'parquet':
+        importlib.import_module('pyarrow.parquet').write_table(table, tmp_path)
+    else:
+        pa_feather.write_feather(table, tmp_path, compression='uncompressed')
+    os.replace(tmp_path, path)
+
+
+def read_columnar(path, start=None, end=None):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Reads entries from a file written by export_columnar (or any Parquet/Feather file with the same
+    columns), recognizing the format from the file itself. Feather files are memory-mapped.
+
+    Parameters:
+        path (str)
+        start (datetime.date): First day to include, or None.
+        end (datetime.date): Last day to include, or None.
+
+    Returns:
+        list of dict: Entries in the usual form, in file order. Rows without a timestamp are skipped.
+
+    Raises:
+        ImportError: If pyarrow isn't installed.
+        ValueError: If a required column is missing.
+        OSError: If the file can't be read or isn't Parquet or Arrow.
+    """
+    with open(path, 'rb') as f:
+        magic = f.read(4)
+    if magic == _PARQUET_MAGIC:
+        table = importlib.import_module('pyarrow.parquet').read_table(path)
+    else:
+        table = pa_feather.read_table(path, memory_map=True)
+    missing = [name for name in EntryStore.FIELDS if name not in table.column_names]
+    if missing:
+        raise ValueError(f"'{path}' has no {', '.join(missing)} column")
+    columns = {name: table.column(name).to_pylist() for name in table.column_names
+               if name in EntryStore.FIELDS + EntryStore.OPTIONAL_FIELDS}
+    start_ts = datetime.datetime.combine(start, datetime.time()) if start is not None else None
+    end_ts = datetime.datetime.combine(end + datetime.timedelta(days=1), datetime.time()) if end is not None else None
+    entries = []
+    for row in range(table.num_rows):
+        timestamp = columns['timestamp'][row]
+        if timestamp is None:
+            continue
+        if isinstance(timestamp, datetime.datetime) and timestamp.tzinfo is not None:
+            timestamp = timestamp.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+        if (start_ts is not None and timestamp < start_ts) or (end_ts is not None and timestamp >= end_ts):
+            continue
+        entry = {
+            'timestamp': timestamp.isoformat(),
+            'mood': columns['mood'][row],
+            'responses': list(columns['responses'][row] or []),
+            'distortions': list(columns['distortions'][row] or []),
+            'intensity': columns['intensity'][row]
+        }
+        version = columns.get('pattern_version', [None] * table.num_rows)[row]
+        if version is not None:
+            entry['pattern_version'] = version
+        entries.append(entry)
+    return entries
+
+
+# CognitiveDistortionAnalyzer Class
+
+class CognitiveDistortionAnalyzer:
+    """
+    Analyzes user input for cognitive distortions and manages user data entries.
+
+    Composition: Holds a list of Distortion instances.
+    """
+
+    def __init__(self, storage=None, patterns_path='distortion_patterns.json'):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Initializes the analyzer with empty data structures.
+
+        Parameters:
+            storage (JsonJournalStorage or SQLiteStorage): Where user entries are persisted. Defaults to
+                'user_data.json' plus the 'user_data.jsonl' journal in the working directory.
+            patterns_path (str): The distortion patterns file read by load_distortions_data.
+
+        Side Effects:
+            - Sets self.user_data to empty (and self.loaded to False) and self.registry to an empty pattern registry.
+            - Sets self.storage, self.writer and self.aggregates
+            - Compiles the phrase matchers used by the crisis and unrealistic-statement screens
+            - Sets self.session_pipeline, the screens and analysis a session runs on its answer
+            - Creates an empty sentence cache; instrumentation and the match budget start off
+        """
+        self.registry = PatternRegistry(patterns_path)
+        self.registry.listeners.append(self._track_patterns)
+        self.user_data = EntryStore()
+        self.storage = storage if storage is not None else JsonJournalStorage()
+        self.writer = StorageWriter(self.storage)
+        self.aggregates = MoodAggregates()
+        # Entries may be added from several threads (the service's executor); this guards user_data
+        # and aggregates, and keeps them in the same order as the entries handed to the writer.
+        self.entries_lock = threading.RLock()
+        self.compact_threshold = 1000
+        self.crisis_matchers = {
+            False: MultiLiteralMatcher(SUICIDAL_PHRASES),
+            True: MultiLiteralMatcher(STRICT_SUICIDAL_PHRASES)
+        }
+        self.absolute_matcher = MultiLiteralMatcher(ABSOLUTE_TERMS, boundary='space')
+        self.unrealistic_matcher = MultiLiteralMatcher(UNREALISTIC_PHRASES)
+        # A session's answer is prepared once and read by each of these in turn; a crisis ends it early.
+        self.session_pipeline = TextPipeline([
+            ('crisis_screen', functools.partial(self.detect_suicidal_thoughts, strict=True), bool),
+            ('unrealistic_filter', functools.partial(self.filter_unrealistic_statements, intensity=2)),
+            ('analysis', self.analyze_text)
+        ])
+        self.loaded = False
+        self.sentence_cache = SentenceCache()
+        # Set to an Instrumentation to count and time pattern matching; None keeps matching unmeasured.
+        self.instrumentation = None
+        # Set to a MatchGuard to cap the time matching one text may take; None matches in this process.
+        self.match_guard = None
+        # If set, longer texts are only analyzed up to this many characters. None analyzes whole texts.
+        self.max_input_chars = None
+
+    def _track_patterns(self, pattern_set):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Registry listener: lists the patterns of a newly installed set with the instrumentation, so
+        patterns added by a reload show up (with zero counts) before they are first tried.
+
+        Parameters:
+            pattern_set (PatternSet): The set just installed.
+
+        Side Effects:
+            - Updates self.instrumentation, when it is set
+        """
+        instrumentation = self.instrumentation
+        if instrumentation is not None:
+            instrumentation.track(pattern_set.distortions)
+
+    @property
+    def distortions_data(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Returns:
+            dict: The parsed definitions of the current pattern set.
+        """
+        return self.registry.current.data
+
+    @property
+    def distortions(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Returns:
+            list of Distortion: The distortions of the current pattern set.
+        """
+        return self.registry.current.distortions
+
+    @property
+    def matcher(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Returns:
+            DistortionMatcher: The compiled matcher of the current pattern set.
+        """
+        return self.registry.current.matcher
+
+    def load_distortions_data(self):
+        """
+        Primary Author: Josh
+        Techniques claimed: with statements, comprehensions
+
+        Loads distortion definitions from 'distortion_patterns.json', validates and compiles every
+        pattern, and installs them as the current pattern set. Validation is skipped for a file that
+        the pattern check cache shows was already validated.
+
+        Side Effects:
+            - Reads from 'distortion_patterns.json', and reads or writes its pattern check cache
+            - Replaces the registry's current pattern set
+            - Prints an error for a missing or invalid file, or for each pattern that doesn't compile,
+              and a warning for each pattern that may backtrack catastrophically
+        """
+        path = self.registry.path
+        try:
+            self.registry.load()
+        except FileNotFoundError:
+            print(f"Error: '{path}' not found.")
+        except json.JSONDecodeError:
+            print(f"Error: '{path}' isn't a valid JSON file.")
+        except PatternError as e:
+            for name, pattern, message in e.problems:
+                print(f"Error: invalid pattern {pattern!r} for distortion '{name}' in '{path}': {message}")
+        else:
+            for name, pattern, message in self.registry.current.warnings:
+                print(f"Warning: pattern {pattern!r} for distortion '{name}' in '{path}' {message}")
+
+    def build_distortions(self, data):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Installs already-parsed distortion definitions as the current pattern set.
+
+        Parameters:
+            data (dict): Mapping of distortion name to {"patterns": [...], "explanation": str}.
+
+        Raises:
+            PatternError: If any pattern doesn't compile.
+
+        Side Effects:
+            - Replaces the registry's current pattern set
+        """
+        self.registry.use(data)
+
+    def analyze_text(self, text):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Examines the given text for distortions by scanning each sentence with the compiled matcher.
+        Sentences seen recently are answered from the sentence cache.
+
+        Parameters:
+            text (str or TextDocument): The user's input text.
+
+        Returns:
+            list of (str, str): Distortion name and the matched pattern.
+
+        Side Effects:
+            - Updates self.sentence_cache, and self.instrumentation when it is set
+        """
+        instrumentation = self.instrumentation
+        if instrumentation is None:
+            return [(hit.name, hit.pattern) for hit in self.analyze_text_iter(text)]
+        start = time.perf_counter()
+        detected_distortions = [(hit.name, hit.pattern) for hit in self.analyze_text_iter(text)]
+        instrumentation.record_call('analyze_text', time.perf_counter() - start)
+        return detected_distortions
+
+    def analyze_text_iter(self, text, first_only=False, max_hits=None):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Generator form of analyze_text. The text's sentence spans come from its TextDocument, found
+        in one regex pass; detections are yielded as soon as each sentence is scanned, so callers can
+        stop early without matching the rest. If self.max_input_chars is set, only that many
+        characters are analyzed. With a match guard, uncached sentences are matched in its worker
+        process (and aren't instrumented).
+
+        Parameters:
+            text (str or TextDocument): The user's input text. A TextDocument's sentences are reused.
+            first_only (bool): Stop after the first detection. Same as max_hits=1.
+            max_hits (int): Stop after this many detections. None means no limit.
+
+        Returns:
+            generator of DistortionHit: Detections in analyze_text order, with offsets into text.
+
+        Raises:
+            MatchBudgetExceeded: If a match guard is set and the text takes longer than its budget.
+            MatchWorkerError: If a match guard is set and its worker process keeps dying.
+
+        Side Effects:
+            - Updates self.sentence_cache, and self.instrumentation when it is set
+        """
+        if first_only:
+            max_hits = 1
+        if max_hits is not None and max_hits <= 0:
+            return
+        # Hold on to one pattern set for the whole scan, even if a reload swaps in a new one meanwhile.
+        pattern_set = self.registry.current
+        matcher, version, cache = pattern_set.matcher, pattern_set.version, self.sentence_cache
+        instrumentation = self.instrumentation
+        guard = self.match_guard
+        deadline = guard.deadline(pattern_set) if guard is not None else None
+        document = TextDocument.of(text)
+        hits = 0
+        for offset, sentence_end in document.sentences(self.max_input_chars):
+            key = document.sentence_key(offset, sentence_end)
+            results = cache.get(version, key)
+            if results is None:
+                sentence = document.text[offset:sentence_end]
+                if guard is None:
+                    results = tuple(matcher.match_spans(sentence, instrumentation))
+                else:
+                    results = tuple(guard.match_spans(pattern_set, sentence, deadline))
+                cache.put(version, key, results)
+            for name, pattern, start, end in results:
+                yield DistortionHit(name, pattern, offset + start, offset + end)
+                hits += 1
+                if hits == max_hits:
+                    return
+
+    def analyze_many(self, texts, workers=None, chunksize=256, ordered=True):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Analyzes many texts, spreading chunks of them over a pool of worker processes.
+        Each worker compiles the distortion patterns once, when it starts.
+
+        Parameters:
+            texts (iterable of str): The texts to analyze. Consumed lazily, one chunk at a time.
+            workers (int): Number of worker processes. Defaults to the CPU count; 1 analyzes in this process.
+            chunksize (int): Number of texts sent to a worker at once.
+            ordered (bool): If True, results are yielded in input order. If False, (index, result)
+                pairs are yielded as soon as each chunk finishes.
+
+        Returns:
+            generator: analyze_text results, or (index, result) pairs when ordered is False.
+
+        Side Effects:
+            - Starts and stops worker processes.
+        """
+        # Imported here: the process pool machinery is a large share of module import time.
+        from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+        if workers is None:
+            workers = os.cpu_count() or 1
+        texts = iter(texts)
+
+        if workers <= 1:
+            for index, text in enumerate(texts):
+                result = self.analyze_text(text)
+                yield result if ordered else (index, result)
+            return
+
+        # Keep a bounded number of chunks in flight so huge inputs are never fully materialized.
+        max_pending = workers * 2
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_analysis_worker,
+                                 initargs=(self.distortions_data,)) as pool:
+            pending = collections.deque() if ordered else set()
+            offsets = {}
+            offset = 0
+            while True:
+                while len(pending) < max_pending:
+                    chunk = list(itertools.islice(texts, chunksize))
+                    if not chunk:
+                        break
+                    future = pool.submit(_analyze_chunk, chunk)
+                    offsets[future] = offset
+                    offset += len(chunk)
+                    if ordered:
+                        pending.append(future)
+                    else:
+                        pending.add(future)
+                if not pending:
+                    break
+
+                if ordered:
+                    done = [pending.popleft()]
+                else:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    start = offsets.pop(future)
+                    for index, result in enumerate(future.result(), start):
+                        yield result if ordered else (index, result)
+
+    def find_suicidal_phrases(self, text, strict=False):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Lists every suicidal ideation phrase in the text, so callers can report which one fired.
+
+        Parameters:
+            text (str or TextDocument)
+            strict (bool)
+
+        Returns:
+            list of (int, int, str): Start offset, end offset and phrase for each hit.
+
+        Side Effects:
+            - None
+        """
+        document = TextDocument.of(text)
+        return self.crisis_matchers[strict].findall(document.text, document.lowered)
+
+    def detect_suicidal_thoughts(self, text, strict=False):
+        """
+        Primary Author: Zainab
+        Techniques claimed: regular expressions
+
+        Checks text for suicidal ideation terms, optionally using stricter criteria.
+
+        Parameters:
+            text (str or TextDocument)
+            strict (bool)
+
+        Returns:
+            bool: True if suicidal patterns are found.
+
+        Side Effects:
+            - None
+        """
+        document = TextDocument.of(text)
+        return self.crisis_matchers[strict].search(document.text, document.lowered) is not None
+
+    def find_unrealistic_statements(self, text):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Lists the absolute terms (whole words) and unrealistic phrases found in the text.
+
+        Parameters:
+            text (str or TextDocument)
+
+        Returns:
+            (list, list): Hits for absolute terms and for unrealistic phrases, each as (start, end, phrase).
+
+        Side Effects:
+            - None
+        """
+        document = TextDocument.of(text)
+        return (self.absolute_matcher.findall(document.text, document.lowered),
+                self.unrealistic_matcher.findall(document.text, document.lowered))
+
+    def filter_unrealistic_statements(self, text, intensity=1):
+        """
+        Primary Author: Zainab
+        Techniques claimed: optional parameters/keyword arguments
+
+        Evaluates text for absolute or unrealistic statements, with 'intensity' influencing strictness.
+
+        Parameters:
+            text (str or TextDocument)
+            intensity (int)
+
+        Returns:
+            int: Severity level (0,1,2)
+
+        Side Effects:
+            - None
+        """
+        document = TextDocument.of(text)
+        has_abs = self.absolute_matcher.contains(document)
+        has_unreal = self.unrealistic_matcher.contains(document)
+
+        severity = 2 if (has_abs and has_unreal and intensity > 1) else (1 if (has_abs or has_unreal) else 0)
+        return severity
+
+    def screen_text(self, text, strict=True, intensity=1):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Runs both safety screens on a text, as a session does before analysis. The text is
+        prepared once for both.
+
+        Parameters:
+            text (str or TextDocument)
+            strict (bool): Passed to the crisis screen.
+            intensity (int): Passed to filter_unrealistic_statements.
+
+        Returns:
+            dict: 'suicidal' (bool), 'suicidal_phrases' (list of (start, end, phrase)) and 'severity' (int).
+
+        Side Effects:
+            - None
+        """
+        document = TextDocument.of(text)
+        phrases = self.find_suicidal_phrases(document, strict=strict)
+        return {
+            'suicidal': bool(phrases),
+            'suicidal_phrases': phrases,
+            'severity': self.filter_unrealistic_statements(document, intensity=intensity)
+        }
+
+    def add_user_entry(self, mood, responses, intensity):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Records a new user entry, including mood, responses, intensity, and detected distortions.
+        Safe to call from several threads at once; only the bookkeeping is serialized, not the matching.
+
+        Parameters:
+            mood (str)
+            responses (list of str)
+            intensity (int)
+
+        Returns:
+            (list, str): (detected_distortions, combined_text)
+
+        Side Effects:
+            - Modifies self.user_data and self.aggregates
+            - Queues the entry for the storage writer; it is on disk after the writer's next batch or
+              save_user_data()
+        """
+        combined_text = ' '.join(responses)
+        pattern_version = self.registry.current.version
+        distortions = self.analyze_text(combined_text)
+        self.record_entry(mood, responses, intensity, distortions, pattern_version)
+        return distortions, combined_text
+
+    def record_entry(self, mood, responses, intensity, distortions, pattern_version):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Records an entry whose responses were already analyzed; the bookkeeping half of add_user_entry.
+
+        Parameters:
+            mood (str)
+            responses (list of str)
+            intensity (int)
+            distortions (list of (str, str)): analyze_text output for the joined responses.
+            pattern_version (str): Version of the pattern set that produced distortions.
+
+        Returns:
+            dict: The recorded entry.
+
+        Side Effects:
+            - Same as add_user_entry
+        """
+        with self.entries_lock:
+            entry = {
+                'timestamp': datetime.datetime.now().isoformat(),
+                'mood': mood,
+                'responses': responses,
+                'distortions': [d[0] for d in distortions],
+                'intensity': intensity,
+                'pattern_version': pattern_version
+            }
+            self.user_data.append(entry)
+            self.aggregates.add(entry)
+            self.writer.submit(entry)
+        return entry
+
+    def score_texts(self, texts, pattern_set=None):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Finds the distortion names in many texts at once, the way add_user_entry records them, using
+        pandas string operations: the texts are split into one Series of sentences, and each distortion's
+        combined pattern is run over the whole Series with str.contains. With a match guard set, the
+        texts go through analyze_text instead, so the budget still applies.
+
+        Parameters:
+            texts (list of str): The combined responses of each entry.
+            pattern_set (PatternSet): Set to score with. Defaults to the current one.
+
+        Returns:
+            list of list of str: The distortion names for each text, in analyze_text order.
+
+        Raises:
+            MatchBudgetExceeded: With a match guard, if a text takes longer than its budget.
+            MatchWorkerError: With a match guard, if its worker process keeps dying.
+        """
+        if pattern_set is None:
+            pattern_set = self.registry.current
+        if self.match_guard is not None:
+            return [[name for name, _ in self.analyze_text(text)] for text in texts]
+        if not texts:
+            return []
+
+        series = pd.Series(texts, dtype=object)
+        if self.max_input_chars is not None:
+            series = series.str.slice(0, self.max_input_chars)
+        # One row per sentence, indexed by the position of its text; explode keeps sentence order.
+        sentences = series.str.findall(_SENTENCE_RE.pattern).explode().dropna().str.strip()
+        sentences = sentences[sentences != '']
+        matcher = pattern_set.matcher
+        if sentences.empty or not matcher.distortions:
+            return [[] for _ in texts]
+
+        with warnings.catch_warnings():
+            # Capture groups in user patterns make pandas warn that they are ignored; they are.
+            warnings.simplefilter('ignore', UserWarning)
+            # Each distinct sentence is matched once (canned answers repeat a lot), and the combined
+            # regex drops the sentences with no distortion before the per-distortion passes.
+            distinct = pd.Series(sentences.unique(), dtype=object)
+            if matcher.combined is not None:
+                distinct = distinct[distinct.str.contains(matcher.combined.pattern, flags=re.IGNORECASE, regex=True)]
+            hits = pd.DataFrame({
+                i: self._contains_any(distinct, [regex] if regex is not None else d.compiled_patterns)
+                for i, (d, regex) in enumerate(zip(matcher.distortions, matcher.distortion_regexes))
+            })
+        hits.index = distinct.to_numpy()
+        # stack() walks sentence by sentence and, within a sentence, distortion by distortion.
+        found = hits.stack()
+        found = found[found.astype(bool)]
+        by_sentence = {}
+        for sentence, i in found.index:
+            by_sentence.setdefault(sentence, []).append(matcher.distortions[i].name)
+
+        results = [[] for _ in texts]
+        matched = sentences.map(by_sentence).dropna()
+        for position, names in zip(matched.index, matched.to_numpy()):
+            results[position].extend(names)
+        return results
+
+    @staticmethod
+    def _contains_any(series, regexes):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Parameters:
+            series (pd.Series): Sentences.
+            regexes (list of re.Pattern): Matched case-insensitively, one after another.
+
+        Returns:
+            pd.Series of bool: Whether each sentence matches any of the regexes.
+        """
+        found = pd.Series(False, index=series.index)
+        for regex in regexes:
+            found |= series.str.contains(regex.pattern, flags=re.IGNORECASE, regex=True)
+        return found
+
+    def rescore_entries(self, chunk_size=10000, force=False):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Scores stored entries again with the current distortion patterns, so edits to the patterns
+        file reach old entries too. Only entries recorded with another pattern-set version (or none)
+        are scored, unless force is set. Entries are scored chunk_size at a time with score_texts,
+        which keeps pandas' intermediate memory bounded, and the result is written back through the
+        storage once. With per-user storage only the loaded months are scored.
+
+        Parameters:
+            chunk_size (int): Entries scored per pandas pass.
+            force (bool): Score every entry, whatever its version.
+
+        Returns:
+            int: Number of entries scored.
+
+        Side Effects:
+            - Updates the distortions and pattern_version of entries in self.user_data
+            - Updates self.aggregates
+            - Rewrites the stored entries and saves the aggregates, if any entry was scored
+        """
+        if not self.loaded:
+            self.load_user_data()
+        pattern_set = self.registry.current
+        version = pattern_set.version
+        with self.entries_lock:
+            positions = range(len(self.user_data)) if force else self.user_data.stale_positions(version)
+            for offset in range(0, len(positions), chunk_size):
+                chunk = positions[offset:offset + chunk_size]
+                texts = [' '.join(self.user_data.responses_at(index)) for index in chunk]
+                for index, distortions in zip(chunk, self.score_texts(texts, pattern_set)):
+                    old = self.user_data.set_distortions(index, distortions, version)
+                    self.aggregates.replace_distortions(old, distortions)
+            if positions:
+                # Queued entries are written first, so the rewrite can't be followed by stale appends.
+                self.writer.flush()
+                with self.writer.lock:
+                    rewrite = getattr(self.storage, 'rewrite', self.storage.compact)
+                    rewrite(self.user_data)
+                    self.storage.save_aggregates(self.aggregates.to_dict())
+        return len(positions)
+
+    def save_user_data(self, compact=False):
+        """
+        Primary Author: John
+        Technique claimed: json.dump()
+
+        Makes sure every recorded entry is on disk. Entries are already journaled in the background as
+        they are added, so this only writes what is still queued and syncs the journal, unless a full
+        snapshot is requested or the journal has grown past self.compact_threshold entries.
+
+        Parameters:
+            compact (bool): If True, always rewrite 'user_data.json' with all entries and empty the journal.
+
+        Side Effects:
+            - Writes queued entries and syncs the journal, and may rewrite 'user_data.json'
+            - Saves the aggregates alongside the data
+        """
+        try:
+            with self.entries_lock:
+                self.writer.flush()
+                with self.writer.lock:
+                    if compact or self.storage.journal_length > self.compact_threshold:
+                        self.storage.compact(self.user_data)
+                    self.storage.save_aggregates(self.aggregates.to_dict())
+        except Exception as e:
+            print(f"Error saving user data: {e}")
+
+    def close(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Shuts down cleanly: saves every recorded entry, stops the storage writer thread and closes the storage.
+
+        Side Effects:
+            - Same as save_user_data(); joins the writer thread and closes storage files
+        """
+        self.save_user_data()
+        try:
+            with self.entries_lock:
+                self.writer.close()
+                with self.writer.lock:
+                    self.storage.close()
+        except Exception as e:
+            print(f"Error saving user data: {e}")
+
+    def load_user_data(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Loads existing user data from 'user_data.json' and the 'user_data.jsonl' journal, if present,
+        along with the saved aggregates. Entries journaled after the aggregates were last saved are
+        folded in; the aggregates are only rebuilt from scratch if they are missing or don't fit the data.
+        With a PartitionedStorage only the recent months are loaded, but the aggregates still cover
+        every month.
+
+        Entries are streamed from storage straight into the compact EntryStore, so the full parsed
+        history never has to fit in memory as dicts.
+
+        Side Effects:
+            - Updates self.user_data and self.aggregates, and sets self.loaded
+        """
+        with self.entries_lock:
+            self.writer.flush()
+            with self.writer.lock:
+                self.user_data = EntryStore(self.storage.load())
+                self.loaded = True
+                # Entries the storage left on disk (older partitions); they come before everything loaded.
+                skipped = getattr(self.storage, 'skipped_count', 0)
+
+                saved = self.storage.load_aggregates()
+                try:
+                    self.aggregates = MoodAggregates.from_dict(saved)
+                except (TypeError, KeyError):
+                    self.aggregates = None
+                if self.aggregates is None or not skipped <= self.aggregates.entry_count <= skipped + len(self.user_data):
+                    self.aggregates = MoodAggregates()
+                    self.aggregates.rebuild(self.storage.iter_entries() if skipped else self.user_data)
+                else:
+                    for index in range(self.aggregates.entry_count - skipped, len(self.user_data)):
+                        self.aggregates.add(self.user_data[index])
+
+    def export_columnar(self, path, start=None, end=None, fmt='auto'):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Exports entries to a columnar file (see EntryStore.to_arrow for the columns). Loaded entries
+        are converted straight from the in-memory columns; otherwise (or with per-user storage that
+        left older months on disk) the entries in range are streamed from storage first.
+
+        Parameters:
+            path (str): Output path; the suffix picks the format when fmt is 'auto'.
+            start (datetime.date): First day to include, or None.
+            end (datetime.date): Last day to include, or None.
+            fmt (str): 'parquet', 'feather' or 'auto'.
+
+        Returns:
+            (str, int): The path written (it differs if Parquet wasn't available) and the number of entries.
+
+        Raises:
+            ImportError: If pyarrow isn't installed.
+
+        Side Effects:
+            - May read from storage; writes the file.
+        """
+        fmt, path = columnar_format(path, fmt)
+        with self.entries_lock:
+            if self.loaded and not getattr(self.storage, 'skipped_count', 0):
+                table = self.user_data.to_arrow(start, end)
+            else:
+                table = EntryStore(self.iter_entries(start, end)).to_arrow()
+        write_columnar(table, path, fmt)
+        return path, table.num_rows
+
+    def import_columnar(self, path, start=None, end=None):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Adds the entries of a Parquet or Feather export to storage. Entries whose timestamp is already
+        stored are skipped. Newer entries are appended; if any are older than the newest stored entry,
+        the whole history is merged by timestamp and rewritten. The aggregates are rebuilt either way.
+
+        Parameters:
+            path (str)
+            start (datetime.date): First day to import, or None.
+            end (datetime.date): Last day to import, or None.
+
+        Returns:
+            int: Number of entries added.
+
+        Raises:
+            ImportError: If pyarrow isn't installed.
+            ValueError, OSError: If the file can't be read as an export.
+
+        Side Effects:
+            - Writes to storage, saves the aggregates and reloads self.user_data
+        """
+        imported = read_columnar(path, start, end)
+        with self.entries_lock:
+            self.writer.flush()
+            with self.writer.lock:
+                stored = list(self.storage.iter_entries())
+                seen = {entry['timestamp'] for entry in stored}
+                added = []
+                for entry in imported:
+                    if entry['timestamp'] not in seen:
+                        seen.add(entry['timestamp'])
+                        added.append(entry)
+                if not added:
+                    return 0
+                added.sort(key=lambda entry: entry['timestamp'])
+                newest = max((entry['timestamp'] for entry in stored), default='')
+                if added[0]['timestamp'] > newest:
+                    self.storage.append_many(added)
+                    self.storage.flush()
+                    stored.extend(added)
+                else:
+                    stored = sorted(stored + added, key=lambda entry: entry['timestamp'])
+                    getattr(self.storage, 'rewrite', self.storage.compact)(stored)
+                self.aggregates = MoodAggregates()
+                self.aggregates.rebuild(stored)
+                self.storage.save_aggregates(self.aggregates.to_dict())
+            self.load_user_data()
+        return len(added)
+
+    def iter_entries(self, start=None, end=None, mood=None):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Yields the entries recorded between two dates (inclusive) and/or with a given mood.
+        Uses the storage's own query when it has one (an index or per-month files), or when the data
+        hasn't been loaded, in which case the storage is scanned with the filters applied as it goes.
+        Otherwise filters self.user_data by comparing ISO timestamp strings, without parsing each one.
+
+        Parameters:
+            start (datetime.date): First day to include, or None.
+            end (datetime.date): Last day to include, or None.
+            mood (str): Only return entries with this mood, or None.
+
+        Yields:
+            dict: The matching entries, oldest first.
+
+        Side Effects:
+            - May read from storage.
+        """
+        start_ts = start.isoformat() if start is not None else None
+        end_ts = (end + datetime.timedelta(days=1)).isoformat() if end is not None else None
+
+        if not self.loaded or hasattr(self.storage, 'query_entries'):
+            yield from self.storage.iter_entries(start=start_ts, end=end_ts, mood=mood)
+            return
+        for entry in self.user_data:
+            if ((start_ts is None or entry['timestamp'] >= start_ts)
+                    and (end_ts is None or entry['timestamp'] < end_ts)
+                    and (mood is None or entry['mood'] == mood)):
+                yield entry
+
+    def query_entries(self, start=None, end=None, mood=None):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Parameters:
+            start (datetime.date): First day to include, or None.
+            end (datetime.date): Last day to include, or None.
+            mood (str): Only return entries with this mood, or None.
+
+        Returns:
+            list of dict: The entries iter_entries yields, oldest first.
+        """
+        return list(self.iter_entries(start=start, end=end, mood=mood))
+
+    def mood_timeline(self, start=None, end=None, interval='auto'):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Summarizes mood intensity per time interval and mood, working on the entry columns with pandas
+        instead of one dict per entry. The result has one row per interval and mood however many entries
+        there are, which keeps plotting time flat for long histories.
+
+        Parameters:
+            start (datetime.date): First day to include, or None for the earliest entry.
+            end (datetime.date): Last day to include, or None for the latest entry.
+            interval (str): 'day', 'week', 'month', or 'auto' to pick one from the date range covered
+                (days up to about four months, weeks up to two years, months beyond).
+
+        Returns:
+            pandas.DataFrame: Columns period (start of the interval), mood, mean, count and max,
+            sorted by period and mood. Empty if no entries fall in the range.
+
+        Side Effects:
+            - Reads from storage when the data isn't loaded or the range reaches back past the months
+              loaded into memory, and for any range when the storage can query it by index (SQLite).
+        """
+        mood_rows = getattr(self.storage, 'mood_rows', None)
+        if mood_rows is not None and (not self.loaded or start is not None or end is not None):
+            # Only the rows in range are read, through the timestamp index.
+            start_ts = start.isoformat() if start is not None else None
+            end_ts = (end + datetime.timedelta(days=1)).isoformat() if end is not None else None
+            frame = pd.DataFrame(mood_rows(start=start_ts, end=end_ts), columns=['date', 'mood', 'intensity'],
+                                 dtype=object)
+            frame['date'] = pd.to_datetime(frame['date'], format='%Y-%m-%d', errors='coerce')
+            frame['intensity'] = pd.to_numeric(frame['intensity'], errors='coerce')
+            frame = frame.dropna().astype({'mood': str, 'intensity': np.int64})
+            columns = None
+        else:
+            source = self.user_data
+            loaded_since = getattr(self.storage, 'loaded_since', None)
+            if not self.loaded or (loaded_since is not None and (start is None or start < loaded_since)):
+                source = EntryStore(self.iter_entries(start=start, end=end))
+            columns = source.mood_columns()
+            timestamps = np.frombuffer(columns['timestamp'], dtype=np.int64)
+            frame = pd.DataFrame({
+                'date': timestamps.astype('datetime64[us]').astype('datetime64[D]'),
+                'mood': pd.Categorical.from_codes(np.frombuffer(columns['mood'], dtype=np.uint16),
+                                                  categories=columns['mood_names'] or ['']),
+                'intensity': np.frombuffer(columns['intensity'], dtype=np.int8).astype(np.int64)
+            })
+        if columns and columns['irregular']:
+            # Placeholder rows are replaced by whatever can be read from the original entries.
+            irregular = pd.DataFrame([
+                {'date': str(entry.get('timestamp', ''))[:10], 'mood': entry.get('mood'),
+                 'intensity': entry.get('intensity')}
+                for entry in columns['irregular'].values()
+            ])
+            irregular['date'] = pd.to_datetime(irregular['date'], format='%Y-%m-%d', errors='coerce')
+            irregular['intensity'] = pd.to_numeric(irregular['intensity'], errors='coerce')
+            irregular = irregular.dropna()
+            frame = frame.drop(index=list(columns['irregular']))
+            frame = pd.concat([frame.astype({'mood': str}), irregular.astype({'mood': str})], ignore_index=True)
+
+        if start is not None:
+            frame = frame[frame['date'] >= pd.Timestamp(start)]
+        if end is not None:
+            frame = frame[frame['date'] <= pd.Timestamp(end)]
+        if frame.empty:
+            return pd.DataFrame(columns=['period', 'mood', 'mean', 'count', 'max'])
+
+        if interval == 'auto':
+            span = (frame['date'].max() - frame['date'].min()).days
+            interval = 'month' if span > 730 else 'week' if span > 120 else 'day'
+        period_codes = {'day': 'D', 'week': 'W', 'month': 'M'}
+        if interval not in period_codes:
+            raise ValueError(f"interval must be 'auto', 'day', 'week' or 'month', not {interval!r}")
+
+        period = frame['date'].dt.to_period(period_codes[interval]).dt.start_time.rename('period')
+        timeline = (frame.groupby([period, frame['mood'].astype(str)])['intensity']
+                    .agg(['mean', 'count', 'max'])
+                    .reset_index())
+        return timeline.sort_values(['period', 'mood'], ignore_index=True)
+
+    def _draw_mood_timeline(self, ax, timeline, title):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Draws a mood_timeline summary onto an axes: one point per interval and mood at the mean intensity,
+        sized by the number of entries, with a line up to the highest intensity. All points go out in
+        a single scatter call.
+
+        Parameters:
+            ax (matplotlib.axes.Axes): Where to draw.
+            timeline (pandas.DataFrame): Output of mood_timeline, not empty.
+            title (str): Axes title.
+
+        Side Effects:
+            - Draws on ax.
+        """
+        moods = list(dict.fromkeys(timeline['mood']))
+        cmap = matplotlib.colormaps['tab10']
+        palette = {mood: cmap(i % cmap.N) for i, mood in enumerate(moods)}
+        colors = [palette[mood] for mood in timeline['mood']]
+        dates = timeline['period'].to_numpy()
+        sizes = 30 + 170 * timeline['count'].to_numpy() / timeline['count'].max()
+
+        ax.vlines(dates, timeline['mean'], timeline['max'], colors=colors, alpha=0.4)
+        ax.scatter(dates, timeline['mean'], c=colors, s=sizes)
+        for mood in moods:
+            # Empty plots only to give each mood a legend entry.
+            ax.scatter([], [], color=palette[mood], label=mood, s=100)
+
+        # Matplotlib pads a single date by years on each side; keep the view close to the data.
+        first, last = dates.min(), dates.max()
+        pad = max((last - first) * 0.05, np.timedelta64(1, 'D'))
+        ax.set_xlim(first - pad, last + pad)
+        ax.set_xlabel("Date")
+        ax.set_ylabel("Intensity (1-5)")
+        ax.set_title(title)
+        ax.legend(title="Mood")
+
+    def visualize_user_mood_timeline(self):
+        """
+        Primary Author: Josh
+        Techniques claimed: visualizing data with pyplot 
+
+        Shows a scatter plot of mood intensity over the current week, with different colors for each mood.
+        Each point is a day's average intensity for one mood, sized by how many entries it covers,
+        with a line up to that day's highest intensity.
+        This method uses matplotlib only to generate a clear, color-coded scatter plot.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+
+        Side Effects:
+            - Displays a matplotlib figure window.
+        """
+        if not self.user_data:
+            print("No user data to visualize.")
+            return
+
+        today = datetime.date.today()
+        start_of_week = today - datetime.timedelta(days=today.weekday())
+        end_of_week = start_of_week + datetime.timedelta(days=6)
+
+        timeline = self.mood_timeline(start=start_of_week, end=end_of_week, interval='day')
+        if timeline.empty:
+            print("No data in the current week to visualize.")
+            return
+
+        fig, ax = plt.subplots(figsize=(10, 6))
+        self._draw_mood_timeline(ax, timeline, "Weekly Mood Intensity by Day and Emotion")
+        fig.autofmt_xdate()
+        plt.tight_layout()
+        plt.show()
+
+    def render_mood_timeline(self, output, start=None, end=None, interval='auto', fmt=None):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Draws the mood timeline without a display, on the Agg backend, and saves it as an image.
+        Doesn't import pyplot, so it works on servers and leaves any interactive backend alone.
+
+        Parameters:
+            output (str or file-like): Path to write, or a binary buffer.
+            start (datetime.date): First day to include, or None for the earliest entry.
+            end (datetime.date): Last day to include, or None for the latest entry.
+            interval (str): Passed to mood_timeline.
+            fmt (str): Image format such as 'png' or 'svg'. Defaults to the path's extension,
+                or 'png' for a buffer.
+
+        Returns:
+            bool: True if an image was written, False if there was nothing to draw.
+
+        Side Effects:
+            - Writes the image.
+            - Prints a message when no entries fall in the range.
+        """
+        timeline = self.mood_timeline(start=start, end=end, interval=interval)
+        if timeline.empty:
+            print("No user data in that range to visualize.")
+            return False
+        if fmt is None and not isinstance(output, (str, os.PathLike)):
+            fmt = 'png'
+
+        first, last = timeline['period'].min().date(), timeline['period'].max().date()
+        fig = mpl_figure.Figure(figsize=(10, 6))
+        mpl_agg.FigureCanvasAgg(fig)
+        ax = fig.add_subplot()
+        self._draw_mood_timeline(ax, timeline, f"Mood Intensity from {first} to {last}")
+        fig.autofmt_xdate()
+        fig.tight_layout()
+        fig.savefig(output, format=fmt)
+        return True
+
+    def display_mood_table(self, summary=False, start=None, end=None, mood=None):
+        """
+        Primary Author: Josh
+        No techniques claimed here.
+
+        Prints a table of recorded moods and their intensities using pandas.
+        Rows are streamed through iter_entries, so with filters (or before the data is loaded)
+        only the matching entries are read into the table.
+
+        Parameters:
+            summary (bool): If True, print one row per mood (entries and average intensity)
+                instead of one row per entry. Without filters this comes from the running aggregates.
+            start (datetime.date): First day to include, or None.
+            end (datetime.date): Last day to include, or None.
+            mood (str): Only include entries with this mood, or None.
+
+        Side Effects:
+            - Prints a table to console
+        """
+        filtered = start is not None or end is not None or mood is not None
+        if self.loaded and not self.user_data:
+            print("No user data available to display.")
+            return
+
+        if summary and self.loaded and not filtered:
+            data = [
+                (mood_name, count, round(self.aggregates.average_intensity(mood_name), 2))
+                for mood_name, count in self.aggregates.mood_counts.most_common()
+            ]
+            df = pd.DataFrame(data, columns=['Mood', 'Entries', 'Average Intensity'])
+        else:
+            data = [(entry['mood'], entry['intensity']) for entry in self.iter_entries(start, end, mood)]
+            if not data:
+                print("No user data available to display.")
+                return
+            df = pd.DataFrame(data, columns=['Mood', 'Intensity'])
+            if summary:
+                grouped = df.groupby('Mood')['Intensity']
+                df = pd.DataFrame({'Entries': grouped.size(), 'Average Intensity': grouped.mean().round(2)})
+                df = df.sort_values('Entries', ascending=False, kind='stable').reset_index()
+        print(df.to_string(index=False))
+
+    def display_stats(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Prints summary statistics straight from the running aggregates, without reading any entries.
+
+        Side Effects:
+            - Prints to console
+        """
+        if not self.aggregates.entry_count:
+            print("No user data available to summarize.")
+            return
+
+        print(f"\nEntries recorded: {self.aggregates.entry_count} over {len(self.aggregates.daily)} days")
+        print("\nMoods:")
+        for mood, count in self.aggregates.mood_counts.most_common():
+            print(f"  {mood}: {count} entries, average intensity {self.aggregates.average_intensity(mood):.2f}")
+        if self.aggregates.distortion_counts:
+            print("\nMost common distortions:")
+            for name, count in self.aggregates.distortion_counts.most_common(5):
+                print(f"  {name.replace('_', ' ').title()}: {count}")
+        print()
+
+    def prune_user_data(self, keep_months):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Deletes whole months of entries older than the retention period, for storages kept in
+        monthly partitions.
+
+        Parameters:
+            keep_months (int): Months to keep, counting the current one.
+
+        Returns:
+            int: Number of entries deleted.
+
+        Side Effects:
+            - Removes partition files, and updates self.user_data and self.aggregates
+            - Prints a message if the storage can't prune
+        """
+        prune = getattr(self.storage, 'prune', None)
+        if prune is None:
+            print("Error: pruning needs per-user storage (--user).")
+            return 0
+        cutoff = datetime.date.fromisoformat(_month_key(datetime.date.today(), keep_months - 1) + '-01')
+        with self.entries_lock:
+            self.writer.flush()
+            with self.writer.lock:
+                removed = prune(cutoff)
+                for entry in removed:
+                    self.aggregates.remove(entry)
+                if removed:
+                    cutoff_ts = cutoff.isoformat()
+                    self.user_data = EntryStore(entry for entry in self.user_data if entry['timestamp'] >= cutoff_ts)
+                self.storage.save_aggregates(self.aggregates.to_dict())
+        return len(removed)
+
+    def clear_user_data(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Clears all user data and removes any existing 'user_data.json' and journal, and closes all figure windows.
+
+        Side Effects:
+            - Empties self.user_data and self.aggregates
+            - Deletes user_data.json, user_data.jsonl and user_stats.json if present (with per-user
+              storage, only that user's directory)
+            - Closes matplotlib figures, if matplotlib has been loaded
+        """
+        with self.entries_lock:
+            # Queued entries are written before clearing, so none of them reappears afterwards.
+            self.writer.flush()
+            with self.writer.lock:
+                self.user_data = EntryStore()
+                self.aggregates.clear()
+                self.storage.clear()
+        if plt.is_loaded():
+            plt.close('all')
+        print("All user data has been cleared.")
+
+# Batch Analysis Workers
+
+_worker_analyzer = None
+
+
+def _init_analysis_worker(distortions_data):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Process pool initializer: builds and compiles one analyzer per worker process.
+
+    Parameters:
+        distortions_data (dict): Parsed contents of 'distortion_patterns.json'.
+
+    Side Effects:
+        - Sets the module-level _worker_analyzer in the worker process.
+    """
+    global _worker_analyzer
+    _worker_analyzer = CognitiveDistortionAnalyzer()
+    _worker_analyzer.build_distortions(distortions_data)
+
+
+def _analyze_chunk(texts):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Analyzes one chunk of texts inside a worker process.
+
+    Parameters:
+        texts (list of str)
+
+    Returns:
+        list: One analyze_text result per text.
+    """
+    return [_worker_analyzer.analyze_text(text) for text in texts]
+
+def _screen_in_worker(text, strict, intensity):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Runs screen_text inside a worker process.
+
+    Parameters:
+        text (str)
+        strict (bool)
+        intensity (int)
+
+    Returns:
+        dict: As returned by CognitiveDistortionAnalyzer.screen_text.
+    """
+    return _worker_analyzer.screen_text(text, strict=strict, intensity=intensity)
+
+# Analysis Service
+
+class _StdoutWriter:
+    """
+    Minimal stand-in for asyncio.StreamWriter over a blocking binary stream such as stdout.
+    write() only buffers; drain() writes and flushes in the event loop's executor, so a slow reader
+    holds up the sender awaiting drain() rather than the whole event loop.
+    Primary Author: Team collectively
+    No techniques claimed here.
+    """
+
+    def __init__(self, stream):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Parameters:
+            stream: A binary file object.
+        """
+        self.stream = stream
+        self._pending = []
+
+    def write(self, data):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+        """
+        self._pending.append(data)
+
+    def _write_pending(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Writes and flushes everything buffered so far, blocking until done.
+        """
+        data = b''.join(self._pending)
+        self._pending.clear()
+        if data:
+            self.stream.write(data)
+        self.stream.flush()
+
+    async def drain(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+        """
+        await asyncio.get_running_loop().run_in_executor(None, self._write_pending)
+
+    def close(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+        """
+        self._write_pending()
+
+
+class AnalysisService:
+    """
+    Long-running analysis server: keeps one warmed-up analyzer and answers newline-delimited JSON
+    requests over stdio, a TCP port or a Unix socket.
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Each request is one JSON object per line, e.g. {"id": 1, "op": "analyze", "text": "..."}, and gets
+    one response line {"id": 1, "ok": true, "result": ...} (or "ok": false with an "error"). Responses
+    can arrive out of order; the id ties them to requests. Supported ops: ping, analyze, screen,
+    add_entry, stats and metrics. Matching runs on an executor so the event loop keeps accepting requests.
+    """
+
+    def __init__(self, analyzer, max_inflight=64, max_line_bytes=65536, threads=None, processes=0):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Parameters:
+            analyzer (CognitiveDistortionAnalyzer): Loaded analyzer shared by all connections.
+            max_inflight (int): Requests processed at once across all connections. When every slot is
+                busy the server stops reading, so clients are slowed down instead of queueing without bound.
+            max_line_bytes (int): Longest accepted request line.
+            threads (int): Thread pool size for matching (default: the executor's own default).
+            processes (int): If > 0, match in this many worker processes instead of threads.
+
+        Side Effects:
+            - Assigns instance attributes. Executors are created on first use.
+        """
+        self.analyzer = analyzer
+        self.max_inflight = max_inflight
+        self.max_line_bytes = max_line_bytes
+        self.threads = threads
+        self.processes = processes
+        self.requests_served = 0
+        self._executor = None
+        self._executor_version = None
+        self._slots = None
+
+    def _get_executor(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Returns the executor for matching work, replacing the process pool when the patterns were reloaded
+        (worker processes hold their own compiled copy).
+
+        Returns:
+            concurrent.futures.Executor
+        """
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+        if self.processes:
+            version = self.analyzer.registry.current.version
+            if self._executor is None or version != self._executor_version:
+                old = self._executor
+                self._executor = ProcessPoolExecutor(max_workers=self.processes, initializer=_init_analysis_worker,
+                                                     initargs=(self.analyzer.distortions_data,))
+                self._executor_version = version
+                if old is not None:
+                    old.shutdown(wait=False)
+        elif self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='analysis')
+        return self._executor
+
+    async def _offload(self, func, *args):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Runs func(*args) on the executor without blocking the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), func, *args)
+
+    async def handle_request(self, request):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Executes one decoded request.
+
+        Parameters:
+            request (dict)
+
+        Returns:
+            The JSON-serializable result for the op.
+
+        Raises:
+            ValueError: For unknown ops or missing/invalid fields.
+
+        Side Effects:
+            - 'add_entry' records and persists an entry.
+        """
+        op = request.get('op')
+        if op == 'ping':
+            return 'pong'
+        if op in ('analyze', 'screen'):
+            text = request.get('text')
+            if not isinstance(text, str):
+                raise ValueError("'text' must be a string")
+            if op == 'analyze':
+                if self.processes:
+                    result = (await self._offload(_analyze_chunk, [text]))[0]
+                else:
+                    result = await self._offload(self.analyzer.analyze_text, text)
+                return [list(d) for d in result]
+            strict = bool(request.get('strict', True))
+            intensity = request.get('intensity', 1)
+            if self.processes:
+                return await self._offload(_screen_in_worker, text, strict, intensity)
+            return await self._offload(self.analyzer.screen_text, text, strict, intensity)
+        if op == 'add_entry':
+            mood, responses, intensity = request.get('mood'), request.get('responses'), request.get('intensity')
+            if not isinstance(mood, str) or not isinstance(responses, list) or not isinstance(intensity, int):
+                raise ValueError("'add_entry' needs 'mood' (str), 'responses' (list) and 'intensity' (int)")
+            # The analyzer serializes recording itself, and its writer batches the disk writes, so entries
+            # are matched in parallel like 'analyze' requests. Worker processes can't record entries,
+            # so in process mode a thread of the event loop's default executor is used.
+            loop = asyncio.get_running_loop()
+            executor = None if self.processes else self._get_executor()
+            distortions, _ = await loop.run_in_executor(executor, self.analyzer.add_user_entry,
+                                                        mood, responses, intensity)
+            return {'distortions': [list(d) for d in distortions]}
+        if op == 'metrics':
+            instrumentation = self.analyzer.instrumentation
+            if instrumentation is None:
+                raise ValueError("instrumentation is off; start the service with --metrics")
+            if request.get('format') == 'prometheus':
+                return instrumentation.to_prometheus()
+            return instrumentation.to_dict()
+        if op == 'stats':
+            with self.analyzer.entries_lock:
+                aggregates = self.analyzer.aggregates
+                return {
+                    'entry_count': aggregates.entry_count,
+                    'moods': {mood: {'count': count, 'average_intensity': aggregates.average_intensity(mood)}
+                              for mood, count in aggregates.mood_counts.items()},
+                    'distortions': dict(aggregates.distortion_counts),
+                    'pattern_version': self.analyzer.registry.current.version,
+                    'sentence_cache': self.analyzer.sentence_cache.stats()
+                }
+        raise ValueError(f"unknown op {op!r}")
+
+    async def _process_line(self, line, writer, write_lock):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Decodes, executes and answers one request line, then frees its in-flight slot.
+
+        Side Effects:
+            - Writes one response line, unless the client has gone away.
+        """
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+            request_id = request.get('id')
+            response = {'id': request_id, 'ok': True, 'result': await self.handle_request(request)}
+        except Exception as e:
+            response = {'id': request_id, 'ok': False, 'error': str(e)}
+        finally:
+            self._slots.release()
+        self.requests_served += 1
+        try:
+            await self._send(writer, write_lock, response)
+        except ConnectionError:
+            # The client disconnected; handle_connection notices when its next read ends.
+            pass
+
+    async def _send(self, writer, write_lock, response):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Writes one response line, waiting for slow clients to catch up.
+        """
+        async with write_lock:
+            writer.write((json.dumps(response, separators=(',', ':')) + '\n').encode('utf-8'))
+            await writer.drain()
+
+    async def handle_connection(self, reader, writer):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Reads request lines from one client until it disconnects. A line is only read once an
+        in-flight slot is free.
+
+        Parameters:
+            reader (asyncio.StreamReader)
+            writer (asyncio.StreamWriter)
+
+        Side Effects:
+            - Reads from and writes to the connection; closes it at the end.
+        """
+        write_lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while True:
+                await self._slots.acquire()
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    self._slots.release()
+                    await self._send(writer, write_lock, {'id': None, 'ok': False, 'error': 'request line too long'})
+                    break
+                if not line.strip():
+                    self._slots.release()
+                    if not line:
+                        break
+                    continue
+                task = asyncio.create_task(self._process_line(line, writer, write_lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def run(self, tcp=None, unix=None):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Serves until cancelled (or, on stdio, until input ends).
+
+        Parameters:
+            tcp ((str, int)): Host and port to listen on. Port 0 picks a free port.
+            unix (str): Unix socket path to listen on.
+            Serves stdin/stdout if neither is given.
+
+        Side Effects:
+            - Opens the listening socket and prints its address to stderr.
+        """
+        self._slots = asyncio.Semaphore(self.max_inflight)
+        if tcp is not None or unix is not None:
+            if tcp is not None:
+                server = await asyncio.start_server(self.handle_connection, tcp[0], tcp[1], limit=self.max_line_bytes)
+                host, port = server.sockets[0].getsockname()[:2]
+                print(f"Listening on {host}:{port}", file=sys.stderr, flush=True)
+            else:
+                server = await asyncio.start_unix_server(self.handle_connection, unix, limit=self.max_line_bytes)
+                print(f"Listening on {unix}", file=sys.stderr, flush=True)
+            async with server:
+                await server.serve_forever()
+            return
+
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader(limit=self.max_line_bytes)
+        try:
+            await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+        except ValueError:
+            # Regular files can't be watched by the event loop; feed them from a thread instead.
+            def feed():
+                for line in iter(sys.stdin.buffer.readline, b''):
+                    loop.call_soon_threadsafe(reader.feed_data, line)
+                loop.call_soon_threadsafe(reader.feed_eof)
+            threading.Thread(target=feed, name='stdin-reader', daemon=True).start()
+        await self.handle_connection(reader, _StdoutWriter(sys.__stdout__.buffer))
+
+    def close(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Shuts down the executor.
+
+        Side Effects:
+            - Waits for running matching work to finish.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+def serve(analyzer, args):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Runs the analysis service from parsed command-line options until interrupted.
+
+    Parameters:
+        analyzer (CognitiveDistortionAnalyzer): Loaded analyzer.
+        args (argparse.Namespace): Parsed 'serve' options.
+
+    Side Effects:
+        - Serves requests; saves user data and stops the storage writer on shutdown.
+    """
+    tcp = None
+    if args.tcp:
+        host, _, port = args.tcp.rpartition(':')
+        tcp = (host or '127.0.0.1', int(port))
+    service = AnalysisService(analyzer, max_inflight=args.max_inflight, max_line_bytes=args.max_line_bytes,
+                              threads=args.threads, processes=args.processes)
+    try:
+        asyncio.run(service.run(tcp=tcp, unix=args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+        analyzer.close()
+        print(f"Served {service.requests_served} requests.", file=sys.stderr)
+
+# User Input Handling Class
+
+class UserInputHandler:
+    """
+    Manages user interactions related to selecting moods and responding to guided questions.
+    Primary Author: Team collectively
+    No techniques claimed here.
+    """
+
+    def __init__(self, input_func=input, print_func=print):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Initializes with a predefined list of moods.
+
+        Parameters:
+            input_func (callable): Shows a prompt and returns the user's answer, like input().
+            print_func (callable): Shows a message, like print().
+
+        Side Effects:
+            - Sets self.moods, self.input and self.print
+        """
+        self.moods = ['happy', 'sad', 'anxious', 'angry', 'neutral', 'excited', 'frustrated', 'confused', 'content', 'overwhelmed']
+        self.input = input_func
+        self.print = print_func
+
+    def select_mood(self):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Lets the user pick a mood from a list or provide a custom one.
+
+        Side Effects:
+            - Prints instructions and reads user input.
+
+        Returns:
+            str: The chosen mood.
+        """
+        self.print("\nHow are you feeling today? You can select one of the following moods or enter your own:")
+        for idx, mood in enumerate(self.moods, 1):
+            self.print(f"{idx}. {mood.capitalize()}")
+        while True:
+            mood_choice = self.input("Enter the number, name, or your own mood: ").strip().lower()
+            if mood_choice.isdigit():
+                mood_index = int(mood_choice) - 1
+                if 0 <= mood_index < len(self.moods):
+                    return self.moods[mood_index]
+            elif mood_choice in self.moods:
+                return mood_choice
+            else:
+                confirm = self.input(f"You entered '{mood_choice}'. Is this correct? (yes/no): ").strip().lower()
+                if confirm == 'yes':
+                    return mood_choice
+            self.print("Invalid input. Please try again.")
+
+    def ask_controlled_question(self, prompt, options):
+        """
+        Primary Author: Team collectively
+        No techniques claimed here.
+
+        Presents a multiple-choice question and returns the user's choice.
+
+        Side Effects:
+            - Prints prompt and reads user input.
+        
+        Parameters:
+            prompt (str)
+            options (list of str)
+
+        Returns:
+            str: The chosen option.
+        """
+        self.print(prompt)
+        for i, opt in enumerate(options, 1):
+            self.print(f"{i}. {opt}")
+        while True:
+            choice = self.input("Select a number: ").strip()
+            if choice.isdigit():
+                idx = int(choice) - 1
+                if 0 <= idx < len(options):
+                    return options[idx]
+            self.print("Invalid choice. Please enter a valid number.")
+
+    def ask_scaled_question(self, prompt):
         """
         Primary Author: Team collectively
         No techniques claimed here.
@@ -485,21 +5633,370 @@ class UserInputHandler:
             int: The intensity rating.
         """
         while True:
-            scale = input(prompt + " (1-5): ").strip()
+            scale = self.input(prompt + " (1-5): ").strip()
             if scale.isdigit():
                 val = int(scale)
                 if 1 <= val <= 5:
                     return val
-            print("Please enter a number between 1 and 5.")
+            self.print("Please enter a number between 1 and 5.")
 
 # Main Program
 
-def main():
+def open_storage(args):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Picks the storage backend from command-line options.
+
+    Parameters:
+        args (argparse.Namespace): Parsed options.
+
+    Returns:
+        The storage to pass to CognitiveDistortionAnalyzer, or None for the default.
+
+    Side Effects:
+        - With --db, opens the database and imports an existing user_data.json on first use.
+    """
+    if args.user:
+        return PartitionedStorage(root=args.data_dir, user=args.user, recent_months=args.recent_months or None)
+    if not args.db:
+        return None
+    storage = SQLiteStorage(args.db)
+    imported = storage.import_from(JsonJournalStorage())
+    if imported:
+        print(f"Imported {imported} entries into '{args.db}'.")
+    return storage
+
+
+def apply_matching_options(analyzer, args):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Applies the pattern-safety options from the command line to an analyzer, before its patterns are loaded.
+
+    Parameters:
+        analyzer (CognitiveDistortionAnalyzer)
+        args (argparse.Namespace): Parsed options (strict_patterns, max_input_chars, match_budget_ms).
+
+    Side Effects:
+        - Sets analyzer.registry.strict, analyzer.max_input_chars and analyzer.match_guard.
+    """
+    analyzer.registry.strict = args.strict_patterns
+    analyzer.max_input_chars = args.max_input_chars or None
+    if args.match_budget_ms:
+        analyzer.match_guard = MatchGuard(args.match_budget_ms / 1000)
+
+
+def user_name(value):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Checks a --user value, so it can be used as a directory name.
+
+    Parameters:
+        value (str)
+
+    Returns:
+        str: The value unchanged.
+
+    Raises:
+        argparse.ArgumentTypeError: If the name has characters other than letters, digits, '_', '-'
+            and '.', or starts with '.'.
+    """
+    if not PartitionedStorage.USER_NAME.fullmatch(value):
+        raise argparse.ArgumentTypeError(f"invalid user name {value!r}")
+    return value
+
+
+# Stages of a session, in order, as timed by run_session.
+SESSION_STAGES = ('questions', 'preprocess', 'crisis_screen', 'unrealistic_filter', 'analysis', 'advice', 'record')
+
+
+def run_session(analyzer, ui, timings=None):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Runs one guided session: asks for the mood, the reason and the intensity, screens the answer
+    for crisis language and unrealistic expectations, analyzes it for distortions, gives advice and
+    records the entry. The screens and the analysis are the analyzer's session_pipeline, run over
+    one prepared copy of the answer. All interaction goes through ui, so sessions can be scripted.
+
+    Parameters:
+        analyzer (CognitiveDistortionAnalyzer): Loaded analyzer.
+        ui (UserInputHandler)
+        timings (dict): If given, the seconds spent in each of SESSION_STAGES are added to it.
+
+    Returns:
+        dict: What happened: mood, intensity, responses, crisis (bool), unrealistic_severity,
+        distortions (list of [name, pattern]), advice, saved (bool) and error (str or None). A session
+        stopped by the crisis screen ends there, so later fields keep their defaults.
+
+    Side Effects:
+        - Reads answers and shows messages through ui; records the entry through the analyzer.
+    """
+    if timings is None:
+        timings = {}
+    result = {'mood': None, 'intensity': None, 'responses': [], 'crisis': False, 'unrealistic_severity': 0,
+              'distortions': [], 'advice': None, 'saved': False, 'error': None}
+    clock = time.perf_counter()
+
+    def lap(stage):
+        nonlocal clock
+        now = time.perf_counter()
+        timings[stage] = timings.get(stage, 0.0) + now - clock
+        clock = now
+
+    mood = ui.select_mood()
+    responses = []
+    if mood == 'happy':
+        reason = ui.ask_controlled_question(
+            "Why are you feeling happy?",
+            ["Achieved a personal goal",
+             "Positive interaction with a friend/loved one",
+             "Enjoying a pleasant activity/environment",
+             "Received good news",
+             "Other"]
+        )
+        if reason == "Other":
+            reason = ui.input("Please specify (short answer): ")
+        responses.append(f"I am happy because: {reason}")
+    else:
+        reason = ui.input(f"What made you feel {mood} today? (Keep it brief): ")
+        responses.append(reason)
+
+    intensity = ui.ask_scaled_question(f"On a scale of 1-5, how intense is this {mood} feeling?")
+    result.update(mood=mood, intensity=intensity, responses=responses)
+    lap('questions')
+
+    combined_text = ' '.join(responses)
+    pattern_version = analyzer.registry.current.version
+    screens = {}
+    try:
+        analyzer.session_pipeline.run(combined_text, screens, timings)
+    except (MatchBudgetExceeded, MatchWorkerError) as e:
+        error = e
+    else:
+        error = None
+    clock = time.perf_counter()
+
+    result['crisis'] = screens.get('crisis_screen', False)
+    if result['crisis']:
+        ui.print("\nWe're sorry to hear that you're feeling this way.")
+        ui.print("Please consider reaching out to a mental health professional or trusted individual for support.\n")
+        return result
+
+    severity = screens.get('unrealistic_filter', 0)
+    result['unrealistic_severity'] = severity
+    if severity > 1:
+        ui.print("\nWe've noticed some absolute or unrealistic expectations in your response.")
+        ui.print("It might help to reflect on whether these beliefs are attainable or if they're setting unhelpful standards.\n")
+
+    if error is not None:
+        if isinstance(error, MatchBudgetExceeded):
+            ui.print(f"\nError: {error}. This entry was not saved; please check that pattern.\n")
+        else:
+            ui.print(f"\nError: {error}. This entry was not saved.\n")
+        result['error'] = str(error)
+        return result
+    distortions = screens['analysis']
+    result['distortions'] = [list(d) for d in distortions]
+
+    if distortions:
+        ui.print("\nBased on your responses, we noticed the following cognitive distortions:")
+        for d_name, pattern in distortions:
+            info = analyzer.distortions_data.get(d_name, {})
+            explanation = info.get('explanation', "No explanation available.")
+            ui.print(f"\n**{d_name.replace('_', ' ').title()}** detected in: \"{pattern}\"")
+            ui.print(f"Explanation: {explanation}")
+            extra_advice = DISTORTION_ADVICE.get(d_name, "")
+            if extra_advice:
+                ui.print(f"Try this: {extra_advice}")
+        ui.print("\nUnderstanding these patterns can help you process your thoughts more effectively.\n")
+
+    result['advice'] = MOOD_ADVICE.get(mood, "Take some time to reflect on your feelings and consider what might help improve your mood.")
+    ui.print(f"\nHere's some advice based on your current mood ({mood}):")
+    ui.print(result['advice'])
+    lap('advice')
+
+    analyzer.record_entry(mood, responses, intensity, distortions, pattern_version)
+    result['saved'] = True
+    lap('record')
+    return result
+
+
+def session_inputs(session, moods):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Turns one scripted session into the answers a user would type.
+
+    Parameters:
+        session (dict): Either {"inputs": [...]}, the exact answers in order, or
+            {"mood": str, "answer": str, "intensity": int}. For "happy", an answer matching one of
+            the listed reasons picks it, and any other answer is given as "Other".
+        moods (list of str): The moods offered by UserInputHandler.
+
+    Returns:
+        list of str
+
+    Raises:
+        ValueError: If the session has neither form.
+    """
+    if isinstance(session.get('inputs'), list):
+        return [str(answer) for answer in session['inputs']]
+    if not all(key in session for key in ('mood', 'answer', 'intensity')):
+        raise ValueError("a session needs 'inputs' or 'mood', 'answer' and 'intensity'")
+    mood, answer = str(session['mood']).strip().lower(), str(session['answer'])
+    inputs = [mood] if mood in moods else [mood, 'yes']
+    if mood == 'happy':
+        reasons = ["Achieved a personal goal", "Positive interaction with a friend/loved one",
+                   "Enjoying a pleasant activity/environment", "Received good news"]
+        inputs += [str(reasons.index(answer) + 1)] if answer in reasons else ['5', answer]
+    else:
+        inputs.append(answer)
+    inputs.append(str(session['intensity']))
+    return inputs
+
+
+def latency_summary(values):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Parameters:
+        values (list of float): Latencies in seconds.
+
+    Returns:
+        dict: Count, mean, p50, p95, p99 and max, in milliseconds.
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return {'count': 0}
+
+    def at(fraction):
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000
+
+    return {'count': len(ordered), 'mean': sum(ordered) / len(ordered) * 1000,
+            'p50': at(0.50), 'p95': at(0.95), 'p99': at(0.99), 'max': ordered[-1] * 1000}
+
+
+def run_batch(analyzer, sessions_path, results_path=None):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Replays scripted sessions from a JSON Lines file through the same path as interactive ones,
+    without a terminal. Writes one JSON result per session and, at the end, a summary with
+    sessions per second and per-stage latency. A session that fails is recorded with its error
+    and counted as failed; the rest of the batch still runs.
+
+    Parameters:
+        analyzer (CognitiveDistortionAnalyzer): Loaded analyzer.
+        sessions_path (str): JSON Lines file with one session per line (see session_inputs), or '-' for stdin.
+            An optional "id" is copied to the result.
+        results_path (str): Where to write the results, or None/'-' for stdout.
+
+    Returns:
+        dict: The summary: sessions, failed, seconds, sessions_per_second and stages (latency_summary
+        of each stage, plus 'session' for whole sessions and 'flush' for writing the entries to disk).
+
+    Side Effects:
+        - Records the sessions' entries; writes the results; prints the summary to stderr.
+    """
+    stage_times = {stage: [] for stage in SESSION_STAGES + ('session',)}
+    moods = UserInputHandler().moods
+    count = failed = 0
+    sessions = sys.stdin if sessions_path == '-' else open(sessions_path, 'r')
+    results = sys.stdout if results_path in (None, '-') else open(results_path, 'w')
+    started = time.perf_counter()
+    try:
+        for line_number, line in enumerate(sessions, 1):
+            if not line.strip():
+                continue
+            count += 1
+            timings = {}
+            session_start = time.perf_counter()
+            session = None
+            try:
+                session = json.loads(line)
+                if not isinstance(session, dict):
+                    raise ValueError("a session must be a JSON object")
+                answers = iter(session_inputs(session, moods))
+
+                def scripted_input(prompt):
+                    try:
+                        return next(answers)
+                    except StopIteration:
+                        raise ValueError(f"script ran out of answers at {prompt.strip()!r}") from None
+
+                result = run_session(analyzer, UserInputHandler(scripted_input, lambda *args, **kwargs: None), timings)
+            except (ValueError, TypeError) as e:
+                result = {'error': str(e), 'saved': False}
+            except Exception as e:
+                # One bad record must not cost the rest of the batch; report it and go on.
+                result = {'error': f"{type(e).__name__}: {e}", 'saved': False}
+                print(f"Error: session on line {line_number} failed: {result['error']}", file=sys.stderr)
+            if result['error']:
+                failed += 1
+            elapsed = time.perf_counter() - session_start
+            for stage, seconds in timings.items():
+                # Checks added to session_pipeline are timed under their own names.
+                stage_times.setdefault(stage, []).append(seconds)
+            stage_times['session'].append(elapsed)
+            record = {'id': session.get('id', line_number) if isinstance(session, dict) else line_number}
+            record.update(result)
+            record['latency_ms'] = {stage: round(seconds * 1000, 3) for stage, seconds in timings.items()}
+            results.write(json.dumps(record) + '\n')
+        flush_start = time.perf_counter()
+        analyzer.save_user_data()
+        flush_seconds = time.perf_counter() - flush_start
+    finally:
+        if sessions is not sys.stdin:
+            sessions.close()
+        if results is not sys.stdout:
+            results.close()
+        else:
+            results.flush()
+    seconds = time.perf_counter() - started
+
+    summary = {
+        'sessions': count,
+        'failed': failed,
+        'seconds': seconds,
+        'sessions_per_second': count / seconds if seconds else 0.0,
+        'stages': {stage: latency_summary(values) for stage, values in stage_times.items()}
+    }
+    summary['stages']['flush'] = latency_summary([flush_seconds])
+    print(f"Replayed {count} sessions ({failed} failed) in {seconds:.2f} s: "
+          f"{summary['sessions_per_second']:.0f} sessions/s", file=sys.stderr)
+    print(f"{'stage':<20}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}", file=sys.stderr)
+    for stage, stats in summary['stages'].items():
+        if stats['count']:
+            print(f"{stage:<20}" + ''.join(f"{stats[key]:10.3f}" for key in ('mean', 'p50', 'p95', 'p99', 'max')),
+                  file=sys.stderr)
+    return summary
+
+
+def main(argv=None, input_func=input, print_func=print):
     """
     Primary Author: Team collectively
     No techniques claimed here.
 
     Runs the user interface loop, allowing the user to record moods, analyze distortions, visualize data, and manage entries.
+    With --batch, replays scripted sessions instead. With the 'serve' command, runs the analysis service instead; with 'render', saves the mood timeline as an image;
+    with 'table', prints entries; with 'prune', deletes a user's old months; with 'rescore', scores
+    stored entries again with the current patterns; with 'export' and 'import', writes or reads
+    Parquet/Arrow files.
+
+    Parameters:
+        argv (list of str): Command-line arguments. Defaults to sys.argv[1:].
+        input_func (callable): Reads the interactive session's answers, like input().
+        print_func (callable): Shows the interactive session's messages, like print().
 
     Side Effects:
         - Prints to console.
@@ -508,94 +6005,221 @@ def main():
         - Displays plots.
         - Modifies user_data.
     """
+    parser = argparse.ArgumentParser(description="Cognitive Distortion Analyzer")
+    backend = parser.add_mutually_exclusive_group()
+    backend.add_argument('--db', metavar='PATH',
+                         help="store entries in a SQLite database instead of user_data.json "
+                              "(an existing user_data.json is imported on first use)")
+    backend.add_argument('--user', type=user_name, metavar='NAME',
+                         help="keep this user's entries in their own directory, one file per month")
+    parser.add_argument('--data-dir', default='user_data', metavar='DIR',
+                        help="directory holding the per-user directories (default: user_data)")
+    parser.add_argument('--recent-months', type=int, default=3, metavar='N',
+                        help="with --user, months of entries loaded at startup, counting the current one; "
+                             "0 loads everything (default: 3)")
+    parser.add_argument('--metrics', metavar='PATH',
+                        help="count and time every distortion pattern, and write the results to PATH on exit "
+                             "(Prometheus text if PATH ends in .prom, JSON otherwise)")
+    parser.add_argument('--strict-patterns', action='store_true',
+                        help="reject distortion patterns that may backtrack catastrophically instead of warning")
+    parser.add_argument('--max-input-chars', type=int, metavar='N',
+                        help="analyze only the first N characters of each text (default: no limit)")
+    parser.add_argument('--match-budget-ms', type=float, metavar='MS',
+                        help="stop analyzing a text after MS milliseconds and report the pattern that was running "
+                             "(matching then runs in a separate process)")
+    parser.add_argument('--batch', metavar='SESSIONS.jsonl',
+                        help="replay scripted sessions from a JSON Lines file ('-' for stdin) without prompting, "
+                             "writing one JSON result per session and a timing summary to stderr")
+    parser.add_argument('--results', metavar='PATH',
+                        help="with --batch, write the results to PATH instead of stdout")
+    subparsers = parser.add_subparsers(dest='command')
+    serve_parser = subparsers.add_parser('serve', help="run as a JSON-lines analysis service (stdio by default)")
+    serve_parser.add_argument('--tcp', metavar='[HOST:]PORT', help="listen on a TCP port (host defaults to 127.0.0.1)")
+    serve_parser.add_argument('--unix', metavar='PATH', help="listen on a Unix socket")
+    serve_parser.add_argument('--max-inflight', type=int, default=64, help="requests processed at once")
+    serve_parser.add_argument('--max-line-bytes', type=int, default=65536, help="longest accepted request line")
+    serve_parser.add_argument('--threads', type=int, help="matching threads")
+    serve_parser.add_argument('--processes', type=int, default=0, help="match in worker processes instead of threads")
+    render_parser = subparsers.add_parser('render', help="save the mood timeline as an image, without a display")
+    render_parser.add_argument('output', help="image path; the extension picks the format (.png, .svg, .pdf)")
+    render_parser.add_argument('--start', type=datetime.date.fromisoformat, metavar='YYYY-MM-DD',
+                               help="first day to include (default: earliest entry)")
+    render_parser.add_argument('--end', type=datetime.date.fromisoformat, metavar='YYYY-MM-DD',
+                               help="last day to include (default: latest entry)")
+    render_parser.add_argument('--interval', choices=['auto', 'day', 'week', 'month'], default='auto',
+                               help="time span summarized by each point (default: picked from the date range)")
+    table_parser = subparsers.add_parser('table', help="print entries (or a per-mood summary) without loading the whole history")
+    table_parser.add_argument('--start', type=datetime.date.fromisoformat, metavar='YYYY-MM-DD', help="first day to include")
+    table_parser.add_argument('--end', type=datetime.date.fromisoformat, metavar='YYYY-MM-DD', help="last day to include")
+    table_parser.add_argument('--mood', help="only entries with this mood")
+    table_parser.add_argument('--summary', action='store_true', help="one row per mood")
+    prune_parser = subparsers.add_parser('prune', help="delete a user's entries older than the retention period")
+    prune_parser.add_argument('--keep-months', type=int, required=True, metavar='N',
+                              help="months to keep, counting the current one")
+    rescore_parser = subparsers.add_parser('rescore', help="score stored entries again after the patterns changed")
+    rescore_parser.add_argument('--chunk-size', type=int, default=10000, metavar='N',
+                                help="entries scored per pass (default: 10000)")
+    rescore_parser.add_argument('--all', action='store_true',
+                                help="score every entry, not just those scored with other patterns")
+    export_parser = subparsers.add_parser('export', help="write entries to a Parquet or Arrow (Feather) file for analysis")
+    export_parser.add_argument('output', help="file path; .parquet, or .feather/.arrow for Arrow IPC")
+    export_parser.add_argument('--format', choices=['auto', 'parquet', 'feather'], default='auto',
+                               help="file format (default: from the file name, Parquet otherwise)")
+    export_parser.add_argument('--start', type=datetime.date.fromisoformat, metavar='YYYY-MM-DD', help="first day to include")
+    export_parser.add_argument('--end', type=datetime.date.fromisoformat, metavar='YYYY-MM-DD', help="last day to include")
+    import_parser = subparsers.add_parser('import', help="add the entries of a Parquet or Arrow export")
+    import_parser.add_argument('input', help="file written by 'export'")
+    import_parser.add_argument('--start', type=datetime.date.fromisoformat, metavar='YYYY-MM-DD', help="first day to import")
+    import_parser.add_argument('--end', type=datetime.date.fromisoformat, metavar='YYYY-MM-DD', help="last day to import")
+    args = parser.parse_args(argv)
 
-    print(f"Current Date/Time: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    analyzer = CognitiveDistortionAnalyzer()
-    analyzer.load_distortions_data()
-    analyzer.load_user_data()
-    ui = UserInputHandler()
+    if args.command == 'serve':
+        # stdout may be the protocol channel; keep every status message on stderr.
+        with contextlib.redirect_stdout(sys.stderr):
+            analyzer = CognitiveDistortionAnalyzer(open_storage(args))
+            apply_matching_options(analyzer, args)
+            analyzer.load_distortions_data()
+            if args.metrics:
+                analyzer.instrumentation = Instrumentation()
+                analyzer.instrumentation.track(analyzer.distortions)
+            analyzer.registry.start_watching()
+            analyzer.load_user_data()
+            serve(analyzer, args)
+            if args.metrics:
+                analyzer.instrumentation.save(args.metrics)
+        return
 
-    print("Welcome to the Cognitive Distortion Analyzer!")
-    print("Type 'help' for instructions or 'exit' to quit.\n")
+    if args.command == 'table':
+        analyzer = CognitiveDistortionAnalyzer(open_storage(args))
+        analyzer.display_mood_table(summary=args.summary, start=args.start, end=args.end, mood=args.mood)
+        return
 
-    while True:
-        cmd = input("Enter a command: ").strip().lower()
-        if cmd == 'help':
-            print("\nInstructions:")
-            print("1. Type 'start' to begin a new session.")
-            print("2. Type 'visualize timeline' to see your mood intensity over the current week.")
-            print("3. Type 'table' to see a table of your moods and their intensities.")
-            print("4. Type 'export' to save your data.")
-            print("5. Type 'clear' to delete all your data.")
-            print("6. Type 'exit' to quit.\n")
-        elif cmd == 'exit':
-            analyzer.save_user_data()
-            print("Goodbye!")
-            break
-        elif cmd == 'start':
-            mood = ui.select_mood()
-            responses = []
-            if mood == 'happy':
-                reason = ui.ask_controlled_question(
-                    "Why are you feeling happy?",
-                    ["Achieved a personal goal",
-                     "Positive interaction with a friend/loved one",
-                     "Enjoying a pleasant activity/environment",
-                     "Received good news",
-                     "Other"]
-                )
-                if reason == "Other":
-                    reason = input("Please specify (short answer): ")
-                responses.append(f"I am happy because: {reason}")
+    if args.command == 'prune':
+        if not args.user:
+            parser.error("prune needs --user")
+        if args.keep_months < 1:
+            parser.error("--keep-months must be at least 1")
+        analyzer = CognitiveDistortionAnalyzer(open_storage(args))
+        analyzer.load_user_data()
+        removed = analyzer.prune_user_data(args.keep_months)
+        print(f"Deleted {removed} entries older than {args.keep_months} months for user '{args.user}'.")
+        return
+
+    if args.command == 'rescore':
+        analyzer = CognitiveDistortionAnalyzer(open_storage(args))
+        apply_matching_options(analyzer, args)
+        analyzer.load_distortions_data()
+        if not analyzer.distortions:
+            print("Error: no distortion patterns loaded; entries were not re-scored.")
+            return
+        analyzer.load_user_data()
+        scored = analyzer.rescore_entries(chunk_size=args.chunk_size, force=args.all)
+        print(f"Re-scored {scored} of {len(analyzer.user_data)} entries "
+              f"with pattern set {analyzer.registry.current.version}.")
+        return
+
+    if args.command in ('export', 'import'):
+        analyzer = CognitiveDistortionAnalyzer(open_storage(args))
+        try:
+            if args.command == 'export':
+                # Read-only: loaded like 'table', only the entries in range are streamed from storage.
+                path, count = analyzer.export_columnar(args.output, start=args.start, end=args.end, fmt=args.format)
+                print(f"Exported {count} entries to '{path}'.")
             else:
-                reason = input(f"What made you feel {mood} today? (Keep it brief): ")
-                responses.append(reason)
+                analyzer.load_user_data()
+                added = analyzer.import_columnar(args.input, start=args.start, end=args.end)
+                print(f"Imported {added} new entries from '{args.input}'.")
+        except ImportError:
+            print("Error: Parquet and Arrow files need pyarrow (pip install pyarrow).")
+        except (OSError, ValueError) as e:
+            print(f"Error: '{args.input}' could not be imported: {e}" if args.command == 'import' else f"Error: {e}")
+        finally:
+            # Only an import loads (and so may save) the history; an export leaves storage untouched.
+            if analyzer.loaded:
+                analyzer.close()
+        return
+
+    if args.command == 'render':
+        # Read-only: entries in the range are streamed from storage instead of loading the history.
+        analyzer = CognitiveDistortionAnalyzer(open_storage(args))
+        if analyzer.render_mood_timeline(args.output, start=args.start, end=args.end, interval=args.interval):
+            print(f"Mood timeline saved to '{args.output}'.")
+        return
 
-            intensity = ui.ask_scaled_question(f"On a scale of 1-5, how intense is this {mood} feeling?")
+    if args.batch:
+        analyzer = CognitiveDistortionAnalyzer(open_storage(args))
+        apply_matching_options(analyzer, args)
+        # stdout may carry the results; keep every status message on stderr.
+        with contextlib.redirect_stdout(sys.stderr):
+            analyzer.load_distortions_data()
+            if args.metrics:
+                analyzer.instrumentation = Instrumentation()
+                analyzer.instrumentation.track(analyzer.distortions)
+            analyzer.load_user_data()
+        try:
+            run_batch(analyzer, args.batch, args.results)
+        finally:
+            with contextlib.redirect_stdout(sys.stderr):
+                analyzer.close()
+                if args.metrics:
+                    analyzer.instrumentation.save(args.metrics)
+        return
 
-            combined_text = ' '.join(responses)
+    print_func(f"Current Date/Time: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    analyzer = CognitiveDistortionAnalyzer(open_storage(args))
+    apply_matching_options(analyzer, args)
+    analyzer.load_distortions_data()
+    if args.metrics:
+        analyzer.instrumentation = Instrumentation()
+        analyzer.instrumentation.track(analyzer.distortions)
+    analyzer.registry.start_watching()
+    analyzer.load_user_data()
+    ui = UserInputHandler(input_func, print_func)
 
-            if analyzer.detect_suicidal_thoughts(combined_text, strict=True):
-                print("\nWe're sorry to hear that you're feeling this way.")
-                print("Please consider reaching out to a mental health professional or trusted individual for support.\n")
-                continue
+    print_func("Welcome to the Cognitive Distortion Analyzer!")
+    print_func("Type 'help' for instructions or 'exit' to quit.\n")
 
-            severity = analyzer.filter_unrealistic_statements(combined_text, intensity=2)
-            if severity > 1:
-                print("\nWe've noticed some absolute or unrealistic expectations in your response.")
-                print("It might help to reflect on whether these beliefs are attainable or if they're setting unhelpful standards.\n")
-
-            distortions, full_text = analyzer.add_user_entry(mood, responses, intensity)
-            if distortions:
-                print("\nBased on your responses, we noticed the following cognitive distortions:")
-                for d_name, pattern in distortions:
-                    info = analyzer.distortions_data.get(d_name, {})
-                    explanation = info.get('explanation', "No explanation available.")
-                    print(f"\n**{d_name.replace('_', ' ').title()}** detected in: \"{pattern}\"")
-                    print(f"Explanation: {explanation}")
-                    extra_advice = DISTORTION_ADVICE.get(d_name, "")
-                    if extra_advice:
-                        print(f"Try this: {extra_advice}")
-                print("\nUnderstanding these patterns can help you process your thoughts more effectively.\n")
-
-            print(f"\nHere's some advice based on your current mood ({mood}):")
-            print(MOOD_ADVICE.get(mood, "Take some time to reflect on your feelings and consider what might help improve your mood."))
-        elif cmd == 'visualize timeline':
-            analyzer.visualize_user_mood_timeline()
-        elif cmd == 'table':
-            analyzer.display_mood_table()
-        elif cmd == 'export':
-            analyzer.save_user_data()
-            print("Your data has been saved.\n")
-        elif cmd == 'clear':
-            confirm = input("Are you sure you want to clear all your data? This action cannot be undone. (yes/no): ").strip().lower()
-            if confirm == 'yes':
-                analyzer.clear_user_data()
+    # Entries are written in the background; closing the analyzer writes the rest, even on Ctrl+C or end of input.
+    try:
+        while True:
+            cmd = input_func("Enter a command: ").strip().lower()
+            if cmd == 'help':
+                print_func("\nInstructions:")
+                print_func("1. Type 'start' to begin a new session.")
+                print_func("2. Type 'visualize timeline' to see your mood intensity over the current week.")
+                print_func("3. Type 'table' to see a table of your moods and their intensities ('table summary' for one row per mood).")
+                print_func("4. Type 'stats' to see totals for your moods and distortions.")
+                print_func("5. Type 'export' to save your data.")
+                print_func("6. Type 'clear' to delete all your data.")
+                print_func("7. Type 'exit' to quit.\n")
+            elif cmd == 'exit':
+                if args.metrics:
+                    analyzer.instrumentation.save(args.metrics)
+                print_func("Goodbye!")
+                break
+            elif cmd == 'start':
+                run_session(analyzer, ui)
+            elif cmd == 'visualize timeline':
+                analyzer.visualize_user_mood_timeline()
+            elif cmd == 'table':
+                analyzer.display_mood_table()
+            elif cmd == 'table summary':
+                analyzer.display_mood_table(summary=True)
+            elif cmd == 'stats':
+                analyzer.display_stats()
+            elif cmd == 'export':
+                analyzer.save_user_data(compact=True)
+                print_func("Your data has been saved.\n")
+            elif cmd == 'clear':
+                confirm = input_func("Are you sure you want to clear all your data? This action cannot be undone. (yes/no): ").strip().lower()
+                if confirm == 'yes':
+                    analyzer.clear_user_data()
+                else:
+                    print_func("Data clearing cancelled.")
             else:
-                print("Data clearing cancelled.")
-        else:
-            print("Invalid command. Type 'help' for instructions.\n")
-
+                print_func("Invalid command. Type 'help' for instructions.\n")
+    finally:
+        analyzer.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,1212 @@
+import argparse
+import contextlib
+import datetime
+import gc
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+# Benchmarks for the Cognitive Distortion Analyzer.
+# Run from the repository root, e.g. `python benchmarks.py importtime`.
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Modules that must only be imported when a plot, table or columnar export is actually produced.
+HEAVY_MODULES = ('matplotlib', 'pandas', 'pyarrow')
+
+
+def measure_import_time(module='CollaborativeProgramming', runs=5):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Imports a module in fresh interpreters using `python -X importtime` and reads back the cumulative time.
+
+    Parameters:
+        module (str): Name of the module to import.
+        runs (int): Number of fresh interpreters to start.
+
+    Returns:
+        (float, set of str): Median cumulative import time in milliseconds, and every module imported along the way.
+
+    Side Effects:
+        - Starts subprocesses.
+    """
+    timings = []
+    imported = set()
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+            cwd=REPO_DIR, capture_output=True, text=True, check=True
+        )
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _, cumulative, name = line[len('import time:'):].split('|')
+            name = name.strip()
+            imported.add(name)
+            if name == module:
+                timings.append(int(cumulative) / 1000)
+    return statistics.median(timings), imported
+
+
+def bench_importtime(args):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Fails if importing the analyzer takes longer than the budget or pulls in matplotlib or pandas.
+
+    Parameters:
+        args (argparse.Namespace): Parsed options (budget_ms, runs).
+
+    Returns:
+        int: Exit status, 0 if within budget.
+
+    Side Effects:
+        - Prints the measurement.
+    """
+    median_ms, imported = measure_import_time(runs=args.runs)
+    heavy = sorted(name for name in imported if name.split('.')[0] in HEAVY_MODULES)
+    print(f"Cold import of CollaborativeProgramming: {median_ms:.1f} ms (median of {args.runs}, budget {args.budget_ms} ms)")
+
+    status = 0
+    if median_ms > args.budget_ms:
+        print("FAIL: import time is over budget.")
+        status = 1
+    if heavy:
+        print(f"FAIL: heavy modules imported at startup: {', '.join(heavy)}")
+        status = 1
+    return status
+
+
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import CollaborativeProgramming
+imported = time.perf_counter()
+registry = CollaborativeProgramming.PatternRegistry(sys.argv[1], use_cache=sys.argv[2] == 'cached')
+registry.load()
+loaded = time.perf_counter()
+print(json.dumps({'import': imported - start, 'load': loaded - imported}))
+"""
+
+
+def bench_startup(args):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Compares cold starts in fresh interpreters that validate and lint every pattern with ones that
+    find the patterns file in the pattern check cache and only compile it.
+
+    Parameters:
+        args (argparse.Namespace): Parsed options (runs).
+
+    Returns:
+        int: Exit status, 1 if loading with the cache is not faster than without it.
+
+    Side Effects:
+        - Starts subprocesses; prints the measurements. The cache is written to a temporary directory.
+    """
+    with tempfile.TemporaryDirectory() as workdir:
+        patterns = shutil.copy(os.path.join(REPO_DIR, 'distortion_patterns.json'), workdir)
+        env = dict(os.environ, PYTHONPATH=REPO_DIR)
+
+        def run(mode):
+            start = time.perf_counter()
+            result = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT, patterns, mode],
+                                    cwd=workdir, env=env, capture_output=True, text=True, check=True)
+            timings = json.loads(result.stdout)
+            timings['process'] = time.perf_counter() - start
+            return timings
+
+        # The first cached run writes the cache; the timed ones read it.
+        run('cached')
+        results = {'rebuild': [], 'cached': []}
+        for _ in range(args.runs):
+            for mode, runs in results.items():
+                runs.append(run(mode))
+
+    medians = {mode: {key: statistics.median(r[key] for r in runs) * 1000 for key in runs[0]}
+               for mode, runs in results.items()}
+    print(f"Cold start, median of {args.runs} fresh interpreters:")
+    for mode, label in (('rebuild', 'validating every pattern'), ('cached', 'already checked (cache)')):
+        m = medians[mode]
+        print(f"  {label:<26} import {m['import']:6.1f} ms  pattern load {m['load']:6.1f} ms  "
+              f"whole process {m['process']:6.1f} ms")
+    print(f"Pattern load speedup: {medians['rebuild']['load'] / medians['cached']['load']:.2f}x")
+    if medians['cached']['load'] >= medians['rebuild']['load']:
+        print("FAIL: loading with the check cache is not faster than without it.")
+        return 1
+    return 0
+
+
+# Synthetic Journal Generator
+
+SUBJECTS = ["I", "My manager", "My friend", "My sister", "Everyone at work", "The teacher", "My partner", "We"]
+VERBS = ["went to", "talked about", "finished", "worried about", "forgot", "enjoyed", "cancelled", "started"]
+OBJECTS = ["the meeting", "my exam", "dinner plans", "the project", "a long walk", "the bills",
+           "a phone call", "the weekend trip", "my homework", "the presentation"]
+TAILS = ["today", "this morning", "after lunch", "again", "for the first time", "late at night", ""]
+CANNED_RESPONSES = [
+    "I am happy because: Achieved a personal goal",
+    "I am happy because: Positive interaction with a friend/loved one",
+    "I am happy because: Enjoying a pleasant activity/environment",
+    "I am happy because: Received good news"
+]
+
+
+def load_distortion_phrases():
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Reads the phrases from 'distortion_patterns.json' with their regex word-boundary markers removed.
+
+    Returns:
+        list of str
+    """
+    with open(os.path.join(REPO_DIR, 'distortion_patterns.json'), 'r') as f:
+        data = json.load(f)
+    return [p.replace('\\b', '') for v in data.values() for p in v['patterns']]
+
+
+def make_sentence(rng, phrases, distortion_rate):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Builds one plausible journal sentence, with a distortion phrase worked in at the given rate.
+
+    Parameters:
+        rng (random.Random)
+        phrases (list of str): Distortion phrases to draw from.
+        distortion_rate (float): Probability that the sentence contains a distortion phrase.
+
+    Returns:
+        str
+    """
+    words = [rng.choice(SUBJECTS), rng.choice(VERBS), rng.choice(OBJECTS)]
+    tail = rng.choice(TAILS)
+    if tail:
+        words.append(tail)
+    if rng.random() < distortion_rate:
+        words.insert(rng.randrange(1, len(words) + 1), rng.choice(phrases))
+    return ' '.join(words) + rng.choice('..!?')
+
+
+def make_texts(count, seed=0, distortion_rate=0.3, max_sentences=4):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Generates synthetic journal responses: mostly short free text, some canned happy-path answers.
+
+    Parameters:
+        count (int): Number of texts.
+        seed (int): Random seed.
+        distortion_rate (float): Probability that any one sentence contains a distortion phrase.
+        max_sentences (int): Upper bound on sentences per free-text response.
+
+    Yields:
+        str
+    """
+    rng = random.Random(seed)
+    phrases = load_distortion_phrases()
+    for _ in range(count):
+        if rng.random() < 0.2:
+            yield rng.choice(CANNED_RESPONSES)
+        else:
+            yield ' '.join(make_sentence(rng, phrases, distortion_rate) for _ in range(rng.randint(1, max_sentences)))
+
+
+def make_entries(count, seed=0, chunk=10000):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Generates synthetic user entries shaped like the ones in 'user_data.json'. Each chunk is passed
+    through json.dumps/json.loads so the objects look exactly like freshly loaded data.
+
+    Parameters:
+        count (int): Number of entries.
+        seed (int): Random seed.
+        chunk (int): Entries generated per JSON round trip.
+
+    Yields:
+        dict: One entry at a time, oldest first.
+    """
+    from CollaborativeProgramming import DISTORTION_ADVICE, MOOD_ADVICE
+
+    rng = random.Random(seed)
+    texts = make_texts(count, seed=seed)
+    moods = list(MOOD_ADVICE)
+    distortions = list(DISTORTION_ADVICE)
+    start = datetime.datetime(2020, 1, 1)
+    for offset in range(0, count, chunk):
+        batch = []
+        for i in range(offset, min(offset + chunk, count)):
+            mood = rng.choice(moods)
+            batch.append({
+                'timestamp': (start + datetime.timedelta(minutes=37 * i, microseconds=rng.randrange(10 ** 6))).isoformat(),
+                'mood': mood,
+                'responses': [next(texts)],
+                'distortions': rng.sample(distortions, rng.choice((0, 0, 0, 1, 2))),
+                'intensity': rng.randint(1, 5)
+            })
+        yield from json.loads(json.dumps(batch))
+
+
+def traced_size(build):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Measures the memory still allocated by an object after building it.
+
+    Parameters:
+        build (callable): Returns the object to measure.
+
+    Returns:
+        int: Bytes allocated while building and still held by the object.
+
+    Side Effects:
+        - Starts and stops tracemalloc.
+    """
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del obj
+    return size
+
+
+def bench_memory(args):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Compares the memory held by a plain list of entry dicts with an EntryStore holding the same entries.
+
+    Parameters:
+        args (argparse.Namespace): Parsed options (entries).
+
+    Returns:
+        int: Exit status.
+
+    Side Effects:
+        - Prints the measurement.
+    """
+    from CollaborativeProgramming import EntryStore
+
+    as_dicts = traced_size(lambda: list(make_entries(args.entries)))
+    as_store = traced_size(lambda: EntryStore(make_entries(args.entries)))
+    print(f"{args.entries} entries:")
+    print(f"  list of dicts: {as_dicts / 2 ** 20:8.1f} MiB ({as_dicts / args.entries:.0f} bytes/entry)")
+    print(f"  EntryStore:    {as_store / 2 ** 20:8.1f} MiB ({as_store / args.entries:.0f} bytes/entry)")
+    return 0
+
+
+# Columnar Export
+
+def bench_export(args):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Compares the JSON snapshot written by 'export' in the session with Parquet and Feather exports of
+    the same entries: time to write, size on disk, and time for an analyst to get the data back
+    (json.load for the snapshot, pyarrow for the columnar files, with the Feather file memory-mapped).
+
+    Parameters:
+        args (argparse.Namespace): Parsed options (entries).
+
+    Returns:
+        int: Exit status, 1 if pyarrow isn't installed.
+
+    Side Effects:
+        - Prints the measurements; writes to a temporary directory.
+    """
+    try:
+        import pyarrow
+        import pyarrow.feather
+        import pyarrow.parquet
+    except ImportError:
+        print("pyarrow is not installed; nothing to compare.")
+        return 1
+    from CollaborativeProgramming import CognitiveDistortionAnalyzer, JsonJournalStorage
+
+    with tempfile.TemporaryDirectory() as workdir:
+        storage = JsonJournalStorage(
+            snapshot_path=os.path.join(workdir, 'user_data.json'),
+            journal_path=os.path.join(workdir, 'user_data.jsonl'),
+            aggregates_path=os.path.join(workdir, 'user_stats.json')
+        )
+        storage.compact(make_entries(args.entries))
+        analyzer = CognitiveDistortionAnalyzer(storage)
+        analyzer.load_user_data()
+        snapshot = storage.snapshot_path
+        parquet_path = os.path.join(workdir, 'entries.parquet')
+        feather_path = os.path.join(workdir, 'entries.feather')
+
+        def read_snapshot():
+            with open(snapshot, 'r') as f:
+                return json.load(f)
+
+        rows = [
+            ('JSON snapshot', snapshot, lambda: storage.compact(analyzer.user_data), read_snapshot),
+            ('Parquet', parquet_path, lambda: analyzer.export_columnar(parquet_path),
+             lambda: pyarrow.parquet.read_table(parquet_path)),
+            ('Feather (mmap)', feather_path, lambda: analyzer.export_columnar(feather_path),
+             lambda: pyarrow.feather.read_table(feather_path, memory_map=True))
+        ]
+        print(f"{args.entries} entries:")
+        for label, path, write, read in rows:
+            write_seconds = time_call(write, 3)
+            read_seconds = time_call(read, 3)
+            print(f"  {label:<15} write {write_seconds * 1000:9.1f} ms  size {os.path.getsize(path) / 2 ** 20:8.2f} MiB  "
+                  f"read {read_seconds * 1000:9.1f} ms")
+    return 0
+
+
+# Hot Path Suite
+
+def time_call(func, repeat):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Parameters:
+        func (callable): Called with no arguments.
+        repeat (int): Number of timed runs.
+
+    Returns:
+        float: Fastest run, in seconds.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def suite_cases(size, workdir):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Builds the hot-path benchmarks for one corpus size.
+
+    Parameters:
+        size (int): Number of texts / entries.
+        workdir (str): Scratch directory for file I/O benchmarks.
+
+    Returns:
+        list of (str, callable): Benchmark name and a function running it over the whole corpus.
+
+    Side Effects:
+        - Writes files to workdir.
+    """
+    from CollaborativeProgramming import CognitiveDistortionAnalyzer, JsonJournalStorage
+
+    texts = list(make_texts(size))
+    storage = JsonJournalStorage(
+        snapshot_path=os.path.join(workdir, 'user_data.json'),
+        journal_path=os.path.join(workdir, 'user_data.jsonl'),
+        aggregates_path=os.path.join(workdir, 'user_stats.json')
+    )
+    analyzer = CognitiveDistortionAnalyzer(storage)
+    with open(os.path.join(REPO_DIR, 'distortion_patterns.json'), 'r') as f:
+        analyzer.build_distortions(json.load(f))
+    storage.compact(make_entries(size))
+    analyzer.load_user_data()
+
+    def match_all():
+        for text in texts:
+            for d in analyzer.distortions:
+                d.match(text)
+
+    def analyze_uncached():
+        maxsize = analyzer.sentence_cache.maxsize
+        analyzer.sentence_cache.maxsize = 0
+        try:
+            return [analyzer.analyze_text(t) for t in texts]
+        finally:
+            analyzer.sentence_cache.maxsize = maxsize
+
+    def table():
+        with contextlib.redirect_stdout(io.StringIO()):
+            analyzer.display_mood_table()
+
+    return [
+        ('analyze_text', lambda: [analyzer.analyze_text(t) for t in texts]),
+        ('analyze_text_uncached', analyze_uncached),
+        ('analyze_text_iter_first', lambda: [next(analyzer.analyze_text_iter(t, first_only=True), None) for t in texts]),
+        ('score_texts', lambda: analyzer.score_texts(texts)),
+        ('rescore_entries', lambda: analyzer.rescore_entries(force=True)),
+        ('Distortion.match', match_all),
+        ('detect_suicidal_thoughts', lambda: [analyzer.detect_suicidal_thoughts(t, strict=True) for t in texts]),
+        ('filter_unrealistic_statements', lambda: [analyzer.filter_unrealistic_statements(t, intensity=2) for t in texts]),
+        ('load_user_data', analyzer.load_user_data),
+        ('save_user_data', lambda: analyzer.save_user_data(compact=True)),
+        ('display_mood_table', table),
+        ('render_mood_timeline', lambda: analyzer.render_mood_timeline(io.BytesIO()))
+    ]
+
+
+def git_revision():
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Returns:
+        str: The current commit hash, or None outside a git checkout.
+    """
+    try:
+        result = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO_DIR, capture_output=True, text=True)
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+def bench_suite(args):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Times the analyzer hot paths over synthetic corpora of increasing size and writes the results as JSON.
+
+    Parameters:
+        args (argparse.Namespace): Parsed options (sizes, repeat, only, output).
+
+    Returns:
+        int: Exit status.
+
+    Side Effects:
+        - Prints progress, writes the JSON report.
+    """
+    sizes = [int(size) for size in args.sizes.split(',')]
+    results = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as workdir:
+            for name, func in suite_cases(size, workdir):
+                if args.only and name not in args.only:
+                    continue
+                # Large corpora are slow enough that one run is a stable measurement.
+                repeat = args.repeat if size <= 10000 else 1
+                try:
+                    seconds = time_call(func, repeat)
+                except ImportError as e:
+                    print(f"{name:32} {size:>9}  skipped ({e})")
+                    results.append({'benchmark': name, 'size': size, 'skipped': str(e)})
+                    continue
+                print(f"{name:32} {size:>9}  {seconds:10.4f} s  {seconds / size * 1e6:10.2f} us/item")
+                results.append({'benchmark': name, 'size': size, 'seconds': seconds,
+                                'us_per_item': seconds / size * 1e6})
+
+    report = {
+        'meta': {
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'created': datetime.datetime.now().isoformat()
+        },
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+    return 0
+
+
+def bench_compare(args):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Compares two suite reports and fails if any benchmark got slower than the allowed ratio.
+
+    Parameters:
+        args (argparse.Namespace): Parsed options (baseline, current, threshold).
+
+    Returns:
+        int: Exit status, 1 if a regression was found.
+
+    Side Effects:
+        - Prints a comparison table.
+    """
+    def timings(path):
+        with open(path, 'r') as f:
+            return {(r['benchmark'], r['size']): r['seconds'] for r in json.load(f)['results'] if 'seconds' in r}
+
+    baseline, current = timings(args.baseline), timings(args.current)
+    status = 0
+    for key in sorted(baseline.keys() & current.keys()):
+        ratio = current[key] / baseline[key] if baseline[key] else float('inf')
+        flag = ''
+        if ratio > args.threshold:
+            flag = '  REGRESSION'
+            status = 1
+        print(f"{key[0]:32} {key[1]:>9}  {baseline[key]:10.4f} s -> {current[key]:10.4f} s  x{ratio:5.2f}{flag}")
+    return status
+
+
+# Regex Cost Guard
+
+# Patterns that backtrack exponentially, each with an input that makes it fail slowly.
+# 'x' doesn't end a sentence, so the whole run reaches the matcher as one sentence.
+ADVERSARIAL_PATTERNS = {
+    'nested_quantifier': (r'(a+)+$', lambda n: 'a' * n + 'x'),
+    'nested_word_groups': (r'(\w+\s?)+$', lambda n: 'ab' * (n // 2) + '#'),
+    'overlapping_alternation': (r'(?:a|a)+$', lambda n: 'a' * n + 'x')
+}
+
+
+def bench_redos(args):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Shows what the regex cost guard buys on adversarial inputs: the linter's verdict on each bad
+    pattern, how matching time grows with input length without a budget, and how it stays bounded
+    with one. Also measures the guard's overhead on the normal synthetic corpus.
+
+    Parameters:
+        args (argparse.Namespace): Parsed options (budget_ms, lengths, max_seconds, texts).
+
+    Returns:
+        int: Exit status, 1 if the guard let a call run well past its budget or blamed the wrong pattern.
+
+    Side Effects:
+        - Prints the measurements; starts worker processes.
+    """
+    from CollaborativeProgramming import CognitiveDistortionAnalyzer, MatchBudgetExceeded, MatchGuard, lint_pattern
+
+    with open(os.path.join(REPO_DIR, 'distortion_patterns.json'), 'r') as f:
+        shipped = json.load(f)
+    flagged = [p for v in shipped.values() for p in v['patterns'] if lint_pattern(p)]
+    print(f"Shipped patterns flagged by the linter: {len(flagged)}")
+
+    budget = args.budget_ms / 1000
+    lengths = [int(n) for n in args.lengths.split(',')]
+    status = 0
+    for name, (pattern, make_input) in ADVERSARIAL_PATTERNS.items():
+        print(f"\n{name}: {pattern!r}")
+        print(f"  lint: {'; '.join(lint_pattern(pattern)) or 'not flagged'}")
+        analyzer = CognitiveDistortionAnalyzer()
+        analyzer.build_distortions(dict(shipped, adversarial={'patterns': [pattern], 'explanation': ''}))
+        analyzer.sentence_cache.maxsize = 0
+        guard = MatchGuard(budget)
+        unguarded_done = False
+        for n in lengths:
+            text = make_input(n)
+            if unguarded_done:
+                unguarded = '   (skipped)'
+            else:
+                analyzer.match_guard = None
+                start = time.perf_counter()
+                analyzer.analyze_text(text)
+                seconds = time.perf_counter() - start
+                unguarded = f"{seconds * 1000:10.1f} ms"
+                # Each extra character roughly doubles the time; stop before it runs away.
+                unguarded_done = seconds > args.max_seconds
+
+            analyzer.match_guard = guard
+            start = time.perf_counter()
+            try:
+                analyzer.analyze_text(text)
+                outcome = 'finished'
+            except MatchBudgetExceeded as e:
+                outcome = f"stopped in {e.pattern!r}"
+                if e.pattern != pattern:
+                    status = 1
+            seconds = time.perf_counter() - start
+            if seconds > budget * 2 + 0.05:
+                status = 1
+            print(f"  length {n:>4}: unguarded {unguarded}  guarded {seconds * 1000:8.1f} ms  {outcome}")
+        guard.close()
+
+    texts = list(make_texts(args.texts))
+    analyzer = CognitiveDistortionAnalyzer()
+    analyzer.build_distortions(shipped)
+    analyzer.sentence_cache.maxsize = 0
+    plain = time_call(lambda: [analyzer.analyze_text(t) for t in texts], 3)
+    analyzer.match_guard = MatchGuard(budget)
+    analyzer.analyze_text(texts[0])
+    guarded = time_call(lambda: [analyzer.analyze_text(t) for t in texts], 3)
+    analyzer.match_guard.close()
+    print(f"\nOverhead on {args.texts} normal texts (uncached): {plain / args.texts * 1e6:.1f} us/text without a "
+          f"budget, {guarded / args.texts * 1e6:.1f} us/text with one")
+    if status:
+        print("FAIL: the guard overran its budget or named the wrong pattern.")
+    return status
+
+
+# Session Replay
+
+def make_sessions(count, seed=0, max_sentences=4):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Generates scripted sessions for `CollaborativeProgramming.py --batch`, using the synthetic texts
+    as answers: canned happy-path answers become happy sessions, the rest get a random other mood.
+
+    Parameters:
+        count (int): Number of sessions.
+        seed (int): Random seed.
+        max_sentences (int): Upper bound on sentences per free-text answer.
+
+    Yields:
+        dict: {"id", "mood", "answer", "intensity"}.
+    """
+    rng = random.Random(seed)
+    moods = ['sad', 'anxious', 'angry', 'neutral', 'frustrated', 'overwhelmed']
+    prefix = 'I am happy because: '
+    for number, text in enumerate(make_texts(count, seed=seed, max_sentences=max_sentences)):
+        if text.startswith(prefix):
+            mood, answer = 'happy', text[len(prefix):]
+        else:
+            mood, answer = rng.choice(moods), text
+        yield {'id': number, 'mood': mood, 'answer': answer, 'intensity': rng.randint(1, 5)}
+
+
+# Runs run_batch in a fresh interpreter with the CollaborativeProgramming.py found in argv[1], so two
+# revisions of the module can be timed on the same sessions. Prints run_batch's summary as JSON.
+REPLAY_SCRIPT = """
+import json, os, sys
+sys.path.insert(0, sys.argv[1])
+from CollaborativeProgramming import CognitiveDistortionAnalyzer, PartitionedStorage, run_batch
+sessions_path, results_path, patterns_path, workdir = sys.argv[2:]
+analyzer = CognitiveDistortionAnalyzer(PartitionedStorage(os.path.join(workdir, 'user_data'), user='replay'))
+with open(patterns_path, 'r') as f:
+    analyzer.build_distortions(json.load(f))
+analyzer.load_user_data()
+try:
+    summary = run_batch(analyzer, sessions_path, results_path)
+finally:
+    analyzer.close()
+print(json.dumps(summary))
+"""
+
+
+def module_at_revision(revision, directory):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Parameters:
+        revision (str): A git revision of this repository.
+        directory (str): Where to write the module.
+
+    Returns:
+        str: directory, now holding CollaborativeProgramming.py as it was at revision.
+
+    Raises:
+        subprocess.CalledProcessError: If git can't show the file at that revision.
+    """
+    result = subprocess.run(['git', 'show', f'{revision}:CollaborativeProgramming.py'],
+                            cwd=REPO_DIR, capture_output=True, check=True)
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, 'CollaborativeProgramming.py'), 'wb') as f:
+        f.write(result.stdout)
+    return directory
+
+
+def replay_in_subprocess(module_dir, sessions_path, results_path, workdir):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Parameters:
+        module_dir (str): Directory holding the CollaborativeProgramming.py to replay the sessions with.
+        sessions_path (str), results_path (str): As for run_batch.
+        workdir (str): Empty directory for the recorded entries.
+
+    Returns:
+        dict: run_batch's summary.
+
+    Side Effects:
+        - Starts a subprocess, which writes results_path and the entries under workdir.
+    """
+    patterns_path = os.path.join(REPO_DIR, 'distortion_patterns.json')
+    result = subprocess.run([sys.executable, '-c', REPLAY_SCRIPT, module_dir, sessions_path, results_path,
+                             patterns_path, workdir], cwd=workdir, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def bench_sessions(args):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Replays generated sessions end to end (questions, screens, analysis, advice and recording to
+    per-user storage in a temporary directory) and reports sessions per second and per-stage latency.
+    With --baseline, the same sessions are also replayed with CollaborativeProgramming.py as of that
+    git revision. Both versions run --repeat times, alternating, each in a fresh interpreter, and the
+    best whole-session throughput of each is compared.
+
+    Parameters:
+        args (argparse.Namespace): Parsed options (sessions, max_sentences, baseline, repeat).
+
+    Returns:
+        int: Exit status, 1 if any session failed or the two versions gave different results.
+
+    Side Effects:
+        - Prints the measurements; writes to a temporary directory; with --baseline, starts subprocesses.
+    """
+    with tempfile.TemporaryDirectory() as workdir:
+        sessions_path = os.path.join(workdir, 'sessions.jsonl')
+        with open(sessions_path, 'w') as f:
+            for session in make_sessions(args.sessions, max_sentences=args.max_sentences):
+                f.write(json.dumps(session) + '\n')
+
+        if not args.baseline:
+            from CollaborativeProgramming import CognitiveDistortionAnalyzer, PartitionedStorage, run_batch
+
+            analyzer = CognitiveDistortionAnalyzer(PartitionedStorage(os.path.join(workdir, 'user_data'), user='replay'))
+            with open(os.path.join(REPO_DIR, 'distortion_patterns.json'), 'r') as f:
+                analyzer.build_distortions(json.load(f))
+            analyzer.load_user_data()
+            try:
+                summary = run_batch(analyzer, sessions_path, os.devnull)
+            finally:
+                analyzer.close()
+            return 1 if summary['failed'] else 0
+
+        try:
+            versions = {args.baseline: module_at_revision(args.baseline, os.path.join(workdir, 'baseline')),
+                        'working tree': REPO_DIR}
+        except subprocess.CalledProcessError as e:
+            print(f"Error: can't read CollaborativeProgramming.py at {args.baseline}: {e.stderr.decode().strip()}",
+                  file=sys.stderr)
+            return 1
+        best = {}
+        results = {}
+        for _ in range(args.repeat):
+            for number, (label, module_dir) in enumerate(versions.items()):
+                results_path = os.path.join(workdir, f'results-{number}.jsonl')
+                summary = replay_in_subprocess(module_dir, sessions_path, results_path, tempfile.mkdtemp(dir=workdir))
+                if label not in best or summary['sessions_per_second'] > best[label]['sessions_per_second']:
+                    best[label] = summary
+                # Everything but the per-session latencies must come out the same for both versions.
+                with open(results_path, 'r') as f:
+                    results[label] = [{k: v for k, v in json.loads(line).items() if k != 'latency_ms'} for line in f]
+
+    labels = list(versions)
+    stages = [stage for stage in dict.fromkeys(s for label in labels for s in best[label]['stages'])
+              if any(best[label]['stages'].get(stage, {}).get('count') for label in labels)]
+    print(f"{args.sessions} sessions, best of {args.repeat} runs each, median (p50) ms per stage:")
+    print(f"{'stage':<20}" + ''.join(f"{label[:14]:>16}" for label in labels))
+    for stage in stages:
+        cells = ''
+        for label in labels:
+            stats = best[label]['stages'].get(stage)
+            cells += f"{stats['p50']:16.4f}" if stats and stats['count'] else f"{'-':>16}"
+        print(f"{stage:<20}{cells}")
+    print(f"{'sessions/s':<20}" + ''.join(f"{best[label]['sessions_per_second']:16.0f}" for label in labels))
+    speedup = best[labels[1]]['sessions_per_second'] / best[labels[0]]['sessions_per_second']
+    print(f"Whole-session throughput, working tree vs {args.baseline}: {speedup:.2f}x")
+    status = 0
+    if any(best[label]['failed'] for label in labels):
+        print("FAIL: some sessions failed", file=sys.stderr)
+        status = 1
+    if results[labels[0]] != results[labels[1]]:
+        print("FAIL: the two versions gave different results", file=sys.stderr)
+        status = 1
+    return status
+
+
+# Concurrency Stress Test
+
+def open_stress_storage(kind, workdir):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Parameters:
+        kind (str): 'json', 'sqlite' or 'partitioned'.
+        workdir (str): Directory for the storage files.
+
+    Returns:
+        A storage backend from CollaborativeProgramming, opened on files in workdir.
+    """
+    from CollaborativeProgramming import JsonJournalStorage, PartitionedStorage, SQLiteStorage
+
+    if kind == 'sqlite':
+        return SQLiteStorage(os.path.join(workdir, 'user_data.db'))
+    if kind == 'partitioned':
+        return PartitionedStorage(os.path.join(workdir, 'user_data'), user='stress')
+    return JsonJournalStorage(
+        snapshot_path=os.path.join(workdir, 'user_data.json'),
+        journal_path=os.path.join(workdir, 'user_data.jsonl'),
+        aggregates_path=os.path.join(workdir, 'user_stats.json')
+    )
+
+
+def direct_writer(storage):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Parameters:
+        storage: A storage backend.
+
+    Returns:
+        StorageWriter: A writer that appends (and syncs) each entry as soon as it is submitted,
+        the way entries were recorded before the background writer.
+    """
+    from CollaborativeProgramming import StorageWriter
+
+    class DirectWriter(StorageWriter):
+        def submit(self, entry):
+            with self.lock:
+                self.storage.append(entry)
+                self.entries_written += 1
+                self.batches_written += 1
+
+    return DirectWriter(storage)
+
+
+def run_stress(kind, threads, per_thread, batched, texts, patterns):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Records entries from many threads into one shared analyzer while another thread keeps saving
+    and compacting, and times how long adding them takes. Whether every entry was stored exactly
+    once is checked by tests/test_storage_stress.py, not here.
+
+    Parameters:
+        kind (str): Storage backend, as for open_stress_storage.
+        threads (int): Threads adding entries.
+        per_thread (int): Entries added by each thread.
+        batched (bool): Use the analyzer's background writer; otherwise each entry is written and synced
+            by the thread that adds it.
+        texts (list of str): Response texts to cycle through.
+        patterns (dict): Distortion definitions.
+
+    Returns:
+        (float, int): Seconds spent adding entries, and batches written.
+
+    Raises:
+        RuntimeError: If adding an entry failed in any thread, since the timing would be meaningless.
+    """
+    from CollaborativeProgramming import CognitiveDistortionAnalyzer
+
+    with tempfile.TemporaryDirectory() as workdir:
+        analyzer = CognitiveDistortionAnalyzer(open_stress_storage(kind, workdir))
+        analyzer.build_distortions(patterns)
+        analyzer.load_user_data()
+        if not batched:
+            analyzer.writer = direct_writer(analyzer.storage)
+        moods = ['happy', 'sad', 'angry', 'anxious']
+        barrier = threading.Barrier(threads + 1)
+        done = threading.Event()
+        errors = []
+
+        def add(worker):
+            barrier.wait()
+            try:
+                for i in range(per_thread):
+                    text = texts[(worker * per_thread + i) % len(texts)]
+                    analyzer.add_user_entry(moods[i % len(moods)], [text], i % 5 + 1)
+            except Exception as e:
+                errors.append(e)
+
+        def save():
+            # Periodic saves contend with the writer for the storage, as they do in the service.
+            count = 0
+            while not done.wait(0.02):
+                analyzer.save_user_data(compact=count % 10 == 0)
+                count += 1
+
+        workers = [threading.Thread(target=add, args=(n,)) for n in range(threads)]
+        saver = threading.Thread(target=save)
+        for thread in workers:
+            thread.start()
+        saver.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for thread in workers:
+            thread.join()
+        seconds = time.perf_counter() - start
+        done.set()
+        saver.join()
+        analyzer.close()
+        if errors:
+            raise RuntimeError(f"adding entries to {kind} storage failed: {errors[0]!r}") from errors[0]
+    return seconds, analyzer.writer.batches_written
+
+
+def bench_stress(args):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Concurrent recording throughput: many threads share one analyzer, for each storage backend,
+    while saves and compactions run alongside. The same load is also run with every entry written
+    and synced on its own, like recording did before the background writer, to show what batching saves.
+
+    Parameters:
+        args (argparse.Namespace): Parsed options (threads, entries, storage).
+
+    Returns:
+        int: Exit status, always 0.
+
+    Side Effects:
+        - Prints the measurements; writes to temporary directories.
+    """
+    with open(os.path.join(REPO_DIR, 'distortion_patterns.json'), 'r') as f:
+        patterns = json.load(f)
+    texts = list(make_texts(1000))
+    total = args.threads * args.entries
+    print(f"{args.threads} threads x {args.entries} entries, with saves and compactions running alongside:")
+    for kind in args.storage.split(','):
+        for label, batched in (('batched', True), ('one sync per entry', False)):
+            seconds, batches = run_stress(kind, args.threads, args.entries, batched, texts, patterns)
+            print(f"  {kind:<12} {label:<19} {total / seconds:9.0f} entries/s  {batches:6} batches")
+    return 0
+
+
+# Service Load Test
+
+def percentile(values, fraction):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Parameters:
+        values (list of float): Sorted values.
+        fraction (float): Between 0 and 1.
+
+    Returns:
+        float: The nearest-rank percentile.
+    """
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+async def drive_service(open_connection, texts, op, concurrency):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Sends one request per text over `concurrency` connections, each waiting for its response before
+    sending the next request.
+
+    Parameters:
+        open_connection (callable): Coroutine function returning (reader, writer).
+        texts (list of str)
+        op (str): 'analyze' or 'screen'.
+        concurrency (int)
+
+    Returns:
+        (float, list of float, int): Wall time, sorted per-request latencies in seconds, and error count.
+    """
+    import asyncio
+
+    latencies = []
+    errors = 0
+
+    async def client(first):
+        nonlocal errors
+        reader, writer = await open_connection()
+        for i in range(first, len(texts), concurrency):
+            request = json.dumps({'id': i, 'op': op, 'text': texts[i]}) + '\n'
+            start = time.perf_counter()
+            writer.write(request.encode('utf-8'))
+            await writer.drain()
+            response = json.loads(await reader.readline())
+            latencies.append(time.perf_counter() - start)
+            if not response.get('ok'):
+                errors += 1
+        writer.close()
+        await writer.wait_closed()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(concurrency)))
+    return time.perf_counter() - start, sorted(latencies), errors
+
+
+@contextlib.contextmanager
+def spawned_service(extra_args):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Starts `CollaborativeProgramming.py serve` on a free localhost port in a scratch directory.
+
+    Parameters:
+        extra_args (list of str): Additional 'serve' options.
+
+    Yields:
+        (str, int): Host and port the service listens on.
+
+    Side Effects:
+        - Starts and terminates a subprocess.
+    """
+    with tempfile.TemporaryDirectory() as workdir:
+        shutil.copy(os.path.join(REPO_DIR, 'distortion_patterns.json'), workdir)
+        process = subprocess.Popen(
+            [sys.executable, os.path.join(REPO_DIR, 'CollaborativeProgramming.py'), 'serve',
+             '--tcp', '127.0.0.1:0'] + extra_args,
+            cwd=workdir, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+        )
+        try:
+            for line in process.stderr:
+                if line.startswith('Listening on '):
+                    host, _, port = line.split()[-1].rpartition(':')
+                    break
+            else:
+                raise RuntimeError("the service exited before it started listening")
+            yield host, int(port)
+        finally:
+            process.terminate()
+            process.wait()
+
+
+def bench_loadtest(args):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Measures requests per second and latency percentiles of the analysis service, either one that is
+    already running (--tcp / --unix) or one started just for the test.
+
+    Parameters:
+        args (argparse.Namespace): Parsed options (tcp, unix, requests, concurrency, op, serve_args).
+
+    Returns:
+        int: Exit status, 1 if any request failed.
+
+    Side Effects:
+        - Prints the results.
+    """
+    import asyncio
+
+    texts = list(make_texts(args.requests))
+
+    def run(open_connection):
+        return asyncio.run(drive_service(open_connection, texts, args.op, args.concurrency))
+
+    if args.unix:
+        elapsed, latencies, errors = run(lambda: asyncio.open_unix_connection(args.unix))
+    elif args.tcp:
+        host, _, port = args.tcp.rpartition(':')
+        elapsed, latencies, errors = run(lambda: asyncio.open_connection(host or '127.0.0.1', int(port)))
+    else:
+        with spawned_service(args.serve_args.split()) as (host, port):
+            elapsed, latencies, errors = run(lambda: asyncio.open_connection(host, port))
+
+    print(f"{len(latencies)} '{args.op}' requests over {args.concurrency} connections in {elapsed:.2f} s")
+    print(f"  throughput: {len(latencies) / elapsed:10.1f} requests/s")
+    print(f"  latency p50: {percentile(latencies, 0.50) * 1000:8.2f} ms")
+    print(f"  latency p99: {percentile(latencies, 0.99) * 1000:8.2f} ms")
+    print(f"  latency max: {latencies[-1] * 1000:8.2f} ms")
+    if errors:
+        print(f"FAIL: {errors} requests returned an error.")
+        return 1
+    return 0
+
+
+def main(argv=None):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Parses the command line and runs the selected benchmark.
+
+    Parameters:
+        argv (list of str): Command-line arguments. Defaults to sys.argv[1:].
+
+    Returns:
+        int: Exit status.
+    """
+    parser = argparse.ArgumentParser(description="Cognitive Distortion Analyzer benchmarks")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    importtime = subparsers.add_parser('importtime', help="check cold import time against a budget")
+    importtime.add_argument('--budget-ms', type=float, default=100.0)
+    importtime.add_argument('--runs', type=int, default=5)
+    importtime.set_defaults(func=bench_importtime)
+
+    startup = subparsers.add_parser('startup', help="compare cold pattern loading with and without the check cache")
+    startup.add_argument('--runs', type=int, default=9)
+    startup.set_defaults(func=bench_startup)
+
+    memory = subparsers.add_parser('memory', help="compare entry storage memory use")
+    memory.add_argument('--entries', type=int, default=1000000)
+    memory.set_defaults(func=bench_memory)
+
+    suite = subparsers.add_parser('suite', help="time the analyzer hot paths and write a JSON report")
+    suite.add_argument('--sizes', default='10,100,1000,10000,100000,1000000',
+                       help="comma-separated corpus sizes")
+    suite.add_argument('--repeat', type=int, default=3, help="runs per benchmark (best is kept) for sizes up to 10000")
+    suite.add_argument('--only', action='append', help="run only the named benchmark (repeatable)")
+    suite.add_argument('--output', default='bench_results.json')
+    suite.set_defaults(func=bench_suite)
+
+    compare = subparsers.add_parser('compare', help="compare two suite reports")
+    compare.add_argument('baseline')
+    compare.add_argument('current')
+    compare.add_argument('--threshold', type=float, default=1.10, help="allowed slowdown ratio")
+    compare.set_defaults(func=bench_compare)
+
+    redos = subparsers.add_parser('redos', help="time adversarial regex inputs with and without a match budget")
+    redos.add_argument('--budget-ms', type=float, default=100.0)
+    redos.add_argument('--lengths', default='16,20,22,24,26,28,64,1024', help="comma-separated input lengths")
+    redos.add_argument('--max-seconds', type=float, default=1.0,
+                       help="stop timing unguarded matches once one takes longer than this")
+    redos.add_argument('--texts', type=int, default=2000, help="normal texts used to measure the guard's overhead")
+    redos.set_defaults(func=bench_redos)
+
+    export = subparsers.add_parser('export', help="compare JSON, Parquet and Feather exports")
+    export.add_argument('--entries', type=int, default=100000)
+    export.set_defaults(func=bench_export)
+
+    sessions = subparsers.add_parser('sessions', help="replay generated sessions end to end and time each stage")
+    sessions.add_argument('--sessions', type=int, default=10000)
+    sessions.add_argument('--max-sentences', type=int, default=4, help="longest generated answer, in sentences")
+    sessions.add_argument('--baseline', metavar='REV',
+                          help="also replay the sessions with CollaborativeProgramming.py as of this git revision "
+                               "and compare throughput")
+    sessions.add_argument('--repeat', type=int, default=3, help="runs of each version with --baseline (best is kept)")
+    sessions.set_defaults(func=bench_sessions)
+
+    stress = subparsers.add_parser('stress', help="time adding entries from many threads at once")
+    stress.add_argument('--threads', type=int, default=16)
+    stress.add_argument('--entries', type=int, default=500, help="entries added by each thread")
+    stress.add_argument('--storage', default='json,sqlite,partitioned', help="comma-separated storage backends")
+    stress.set_defaults(func=bench_stress)
+
+    loadtest = subparsers.add_parser('loadtest', help="measure analysis service throughput and latency")
+    loadtest.add_argument('--tcp', metavar='[HOST:]PORT', help="connect to a running service")
+    loadtest.add_argument('--unix', metavar='PATH', help="connect to a running service on a Unix socket")
+    loadtest.add_argument('--requests', type=int, default=10000)
+    loadtest.add_argument('--concurrency', type=int, default=16)
+    loadtest.add_argument('--op', choices=('analyze', 'screen'), default='analyze')
+    loadtest.add_argument('--serve-args', default='', help="extra 'serve' options when the service is started for the test")
+    loadtest.set_defaults(func=bench_loadtest)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+import json
+import os
+import random
+import re
+import sys
+import unittest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from CollaborativeProgramming import CognitiveDistortionAnalyzer
+
+FILLER = ["I", "my", "manager", "went", "to", "the", "meeting", "today", "and", "we", "talked",
+          "about", "exam", "dinner", "Straße", "İstanbul", "café", "…", "again", "late"]
+
+EDGE_CASES = [
+    "",
+    "   ",
+    "...",
+    "?!.",
+    " . ! ? ",
+    "I ALWAYS FAIL. nEvEr AgAiN!",
+    "Everyone ALWAYS leaves",
+    "Straße is always closed. İ never win",
+    "I always never should must fail everything",
+    "I should always be perfect, everyone hates me and it will be a disaster!",
+    "no punctuation at all and always wrong",
+    "always." * 50,
+]
+
+
+def load_patterns():
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Returns:
+        dict: Parsed contents of 'distortion_patterns.json'.
+    """
+    with open(os.path.join(REPO_DIR, 'distortion_patterns.json'), 'r') as f:
+        return json.load(f)
+
+
+def baseline_analyze(data, text):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    The original analyze_text: split into sentences, then try every distortion's patterns one by one
+    with re.search and report the first one of each that matches.
+
+    Parameters:
+        data (dict): Parsed distortion patterns.
+        text (str)
+
+    Returns:
+        list of (str, str): Distortion name and matched pattern without word-boundary markers.
+    """
+    detected = []
+    for sentence in re.split(r'[.!?]', text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        for name, info in data.items():
+            for pattern in info['patterns']:
+                if re.search(pattern, sentence, re.IGNORECASE):
+                    detected.append((name, re.sub(r'\\b', '', pattern)))
+                    break
+    return detected
+
+
+def generated_texts(data, count, seed=0):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Builds texts of a few sentences mixing filler words with distortion phrases in random case.
+
+    Yields:
+        str
+    """
+    rng = random.Random(seed)
+    phrases = [p.replace('\\b', '') for info in data.values() for p in info['patterns']]
+    for _ in range(count):
+        sentences = []
+        for _ in range(rng.randint(1, 4)):
+            words = rng.sample(FILLER, rng.randint(1, 8))
+            for _ in range(rng.randint(0, 3)):
+                words.insert(rng.randrange(len(words) + 1), rng.choice(phrases))
+            sentence = ' '.join(words)
+            case = rng.random()
+            if case < 0.2:
+                sentence = sentence.upper()
+            elif case < 0.3:
+                sentence = sentence.title()
+            sentences.append(sentence + rng.choice(['.', '!', '?', '', ' ...']))
+        yield ' '.join(sentences)
+
+
+class AnalyzeParityTest(unittest.TestCase):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    analyze_text must give exactly what the original per-pattern loop gave.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.data = load_patterns()
+        cls.analyzer = CognitiveDistortionAnalyzer()
+        cls.analyzer.build_distortions(cls.data)
+        cls.analyzer.max_input_chars = None
+
+    def assert_parity(self, texts):
+        for text in texts:
+            expected = baseline_analyze(self.data, text)
+            self.assertEqual(self.analyzer.analyze_text(text), expected, msg=repr(text[:200]))
+
+    def test_edge_cases(self):
+        self.assert_parity(EDGE_CASES)
+
+    def test_generated_texts(self):
+        texts = list(generated_texts(self.data, 2000))
+        self.assert_parity(texts)
+        # A second pass is answered from the sentence cache and must not change anything.
+        self.assert_parity(texts)
+
+    def test_long_text_is_analyzed_in_full(self):
+        analyzer = CognitiveDistortionAnalyzer()
+        analyzer.build_distortions(self.data)
+        text = "We went to the meeting today. " * 1500 + "I should be perfect."
+        self.assertEqual(analyzer.analyze_text(text), baseline_analyze(self.data, text))
+        self.assertTrue(analyzer.analyze_text(text))
+
+    def test_overlapping_patterns(self):
+        # 'always' belongs to several distortions; each of them has to be reported.
+        names = [name for name, info in self.data.items()
+                 if any(p.replace('\\b', '').lower() == 'always' for p in info['patterns'])]
+        self.assertGreater(len(names), 1)
+        result = self.analyzer.analyze_text("I always fail")
+        self.assertEqual([name for name, _ in result if name in names], names)
+        self.assert_parity(["I always fail", "Always, ALWAYS, always"])
+
+    def test_patterns_that_cannot_be_joined(self):
+        # A backreference numbered within its own pattern, and an inline flag that must stay at the start.
+        data = {
+            'repetition': {'patterns': [r'(x)', r'(a)\1'], 'explanation': ''},
+            'inline_flag': {'patterns': [r'(?i)\bfoo\b'], 'explanation': ''},
+            'labeling': {'patterns': [r'\bloser\b'], 'explanation': ''}
+        }
+        analyzer = CognitiveDistortionAnalyzer()
+        analyzer.build_distortions(data)
+        texts = ["aa", "xaa", "ab", "FOO", "foobar", "loser aa. Foo!", "a a"]
+        for text in texts:
+            self.assertEqual(analyzer.analyze_text(text), baseline_analyze(data, text), msg=repr(text))
+        self.assertEqual(analyzer.analyze_text("aa"), [('repetition', r'(a)\1')])
+
+
+if __name__ == '__main__':
+    unittest.main()
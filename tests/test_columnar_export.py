@@ -0,0 +1,109 @@
+import os
+import sys
+import tempfile
+import unittest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from CollaborativeProgramming import CognitiveDistortionAnalyzer, JsonJournalStorage
+
+try:
+    import pyarrow
+    import pyarrow.feather
+except ImportError:
+    pyarrow = None
+
+ENTRIES = [
+    {'timestamp': '2024-11-30T23:59:59.999999', 'mood': 'anxious', 'responses': ['Everyone hates me', 'café ☃'],
+     'distortions': ['overgeneralization', 'mind_reading'], 'intensity': 5, 'pattern_version': 'abc123def456'},
+    {'timestamp': '2024-12-01T00:00:00', 'mood': 'happy', 'responses': [], 'distortions': [], 'intensity': 1},
+    {'timestamp': '2024-12-01T10:30:00.500000', 'mood': 'sad', 'responses': ['I always fail'],
+     'distortions': ['overgeneralization'], 'intensity': 3, 'pattern_version': 'abc123def456'},
+    {'timestamp': '2024-12-03T08:00:00', 'mood': 'sad', 'responses': ['line\nbreak', '"quoted"'],
+     'distortions': ['labeling', 'labeling'], 'intensity': -2, 'pattern_version': '0123456789ab'},
+]
+
+
+@unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+class ColumnarExportTest(unittest.TestCase):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Exporting entries and importing them again must give back exactly the same entries.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.analyzers = []
+
+    def tearDown(self):
+        for analyzer in self.analyzers:
+            analyzer.close()
+        self.tmp.cleanup()
+
+    def analyzer(self, name, entries=()):
+        storage = JsonJournalStorage(os.path.join(self.tmp.name, f'{name}.json'),
+                                     os.path.join(self.tmp.name, f'{name}.jsonl'),
+                                     aggregates_path=os.path.join(self.tmp.name, f'{name}_stats.json'))
+        storage.compact(list(entries))
+        analyzer = CognitiveDistortionAnalyzer(storage)
+        analyzer.load_user_data()
+        self.analyzers.append(analyzer)
+        return analyzer
+
+    def export(self, suffix):
+        path, count = self.analyzer('source', ENTRIES).export_columnar(os.path.join(self.tmp.name, f'entries{suffix}'))
+        self.assertEqual(count, len(ENTRIES))
+        return path
+
+    def test_column_types(self):
+        for suffix in ('.parquet', '.arrow'):
+            with self.subTest(suffix=suffix):
+                path = self.export(suffix)
+                if suffix == '.parquet':
+                    import pyarrow.parquet
+                    table = pyarrow.parquet.read_table(path)
+                else:
+                    table = pyarrow.feather.read_table(path)
+                schema = table.schema
+                self.assertEqual(schema.field('timestamp').type, pyarrow.timestamp('us'))
+                self.assertEqual(schema.field('intensity').type, pyarrow.int8())
+                self.assertEqual(schema.field('responses').type, pyarrow.list_(pyarrow.string()))
+                self.assertTrue(pyarrow.types.is_dictionary(schema.field('mood').type))
+                self.assertTrue(pyarrow.types.is_list(schema.field('distortions').type))
+                self.assertEqual(table.column('distortions').to_pylist(), [e['distortions'] for e in ENTRIES])
+                self.assertEqual(table.column('pattern_version').to_pylist(),
+                                 [e.get('pattern_version') for e in ENTRIES])
+
+    def test_round_trip_keeps_every_field(self):
+        for suffix in ('.parquet', '.arrow'):
+            with self.subTest(suffix=suffix):
+                path = self.export(suffix)
+                target = self.analyzer(f'target{suffix[1:]}')
+                self.assertEqual(target.import_columnar(path), len(ENTRIES))
+                self.assertEqual(list(target.user_data), ENTRIES)
+                self.assertEqual(list(target.storage.load()), ENTRIES)
+                self.assertEqual(target.aggregates.entry_count, len(ENTRIES))
+
+    def test_reimport_skips_entries_already_stored(self):
+        path = self.export('.parquet')
+        target = self.analyzer('target', [ENTRIES[2]])
+        self.assertEqual(target.import_columnar(path), len(ENTRIES) - 1)
+        # Older entries were merged in by timestamp, not appended after the newer one.
+        self.assertEqual(list(target.user_data), ENTRIES)
+        self.assertEqual(target.import_columnar(path), 0)
+        self.assertEqual(list(target.storage.load()), ENTRIES)
+        self.assertEqual(target.aggregates.entry_count, len(ENTRIES))
+
+    def test_date_range(self):
+        path = self.export('.arrow')
+        import datetime
+        target = self.analyzer('target')
+        self.assertEqual(target.import_columnar(path, start=datetime.date(2024, 12, 1), end=datetime.date(2024, 12, 1)), 2)
+        self.assertEqual(list(target.user_data), ENTRIES[1:3])
+
+
+if __name__ == '__main__':
+    unittest.main()
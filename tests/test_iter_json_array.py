@@ -0,0 +1,100 @@
+import json
+import os
+import random
+import sys
+import tempfile
+import unittest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from CollaborativeProgramming import iter_json_array
+
+CHUNK_SIZES = [1, 2, 3, 7, 16, 64, 1 << 16]
+
+
+def make_values(count, seed=0):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Returns:
+        list: JSON values of every kind, with escapes, nesting and long strings.
+    """
+    rng = random.Random(seed)
+    scalars = [0, -1, 12.5, 1e-7, -3.25e10, True, False, None, "", "plain",
+               'quote " and backslash \\ and slash /', "tab\tnewline\n", "café ☃ \U0001F600",
+               "\\u0041 is not an escape here", "x" * 300]
+    values = []
+    for i in range(count):
+        kind = rng.randrange(4)
+        if kind == 0:
+            values.append(rng.choice(scalars))
+        elif kind == 1:
+            values.append([rng.choice(scalars) for _ in range(rng.randrange(4))])
+        elif kind == 2:
+            values.append({'timestamp': f'2024-12-{i % 28 + 1:02d}T10:00:00', 'mood': rng.choice(scalars),
+                           'responses': [rng.choice(scalars)], 'nested': {'list': [[], {}, [1, [2, [3]]]]},
+                           'intensity': rng.randint(1, 5)})
+        else:
+            values.append(rng.randint(-10 ** 12, 10 ** 12))
+    return values
+
+
+class IterJsonArrayTest(unittest.TestCase):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    iter_json_array must yield exactly what json.load returns, whatever the chunk boundaries.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'user_data.json')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, text):
+        with open(self.path, 'w') as f:
+            f.write(text)
+
+    def assert_same_as_json_load(self, text):
+        self.write(text)
+        with open(self.path, 'r') as f:
+            expected = json.load(f)
+        for chunk_size in CHUNK_SIZES:
+            with self.subTest(chunk_size=chunk_size, text=text[:60]):
+                self.assertEqual(list(iter_json_array(self.path, chunk_size=chunk_size)), expected)
+
+    def test_matches_json_load(self):
+        values = make_values(200)
+        for text in (json.dumps(values), json.dumps(values, indent=4), json.dumps(values, ensure_ascii=False),
+                     json.dumps(values, separators=(',', ':'))):
+            self.assert_same_as_json_load(text)
+
+    def test_small_arrays(self):
+        for text in ('[]', ' [ ] ', '\n[\n]\n', '[1]', '[1.5e3 , -0.25]', '[[]]', '[{}]', '["]"]',
+                     '[",", "[", "\\"]"]', '[true,false,null]', '[123456789012345678901234567890]'):
+            self.assert_same_as_json_load(text)
+
+    def test_malformed_input_raises(self):
+        for text in ('', '{}', '1', '"text"', '[1 2]', '[1,]', '[,1]', '[1,,2]', '[tru]', '["a" "b"]',
+                     '[{"a": 1,}]', '[1] 2', '[1]]'):
+            self.write(text)
+            for chunk_size in CHUNK_SIZES:
+                with self.subTest(text=text, chunk_size=chunk_size), self.assertRaises(json.JSONDecodeError):
+                    list(iter_json_array(self.path, chunk_size=chunk_size))
+
+    def test_truncated_file_raises(self):
+        text = json.dumps(make_values(50, seed=1))
+        for cut in range(1, len(text), max(1, len(text) // 97)):
+            self.write(text[:cut])
+            for chunk_size in (3, 64, 1 << 16):
+                with self.subTest(cut=cut, chunk_size=chunk_size), self.assertRaises(json.JSONDecodeError):
+                    list(iter_json_array(self.path, chunk_size=chunk_size))
+
+
+if __name__ == '__main__':
+    unittest.main()
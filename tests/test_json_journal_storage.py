@@ -0,0 +1,131 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from CollaborativeProgramming import CognitiveDistortionAnalyzer, JsonJournalStorage
+
+
+def make_entry(day, mood='sad'):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Returns:
+        dict: A minimal entry on the given day of December 2024.
+    """
+    return {'timestamp': f'2024-12-{day:02d}T10:00:00', 'mood': mood, 'responses': [f'day {day} café'],
+            'distortions': ['labeling'], 'intensity': day % 5 + 1}
+
+
+class JsonJournalStorageTest(unittest.TestCase):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.snapshot_path = os.path.join(self.tmp.name, 'user_data.json')
+        self.journal_path = os.path.join(self.tmp.name, 'user_data.jsonl')
+        self.aggregates_path = os.path.join(self.tmp.name, 'user_stats.json')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def open(self):
+        return JsonJournalStorage(self.snapshot_path, self.journal_path, aggregates_path=self.aggregates_path)
+
+    def test_replay_after_a_torn_journal_line(self):
+        storage = self.open()
+        storage.compact([make_entry(1), make_entry(2)])
+        storage.append_many([make_entry(3), make_entry(4)])
+        storage.close()
+        # A crash in the middle of appending the next entry leaves half a line.
+        with open(self.journal_path, 'a') as f:
+            f.write(json.dumps(make_entry(5))[:25])
+
+        storage = self.open()
+        self.assertEqual(list(storage.load()), [make_entry(day) for day in (1, 2, 3, 4)])
+        self.assertEqual(storage.journal_length, 2)
+        # The next append must start on a new line instead of being glued to the torn one.
+        storage.append(make_entry(6))
+        storage.close()
+        self.assertEqual(list(self.open().load()), [make_entry(day) for day in (1, 2, 3, 4, 6)])
+
+    def test_compaction_folds_the_journal_into_the_snapshot(self):
+        storage = self.open()
+        entries = [make_entry(day) for day in range(1, 6)]
+        storage.append_many(entries)
+        storage.compact(entries)
+        self.assertFalse(os.path.exists(self.journal_path))
+        self.assertFalse(os.path.exists(self.snapshot_path + '.tmp'))
+        self.assertEqual(storage.journal_length, 0)
+        with open(self.snapshot_path, 'r') as f:
+            self.assertEqual(json.load(f), entries)
+
+        storage.append(make_entry(6))
+        storage.close()
+        reopened = self.open()
+        self.assertEqual(list(reopened.load()), entries + [make_entry(6)])
+        self.assertEqual(reopened.journal_length, 1)
+
+    def test_interrupted_compaction_does_not_duplicate_entries(self):
+        entries = [make_entry(day) for day in range(1, 4)]
+        storage = self.open()
+        storage.append_many(entries[1:])
+        storage.close()
+        # The new snapshot was renamed into place, but the journal wasn't deleted yet.
+        with open(self.snapshot_path, 'w') as f:
+            json.dump(entries, f, indent=4)
+        storage = self.open()
+        self.assertEqual(list(storage.load()), entries)
+        self.assertEqual(storage.journal_length, 0)
+
+    def test_filters_apply_to_snapshot_and_journal(self):
+        storage = self.open()
+        storage.compact([make_entry(1), make_entry(2, 'happy'), make_entry(3)])
+        storage.append_many([make_entry(4, 'happy'), make_entry(5)])
+        found = list(storage.iter_entries(start='2024-12-02', end='2024-12-05', mood='happy'))
+        self.assertEqual(found, [make_entry(2, 'happy'), make_entry(4, 'happy')])
+        storage.close()
+
+    def test_migrates_a_file_written_by_older_versions(self):
+        # Older versions kept everything in one indented JSON array and had no journal or aggregates.
+        old_entries = [make_entry(day, mood) for day, mood in ((1, 'sad'), (2, 'happy'), (3, 'anxious'))]
+        with open(self.snapshot_path, 'w') as f:
+            json.dump(old_entries, f, indent=4)
+        with open(self.snapshot_path, 'rb') as f:
+            original = f.read()
+
+        analyzer = CognitiveDistortionAnalyzer(self.open())
+        analyzer.load_user_data()
+        self.assertEqual(list(analyzer.user_data), old_entries)
+        self.assertEqual(analyzer.aggregates.entry_count, 3)
+        analyzer.add_user_entry('angry', ['I always fail'], 4)
+        analyzer.close()
+        # New entries go to the journal; the old file is left as it was until the next compaction.
+        with open(self.snapshot_path, 'rb') as f:
+            self.assertEqual(f.read(), original)
+        self.assertTrue(os.path.exists(self.journal_path))
+
+        analyzer = CognitiveDistortionAnalyzer(self.open())
+        analyzer.load_user_data()
+        self.assertEqual(len(analyzer.user_data), 4)
+        self.assertEqual(analyzer.aggregates.entry_count, 4)
+        analyzer.save_user_data(compact=True)
+        analyzer.close()
+        # After compaction the snapshot is still a plain JSON array that older versions can read.
+        with open(self.snapshot_path, 'r') as f:
+            migrated = json.load(f)
+        self.assertEqual(migrated[:3], old_entries)
+        self.assertEqual(migrated[3]['mood'], 'angry')
+        self.assertFalse(os.path.exists(self.journal_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
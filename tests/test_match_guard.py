@@ -0,0 +1,70 @@
+import os
+import sys
+import unittest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import CollaborativeProgramming
+from CollaborativeProgramming import MatchGuard, MatchWorkerError, PatternSet
+
+PATTERNS = {'overgeneralization': {'patterns': [r'\balways\b'], 'explanation': ''}}
+
+
+def _crashing_worker(conn, distortions_data, progress):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Stand-in for _match_guard_worker that exits, as if killed, when it is sent 'crash me'.
+    """
+    pattern_set = PatternSet(distortions_data)
+    conn.send('ready')
+    while True:
+        sentence = conn.recv()
+        if sentence == 'crash me':
+            os._exit(1)
+        conn.send(pattern_set.matcher.match_spans(sentence))
+
+
+class MatchGuardTest(unittest.TestCase):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+    """
+
+    def setUp(self):
+        self.pattern_set = PatternSet(PATTERNS)
+        self.guard = MatchGuard(5.0)
+
+    def tearDown(self):
+        self.guard.close()
+
+    def match(self, sentence):
+        deadline = self.guard.deadline(self.pattern_set)
+        return self.guard.match_spans(self.pattern_set, sentence, deadline)
+
+    def test_worker_killed_while_matching_is_replaced(self):
+        deadline = self.guard.deadline(self.pattern_set)
+        worker = self.guard._local.worker
+        worker['process'].kill()
+        worker['process'].join()
+        self.assertEqual(len(self.guard.match_spans(self.pattern_set, "I always fail", deadline)), 1)
+        self.assertEqual(self.guard.restarts, 1)
+        self.assertEqual(len(self.match("Never mind")), 0)
+
+    def test_worker_that_keeps_dying_raises(self):
+        original = CollaborativeProgramming._match_guard_worker
+        CollaborativeProgramming._match_guard_worker = _crashing_worker
+        try:
+            with self.assertRaises(MatchWorkerError):
+                self.match("crash me")
+            self.assertEqual(self.guard.restarts, 2)
+            # The dead workers were dropped, so later texts are matched by a new one.
+            self.assertEqual(len(self.match("I always fail")), 1)
+        finally:
+            CollaborativeProgramming._match_guard_worker = original
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+import datetime
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from CollaborativeProgramming import PartitionedStorage, _month_key
+
+
+def make_entry(timestamp, mood='sad'):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Returns:
+        dict: A minimal entry recorded at the given ISO timestamp.
+    """
+    return {'timestamp': timestamp, 'mood': mood, 'responses': ['text'], 'distortions': [], 'intensity': 3}
+
+
+def month_entries(month, count):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Returns:
+        list of dict: count entries on successive days of the 'YYYY-MM' month.
+    """
+    return [make_entry(f"{month}-{day:02d}T12:00:00") for day in range(1, count + 1)]
+
+
+class PartitionedStorageTest(unittest.TestCase):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, 'user_data')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def open(self, **options):
+        return PartitionedStorage(self.root, user='alex', **options)
+
+    def test_entries_are_routed_by_month(self):
+        storage = self.open()
+        last_of_january = make_entry('2024-01-31T23:59:59.999999')
+        first_of_february = make_entry('2024-02-01T00:00:00')
+        storage.append_many([make_entry('2023-12-31T23:59:59'), last_of_january, first_of_february])
+        storage.append(make_entry('2024-02-29T08:00:00', 'happy'))
+        storage.close()
+
+        self.assertEqual(storage.partitions(), ['2023-12', '2024-01', '2024-02'])
+        with open(storage.partition_path('2024-01'), 'r') as f:
+            self.assertEqual([json.loads(line) for line in f], [last_of_january])
+        self.assertEqual(list(storage.iter_entries(start='2024-01-31T12:00:00', end='2024-02-01T00:00:01')),
+                         [last_of_january, first_of_february])
+        self.assertEqual(list(storage.iter_entries(start='2024-02-01')),
+                         [first_of_february, make_entry('2024-02-29T08:00:00', 'happy')])
+        self.assertEqual(len(list(storage.load())), 4)
+
+    def test_range_queries_only_open_overlapping_months(self):
+        storage = self.open()
+        for month in ('2024-01', '2024-02', '2024-03'):
+            storage.append_many(month_entries(month, 2))
+        storage.close()
+        with mock.patch.object(storage, '_read_partition', wraps=storage._read_partition) as read:
+            found = list(storage.iter_entries(start='2024-02-01', end='2024-03-01'))
+        self.assertEqual(found, month_entries('2024-02', 2))
+        self.assertEqual([c.args[0] for c in read.call_args_list], ['2024-02'])
+
+    def recent_and_older(self):
+        today = datetime.date.today()
+        older = [_month_key(today, back) for back in (5, 4, 3)]
+        storage = self.open()
+        for count, month in enumerate(older + [_month_key(today)], 2):
+            storage.append_many(month_entries(month, count))
+        storage.save_aggregates({})
+        storage.close()
+        return older
+
+    def test_manifest_counts_older_months_without_reading_them(self):
+        older = self.recent_and_older()
+        storage = self.open(recent_months=1)
+        with mock.patch.object(storage, '_read_partition', wraps=storage._read_partition) as read:
+            self.assertEqual(len(list(storage.load())), 5)
+        self.assertEqual(storage.skipped_count, 2 + 3 + 4)
+        self.assertNotIn(older[0], [c.args[0] for c in read.call_args_list])
+
+    def test_missing_or_stale_manifest_is_rebuilt(self):
+        older = self.recent_and_older()
+        storage = self.open()
+        # A month grew behind the manifest's back (e.g. written by another process).
+        with open(storage.partition_path(older[1]), 'a') as f:
+            f.write(json.dumps(make_entry(f"{older[1]}-28T12:00:00")) + '\n')
+        storage = self.open(recent_months=1)
+        list(storage.load())
+        self.assertEqual(storage.skipped_count, 2 + 4 + 4)
+        storage.save_aggregates({})
+        with open(storage.manifest_path, 'r') as f:
+            self.assertEqual(json.load(f)[older[1]][1], 4)
+
+        for damage in (None, '{not json'):
+            with self.subTest(damage=damage):
+                if damage is None:
+                    os.remove(storage.manifest_path)
+                else:
+                    with open(storage.manifest_path, 'w') as f:
+                        f.write(damage)
+                rebuilt = self.open(recent_months=1)
+                list(rebuilt.load())
+                self.assertEqual(rebuilt.skipped_count, 10)
+                rebuilt.save_aggregates({})
+                with open(rebuilt.manifest_path, 'r') as f:
+                    self.assertEqual({month: count for month, (_, count) in json.load(f).items()
+                                      if month in older}, {older[0]: 2, older[1]: 4, older[2]: 4})
+
+    def test_prune_removes_exactly_the_expired_months(self):
+        storage = self.open()
+        for count, month in enumerate(('2023-11', '2023-12', '2024-01', '2024-02'), 1):
+            storage.append_many(month_entries(month, count))
+        storage.save_aggregates({})
+
+        removed = storage.prune(datetime.date(2024, 1, 15))
+        self.assertEqual(removed, month_entries('2023-11', 1) + month_entries('2023-12', 2))
+        self.assertEqual(storage.partitions(), ['2024-01', '2024-02'])
+        with open(storage.manifest_path, 'r') as f:
+            self.assertEqual(sorted(json.load(f)), ['2024-01', '2024-02'])
+        self.assertEqual(storage.prune(datetime.date(2024, 1, 1)), [])
+        self.assertEqual(list(storage.load()), month_entries('2024-01', 3) + month_entries('2024-02', 4))
+        storage.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import CollaborativeProgramming
+from CollaborativeProgramming import CognitiveDistortionAnalyzer, Instrumentation, PatternError, PatternRegistry
+
+PATTERNS = {
+    'overgeneralization': {'patterns': [r'\balways\b', r'(a+)+$'], 'explanation': 'Broad conclusions.'},
+    'labeling': {'patterns': [r'\bloser\b'], 'explanation': 'Negative labels.'}
+}
+
+
+class PatternCheckCacheTest(unittest.TestCase):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'distortion_patterns.json')
+        self.write(PATTERNS)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, data):
+        with open(self.path, 'w') as f:
+            json.dump(data, f)
+
+    def load(self, **options):
+        registry = PatternRegistry(self.path, **options)
+        registry.load()
+        return registry
+
+    def test_checked_file_is_not_linted_again(self):
+        first = self.load()
+        self.assertTrue(os.path.exists(first.check_cache.path))
+        with mock.patch.object(CollaborativeProgramming, 'lint_pattern', side_effect=AssertionError("linted")):
+            second = self.load()
+        self.assertEqual(second.current.warnings, first.current.warnings)
+        self.assertEqual(len(second.current.warnings), 1)
+        self.assertEqual(second.current.version, first.current.version)
+        self.assertEqual(second.current.matcher.match("I always lose"), [('overgeneralization', 'always')])
+
+    def test_changed_file_is_checked_again(self):
+        self.load()
+        self.write({'labeling': {'patterns': ['(unclosed'], 'explanation': ''}})
+        with self.assertRaises(PatternError):
+            self.load()
+
+    def test_damaged_cache_falls_back_to_a_full_check(self):
+        cache_path = self.load().check_cache.path
+        for damage in ('', '{"key": 1', json.dumps({'key': 'x', 'warnings': []})):
+            with self.subTest(damage=damage):
+                with open(cache_path, 'w') as f:
+                    f.write(damage)
+                self.assertEqual(len(self.load().current.warnings), 1)
+
+    def test_strict_rejects_cached_warnings(self):
+        self.load()
+        with self.assertRaises(PatternError):
+            self.load(strict=True)
+
+
+class HotReloadTest(unittest.TestCase):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'distortion_patterns.json')
+        self.write(PATTERNS)
+        self.analyzer = CognitiveDistortionAnalyzer(patterns_path=self.path)
+        self.analyzer.registry.check_cache = None
+        self.analyzer.load_distortions_data()
+        self.analyzer.instrumentation = Instrumentation()
+        self.analyzer.instrumentation.track(self.analyzer.distortions)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, data):
+        with open(self.path, 'w') as f:
+            f.write(data if isinstance(data, str) else json.dumps(data))
+        # Make sure the change is seen even where the clock is too coarse to move the mtime.
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    def refresh(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            changed = self.analyzer.registry.refresh()
+        return changed, output.getvalue()
+
+    def test_reload_installs_the_new_set(self):
+        reloaded = dict(PATTERNS, should_statements={'patterns': [r'\bshould\b'], 'explanation': 'Rigid rules.'})
+        self.write(reloaded)
+        changed, _ = self.refresh()
+        self.assertTrue(changed)
+        self.assertEqual(self.analyzer.analyze_text("I should go"), [('should_statements', 'should')])
+        self.assertEqual(self.analyzer.instrumentation.patterns[('should_statements', r'\bshould\b')][0], 1)
+        self.assertIn(('labeling', r'\bloser\b'), self.analyzer.instrumentation.patterns)
+
+    def test_new_patterns_are_tracked_before_they_are_tried(self):
+        self.write(dict(PATTERNS, should_statements={'patterns': [r'\bshould\b'], 'explanation': ''}))
+        self.refresh()
+        self.assertEqual(self.analyzer.instrumentation.patterns[('should_statements', r'\bshould\b')], [0, 0, 0.0])
+
+    def test_bad_file_keeps_the_previous_set(self):
+        version = self.analyzer.registry.current.version
+        for broken in ('{"labeling": ', {'labeling': {'patterns': ['(unclosed'], 'explanation': ''}}):
+            with self.subTest(broken=broken):
+                self.write(broken)
+                changed, output = self.refresh()
+                self.assertFalse(changed)
+                self.assertIn("keeping the previous distortion patterns", output)
+                self.assertEqual(self.analyzer.registry.current.version, version)
+                self.assertEqual(self.analyzer.analyze_text("What a loser"), [('labeling', 'loser')])
+                # Reported once, not on every check.
+                self.assertEqual(self.refresh(), (False, ''))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from CollaborativeProgramming import CognitiveDistortionAnalyzer, JsonJournalStorage, MoodAggregates
+from test_analyze_parity import EDGE_CASES, generated_texts, load_patterns
+
+try:
+    import pandas  # noqa: F401
+except ImportError:
+    pandas = None
+
+
+@unittest.skipIf(pandas is None, "pandas is not installed")
+class RescoreTest(unittest.TestCase):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    The pandas scoring path must agree with analyze_text, and rescoring twice must change nothing.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.data = load_patterns()
+        cls.texts = EDGE_CASES + list(generated_texts(cls.data, 500, seed=3))
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.analyzer = self.open()
+
+    def tearDown(self):
+        self.analyzer.close()
+        self.tmp.cleanup()
+
+    def open(self):
+        storage = JsonJournalStorage(os.path.join(self.tmp.name, 'user_data.json'),
+                                     os.path.join(self.tmp.name, 'user_data.jsonl'),
+                                     aggregates_path=os.path.join(self.tmp.name, 'user_stats.json'))
+        analyzer = CognitiveDistortionAnalyzer(storage)
+        analyzer.build_distortions(self.data)
+        return analyzer
+
+    def expected(self, text):
+        return [name for name, _ in self.analyzer.analyze_text(text)]
+
+    def test_score_texts_matches_analyze_text(self):
+        scored = self.analyzer.score_texts(self.texts)
+        self.assertEqual(len(scored), len(self.texts))
+        for text, names in zip(self.texts, scored):
+            self.assertEqual(names, self.expected(text), msg=repr(text[:200]))
+
+    def test_rescore_updates_entries_once(self):
+        entries = [{'timestamp': f'2024-12-{i % 28 + 1:02d}T{i % 24:02d}:00:00', 'mood': 'sad',
+                    'responses': [text], 'distortions': ['outdated'], 'intensity': i % 5 + 1}
+                   for i, text in enumerate(sorted(self.texts))]
+        self.analyzer.storage.compact(entries)
+        self.analyzer.load_user_data()
+
+        self.assertEqual(self.analyzer.rescore_entries(chunk_size=37), len(entries))
+        expected = [self.expected(entry['responses'][0]) for entry in entries]
+        self.assertEqual([entry['distortions'] for entry in self.analyzer.user_data], expected)
+        rebuilt = MoodAggregates()
+        rebuilt.rebuild(self.analyzer.user_data)
+        self.assertEqual(self.analyzer.aggregates.to_dict(), rebuilt.to_dict())
+
+        # Every entry now carries the current version, so a second pass scores and writes nothing.
+        with mock.patch.object(self.analyzer.storage, 'compact') as compact:
+            self.assertEqual(self.analyzer.rescore_entries(chunk_size=37), 0)
+        compact.assert_not_called()
+
+        self.analyzer.close()
+        self.analyzer = self.open()
+        self.analyzer.load_user_data()
+        self.assertEqual([entry['distortions'] for entry in self.analyzer.user_data], expected)
+        self.assertEqual(self.analyzer.rescore_entries(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
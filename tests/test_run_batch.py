@@ -0,0 +1,76 @@
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import CollaborativeProgramming
+from CollaborativeProgramming import CognitiveDistortionAnalyzer, JsonJournalStorage, run_batch
+
+SESSIONS = [
+    {'id': 'first', 'mood': 'sad', 'answer': "I always fail", 'intensity': 3},
+    {'id': 'broken', 'mood': 'sad', 'answer': "Nobody ever listens", 'intensity': 4},
+    {'id': 'not-a-session', 'intensity': 2},
+    {'id': 'last', 'mood': 'angry', 'answer': "They should know better", 'intensity': 5},
+]
+
+
+class RunBatchTest(unittest.TestCase):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.analyzer = CognitiveDistortionAnalyzer(JsonJournalStorage(
+            os.path.join(self.tmp.name, 'user_data.json'), os.path.join(self.tmp.name, 'user_data.jsonl'),
+            aggregates_path=os.path.join(self.tmp.name, 'user_stats.json')),
+            patterns_path=os.path.join(REPO_DIR, 'distortion_patterns.json'))
+        self.analyzer.load_distortions_data()
+        self.analyzer.load_user_data()
+        self.sessions_path = os.path.join(self.tmp.name, 'sessions.jsonl')
+        self.results_path = os.path.join(self.tmp.name, 'results.jsonl')
+        with open(self.sessions_path, 'w') as f:
+            f.writelines(json.dumps(session) + '\n' for session in SESSIONS)
+
+    def tearDown(self):
+        self.analyzer.close()
+        self.tmp.cleanup()
+
+    def test_failing_session_does_not_stop_the_batch(self):
+        run_session = CollaborativeProgramming.run_session
+        calls = []
+
+        def flaky(analyzer, ui, timings):
+            calls.append(None)
+            if len(calls) == 2:
+                raise KeyError('mood')
+            return run_session(analyzer, ui, timings)
+
+        stderr = io.StringIO()
+        with mock.patch.object(CollaborativeProgramming, 'run_session', side_effect=flaky), \
+                contextlib.redirect_stderr(stderr):
+            summary = run_batch(self.analyzer, self.sessions_path, self.results_path)
+
+        with open(self.results_path) as f:
+            records = {record['id']: record for record in map(json.loads, f)}
+        self.assertEqual(list(records), ['first', 'broken', 'not-a-session', 'last'])
+        self.assertEqual(records['broken']['error'], "KeyError: 'mood'")
+        self.assertIn("line 2", stderr.getvalue())
+        self.assertTrue(records['not-a-session']['error'])
+        for session_id in ('first', 'last'):
+            self.assertFalse(records[session_id]['error'])
+            self.assertTrue(records[session_id]['saved'])
+        self.assertEqual((summary['sessions'], summary['failed']), (4, 2))
+        self.assertEqual([entry['mood'] for entry in self.analyzer.storage.load()], ['sad', 'angry'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import os
+import sys
+import unittest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from CollaborativeProgramming import CognitiveDistortionAnalyzer, SentenceCache
+
+FIRST = {'overgeneralization': {'patterns': [r'\balways\b'], 'explanation': ''}}
+SECOND = {'labeling': {'patterns': [r'\bfailure\b'], 'explanation': ''}}
+
+
+class SentenceCacheTest(unittest.TestCase):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Cached sentence results belong to one pattern-set version and must never be served for another.
+    """
+
+    def test_new_pattern_set_is_not_answered_from_the_cache(self):
+        analyzer = CognitiveDistortionAnalyzer()
+        analyzer.build_distortions(FIRST)
+        text = "I always fail. I am a failure."
+        expected = [('overgeneralization', 'always')]
+        self.assertEqual(analyzer.analyze_text(text), expected)
+        self.assertEqual(analyzer.analyze_text(text.upper()), expected)
+        self.assertGreater(analyzer.sentence_cache.hits, 0)
+
+        analyzer.build_distortions(SECOND)
+        self.assertEqual(analyzer.analyze_text(text), [('labeling', 'failure')])
+        self.assertEqual(analyzer.sentence_cache.invalidations, 1)
+
+        # Going back to the first set must not pick up the second set's results either.
+        analyzer.build_distortions(FIRST)
+        self.assertEqual(analyzer.analyze_text(text), expected)
+        self.assertEqual(analyzer.sentence_cache.invalidations, 2)
+
+    def test_results_from_an_older_version_are_dropped(self):
+        cache = SentenceCache()
+        key = SentenceCache.key("I always fail")
+        self.assertIsNone(cache.get('v1', key))
+        # Another thread moves the cache on to a newer set while this lookup is still matching.
+        self.assertIsNone(cache.get('v2', SentenceCache.key("something else")))
+        cache.put('v1', key, (('overgeneralization', 'always'),))
+        self.assertIsNone(cache.get('v2', key))
+
+        cache.put('v2', key, ())
+        self.assertEqual(cache.get('v2', key), ())
+        self.assertIsNone(cache.get('v1', key))
+
+
+if __name__ == '__main__':
+    unittest.main()
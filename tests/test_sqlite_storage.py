@@ -0,0 +1,111 @@
+import datetime
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from CollaborativeProgramming import CognitiveDistortionAnalyzer, JsonJournalStorage, SQLiteStorage
+
+
+def make_entry(day, mood='sad'):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Returns:
+        dict: A minimal entry on the given day of December 2024.
+    """
+    return {'timestamp': f'2024-12-{day:02d}T10:00:00', 'mood': mood, 'responses': ['text'],
+            'distortions': ['labeling'], 'intensity': 3}
+
+
+class SQLiteStorageTest(unittest.TestCase):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, 'user_data.db')
+        self.json = JsonJournalStorage(os.path.join(self.tmp.name, 'user_data.json'),
+                                       os.path.join(self.tmp.name, 'user_data.jsonl'))
+        self.json.compact([make_entry(1), make_entry(2)])
+        self.json.close()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_import_happens_once(self):
+        storage = SQLiteStorage(self.db_path)
+        self.assertEqual(storage.import_from(self.json), 2)
+        storage.clear()
+        storage.close()
+
+        # Restarting after clear must not bring the deleted entries back from user_data.json.
+        storage = SQLiteStorage(self.db_path)
+        self.assertEqual(storage.import_from(self.json), 0)
+        self.assertEqual(list(storage.load()), [])
+        storage.close()
+
+    def test_existing_database_is_not_overwritten(self):
+        storage = SQLiteStorage(self.db_path)
+        storage.append(make_entry(5, 'happy'))
+        self.assertEqual(storage.import_from(self.json), 0)
+        self.assertEqual([entry['mood'] for entry in storage.load()], ['happy'])
+        storage.close()
+
+    def test_compact_only_commits(self):
+        storage = SQLiteStorage(self.db_path, commit_every=0)
+        storage.append_many([make_entry(1), make_entry(2)])
+        ids = storage.conn.execute('SELECT id FROM entries ORDER BY id').fetchall()
+        storage.compact([make_entry(9)])
+        self.assertFalse(storage.conn.in_transaction)
+        self.assertEqual(storage.conn.execute('SELECT id FROM entries ORDER BY id').fetchall(), ids)
+        storage.close()
+
+    def test_rewrite_replaces_entries(self):
+        storage = SQLiteStorage(self.db_path)
+        storage.append_many([make_entry(1), make_entry(2)])
+        storage.rewrite([make_entry(3, 'happy')])
+        self.assertEqual([(e['timestamp'][:10], e['mood']) for e in storage.load()], [('2024-12-03', 'happy')])
+        storage.close()
+
+    def test_mood_timeline_queries_the_index(self):
+        try:
+            import pandas  # noqa: F401
+        except ImportError:
+            self.skipTest("pandas is not installed")
+        entries = [dict(make_entry(day, mood), intensity=(day + i) % 5 + 1)
+                   for i, day in enumerate((1, 2, 2, 9, 15, 28)) for mood in ('sad', 'happy')]
+        json_storage = JsonJournalStorage(os.path.join(self.tmp.name, 'other.json'),
+                                          os.path.join(self.tmp.name, 'other.jsonl'),
+                                          aggregates_path=os.path.join(self.tmp.name, 'other_stats.json'))
+        json_storage.compact(entries)
+        storage = SQLiteStorage(self.db_path)
+        storage.append_many(entries)
+        in_memory = CognitiveDistortionAnalyzer(json_storage)
+        indexed = CognitiveDistortionAnalyzer(storage)
+        try:
+            in_memory.load_user_data()
+            indexed.load_user_data()
+            for start, end in ((datetime.date(2024, 12, 2), datetime.date(2024, 12, 8)),
+                               (datetime.date(2024, 12, 9), None), (None, datetime.date(2024, 12, 2))):
+                with self.subTest(start=start, end=end), \
+                        mock.patch.object(storage, 'mood_rows', wraps=storage.mood_rows) as mood_rows:
+                    expected = in_memory.mood_timeline(start, end, interval='day')
+                    result = indexed.mood_timeline(start, end, interval='day')
+                    mood_rows.assert_called_once()
+                    self.assertEqual(result.to_dict('records'), expected.to_dict('records'))
+                    self.assertFalse(result.empty)
+        finally:
+            in_memory.close()
+            indexed.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from CollaborativeProgramming import CognitiveDistortionAnalyzer, JsonJournalStorage, PartitionedStorage, SQLiteStorage
+
+THREADS = 4
+PER_THREAD = 50
+MOODS = ['happy', 'sad', 'angry', 'anxious']
+TEXTS = ["I always ruin everything", "Nobody ever listens to me", "I had a calm afternoon", "I should be perfect"]
+
+
+def open_storage(kind, workdir):
+    """
+    Primary Author: Team collectively
+    No techniques claimed here.
+
+    Parameters:
+        kind (str): 'json', 'sqlite' or 'partitioned'.
+        workdir (str): Directory for the storage files.
+
+    Returns:
+        A storage backend opened on files in workdir.
+    """
+    if kind == 'sqlite':
+        return SQLiteStorage(os.path.join(workdir, 'user_data.db'))
+    if kind == 'partitioned':
+        return PartitionedStorage(os.path.join(workdir, 'user_data'), user='stress')
+    return JsonJournalStorage(
+        snapshot_path=os.path.join(workdir, 'user_data.json'),
+        journal_path=os.path.join(workdir, 'user_data.jsonl'),
+        aggregates_path=os.path.join(workdir, 'user_stats.json')
+    )
+
+
+class StorageStressTest(unittest.TestCase):
+    """
+    Several threads record entries into one analyzer while another keeps saving and compacting.
+    Every backend must then hold each entry exactly once, in the order each thread added them.
+    Primary Author: Team collectively
+    No techniques claimed here.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        with open(os.path.join(REPO_DIR, 'distortion_patterns.json'), 'r') as f:
+            cls.patterns = json.load(f)
+
+    def record_concurrently(self, kind, workdir):
+        analyzer = CognitiveDistortionAnalyzer(open_storage(kind, workdir))
+        analyzer.build_distortions(self.patterns)
+        analyzer.load_user_data()
+        barrier = threading.Barrier(THREADS)
+        done = threading.Event()
+        errors = []
+
+        def add(worker):
+            barrier.wait()
+            try:
+                for i in range(PER_THREAD):
+                    text = TEXTS[i % len(TEXTS)]
+                    analyzer.add_user_entry(MOODS[i % len(MOODS)], [f"w{worker}-{i} {text}"], i % 5 + 1)
+            except Exception as e:
+                errors.append(e)
+
+        def save():
+            # Flushes and compactions racing the writer are where entries would get lost or doubled.
+            count = 0
+            while not done.wait(0.001):
+                analyzer.save_user_data(compact=count % 3 == 0)
+                count += 1
+
+        workers = [threading.Thread(target=add, args=(n,)) for n in range(THREADS)]
+        saver = threading.Thread(target=save)
+        saver.start()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        done.set()
+        saver.join()
+        analyzer.close()
+        self.assertEqual(errors, [])
+
+    def test_no_entries_lost_duplicated_or_reordered(self):
+        for kind in ('json', 'sqlite', 'partitioned'):
+            with self.subTest(storage=kind), tempfile.TemporaryDirectory() as workdir:
+                self.record_concurrently(kind, workdir)
+
+                reloaded = CognitiveDistortionAnalyzer(open_storage(kind, workdir))
+                reloaded.load_user_data()
+                try:
+                    tags = [entry['responses'][0].split(' ', 1)[0] for entry in reloaded.user_data]
+                    expected = {f"w{worker}-{i}" for worker in range(THREADS) for i in range(PER_THREAD)}
+                    self.assertEqual(len(tags), len(set(tags)), "entries stored more than once")
+                    self.assertEqual(set(tags), expected)
+                    for worker in range(THREADS):
+                        order = [int(tag.split('-')[1]) for tag in tags if tag.startswith(f"w{worker}-")]
+                        self.assertEqual(order, list(range(PER_THREAD)), f"entries of thread {worker} out of order")
+                    self.assertEqual(reloaded.aggregates.entry_count, THREADS * PER_THREAD)
+                finally:
+                    reloaded.storage.close()
+
+
+if __name__ == '__main__':
+    unittest.main()